@@ -0,0 +1,139 @@
+"""
+질문 분석 마이크로 벤치마크
+
+기존 방식(키워드마다 lower() + 부분 문자열 검색)과
+Aho-Corasick 오토마톤 한 번 순회(ragbot.matcher.analyze)를 비교합니다.
+
+사용법:
+    python benchmarks/bench_matcher.py
+"""
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ragbot.keywords import AIRLINE_KEYWORDS, RAG_KEYWORDS, SYNONYM_DICT  # noqa: E402
+from ragbot.matcher import AhoCorasick, analyze, analyze_query  # noqa: E402
+
+QUERIES = [
+    "제주항공 국제선 변경 수수료는 얼마인가요?",
+    "대한항공 국제선 환불 수수료는 얼마인가요?",
+    "진에어 국제선 노쇼 위약금은?",
+    "아시아나 국제선 탑승수속 후 미탑승 위약금",
+    "대한항공 일반석 환불 수수료",
+    "제주항공 국내선 비즈니스석 노쇼",
+    "노쇼수수료는 얼마예요",
+    "제주항공 국제선 BASIC 출발 5일 전 변경 수수료",
+    "안녕하세요 오늘 날씨 어때요",
+    "Korean Air refund fee for economy class",
+]
+
+
+# ---- 기존 구현 (비교 기준) ----
+def legacy_expand_query_with_synonyms(query: str) -> str:
+    expanded_terms = []
+    for word in query.split():
+        word_lower = word.lower()
+        expanded_terms.append(word)
+        if word_lower in SYNONYM_DICT:
+            for syn in SYNONYM_DICT[word_lower]:
+                if syn.lower() != word_lower:
+                    expanded_terms.append(syn)
+    return " ".join(dict.fromkeys(expanded_terms))
+
+
+def legacy_extract_airline_from_query(q: str) -> list:
+    airlines = []
+    q_lower = q.lower()
+    for airline, keywords in AIRLINE_KEYWORDS.items():
+        if any(kw in q_lower for kw in keywords):
+            airlines.append(airline)
+    return airlines
+
+
+def legacy_route_to_rag(q: str) -> bool:
+    q_lower = q.lower()
+    return any(kw.lower() in q_lower for kw in RAG_KEYWORDS)
+
+
+def legacy_analyze(q: str):
+    return (
+        legacy_route_to_rag(q),
+        legacy_extract_airline_from_query(q),
+        legacy_expand_query_with_synonyms(q),
+    )
+
+
+def legacy_request_path(q: str):
+    """기존 앱의 요청 1건 (라우팅 → refund_rag 분석 → 디버그 패널 항공사 재추출)"""
+    legacy_route_to_rag(q)
+    legacy_extract_airline_from_query(q)
+    legacy_expand_query_with_synonyms(q)
+    legacy_extract_airline_from_query(q)
+
+
+def new_request_path(q: str):
+    """신규 요청 1건 (analyze_query 결과를 캐시에서 재사용)"""
+    analyze_query.cache_clear()
+    analyze_query(q).use_rag
+    analyze_query(q).airlines
+    analyze_query(q).expanded_query
+    analyze_query(q).airlines
+
+
+def scaling(n: int = 300):
+    """
+    키워드 수가 늘어날 때 (항공사/동의어 추가) 모든 매칭을 찾는 비용 비교
+    - 기존 방식은 키워드 수에 비례, 오토마톤은 질문 길이에만 비례
+    """
+    rng = random.Random(0)
+    print()
+    print(f"{'키워드 수':>8} {'기존 µs':>10} {'오토마톤 µs':>12}")
+    for mult in (1, 4, 16, 64):
+        keywords = [kw.lower() for kw in RAG_KEYWORDS]
+        keywords += [
+            "".join(chr(rng.randint(0xAC00, 0xD7A3)) for _ in range(rng.randint(2, 4)))
+            for _ in range(len(RAG_KEYWORDS) * (mult - 1))
+        ]
+        ac = AhoCorasick({kw: [None] for kw in keywords})
+        lowered = [q.lower() for q in QUERIES]
+        t_old = timeit.timeit(
+            lambda: [[kw for kw in keywords if kw in ql] for ql in lowered], number=n)
+        t_new = timeit.timeit(lambda: [list(ac.iter_matches(ql)) for ql in lowered], number=n)
+        per_q = n * len(QUERIES)
+        print(f"{len(keywords):>8} {t_old / per_q * 1e6:>10.1f} {t_new / per_q * 1e6:>12.1f}")
+
+
+def main():
+    # 결과 비교 (라우팅/항공사는 동일해야 함, 동의어는 어절 내부 매칭만큼 늘어남)
+    print(f"{'질문':<40} {'라우팅':>6} {'항공사':>6} {'동의어(기존→신규)':>18}")
+    for q in QUERIES:
+        old_rag, old_airlines, old_exp = legacy_analyze(q)
+        new = analyze(q)
+        assert new.use_rag == old_rag, q
+        assert list(new.airlines) == old_airlines, q
+        print(f"{q[:38]:<40} {'OK':>6} {'OK':>6} "
+              f"{len(old_exp.split()) - len(q.split()):>8} → {len(new.expanded_query.split()) - len(q.split())}")
+
+    n = 2000
+    t_old = timeit.timeit(lambda: [legacy_analyze(q) for q in QUERIES], number=n)
+    t_new = timeit.timeit(lambda: [analyze(q) for q in QUERIES], number=n)
+    per_q = n * len(QUERIES)
+
+    print()
+    print(f"기존 (키워드별 부분 문자열 검색): {t_old / per_q * 1e6:8.1f} µs/질문")
+    print(f"신규 (Aho-Corasick 한 번 순회):  {t_new / per_q * 1e6:8.1f} µs/질문")
+    print(f"속도 비율: {t_old / t_new:.2f}x (신규는 어절 내부 동의어 매칭까지 포함)")
+
+    t_old = timeit.timeit(lambda: [legacy_request_path(q) for q in QUERIES], number=n)
+    t_new = timeit.timeit(lambda: [new_request_path(q) for q in QUERIES], number=n)
+    print(f"요청 1건 경로 - 기존: {t_old / per_q * 1e6:.1f} µs, 신규: {t_new / per_q * 1e6:.1f} µs")
+
+    scaling()
+
+
+if __name__ == "__main__":
+    main()
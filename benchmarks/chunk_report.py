@@ -0,0 +1,109 @@
+"""
+청크 분할 전/후 비교 리포트
+
+이전 방식(RecursiveCharacterTextSplitter, 겹침 400자)과
+마크다운 구조 기반 분할(ragbot.chunker)을 같은 코퍼스에 적용해 비교합니다.
+- 청크 수 / 총 글자 수 / 총 토큰 수(= 임베딩 토큰)
+- 겹침으로 중복된 글자 수
+- 중간에서 잘린 표 개수, front matter 가 섞인 청크 수
+- 답변 1회 컨텍스트 토큰 추정 (청크 평균 토큰 × k)
+
+사용법:
+    python benchmarks/chunk_report.py [--k 5]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ragbot.chunker import split_blocks, strip_front_matter  # noqa: E402
+from ragbot.corpus import find_corpus_files, load_documents, split_documents  # noqa: E402
+from ragbot.tokens import count_tokens, tokenizer_name  # noqa: E402
+
+
+def source_tables(docs) -> list:
+    """원문의 표 블록 (파일명, 표 본문)"""
+    tables = []
+    for d in docs:
+        text = d.page_content
+        for start, end in split_blocks(text, 0, len(text)):
+            if text[start:end].lstrip().startswith("|"):
+                tables.append((d.metadata["source_path"], text[start:end].strip()))
+    return tables
+
+
+def duplicated_chars(chunks) -> int:
+    """청크 글자 수 합 - 원문에서 실제로 덮는 글자 수 (= 겹침으로 중복된 양)"""
+    covered = {}
+    total = 0
+    for c in chunks:
+        start = c.metadata.get("start_index", 0)
+        body = len(c.page_content) - c.metadata.get("prefix_len", 0)
+        total += body
+        covered.setdefault(c.metadata["source_path"], []).append((start, start + body))
+    unique = 0
+    for spans in covered.values():
+        spans.sort()
+        end = -1
+        for s, e in spans:
+            if e > end:
+                unique += e - max(s, end)
+                end = e
+    return total - unique
+
+
+def report(name: str, docs, chunks, tables, k: int) -> dict:
+    tokens = [count_tokens(c.page_content) for c in chunks]
+    by_source = {}
+    for c in chunks:
+        by_source.setdefault(c.metadata["source_path"], []).append(c.page_content)
+    split_tables = sum(
+        1 for src, table in tables if not any(table in text for text in by_source.get(src, []))
+    )
+    front_matter = sum(
+        1 for c in chunks
+        if c.metadata.get("start_index", 0) < strip_front_matter(
+            next(d.page_content for d in docs if d.metadata["source_path"] == c.metadata["source_path"])
+        )
+    )
+    return {
+        "방식": name,
+        "청크 수": len(chunks),
+        "총 글자": sum(len(c.page_content) for c in chunks),
+        "총 토큰": sum(tokens),
+        "평균 토큰": round(sum(tokens) / len(tokens)),
+        "최대 토큰": max(tokens),
+        "겹침 중복 글자": duplicated_chars(chunks),
+        "잘린 표": f"{split_tables}/{len(tables)}",
+        "front matter 청크": front_matter,
+        f"컨텍스트 추정(k={k})": round(sum(tokens) / len(tokens) * k),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="청크 분할 전/후 비교")
+    parser.add_argument("--k", type=int, default=5, help="답변 1회당 검색 청크 수 (기본 5)")
+    args = parser.parse_args()
+
+    docs, _ = load_documents(find_corpus_files())
+    tables = source_tables(docs)
+
+    rows = [
+        report("recursive (이전)", docs, split_documents(docs, "recursive"), tables, args.k),
+        report("markdown (현재)", docs, split_documents(docs, "markdown"), tables, args.k),
+    ]
+
+    print(f"문서 {len(docs)}건, 원문 표 {len(tables)}개, 토크나이저: {tokenizer_name()}\n")
+    width = max(len(key) for key in rows[0])
+    for key in rows[0]:
+        before, after = rows[0][key], rows[1][key]
+        delta = ""
+        if isinstance(before, int) and before and key != "방식":
+            delta = f"  ({(after - before) / before:+.0%})"
+        print(f"{key:<{width}}  {str(before):>18}  {str(after):>18}{delta}")
+
+
+if __name__ == "__main__":
+    main()
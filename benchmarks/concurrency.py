@@ -0,0 +1,160 @@
+"""
+동시 사용자 처리량 벤치마크 (동기 / 비동기 × 질의 임베딩 마이크로 배치)
+
+RagEngine.refund_rag(스레드) 와 arefund_rag(asyncio)를 동시 사용자 1 / 8 / 32 명으로 돌려
+처리량(req/s)과 요청 지연 p50/p95, 임베딩 왕복 횟수를 비교합니다.
+네트워크 대신 지연을 넣은 대역을 씁니다.
+- 임베딩: HashingEmbeddings(latency=왕복 지연, max_concurrency=제공자 동시 요청 제한)
+- LLM: FakeUsageChatModel(latency=응답 지연, 비동기 호출은 asyncio.sleep)
+질문은 골든셋 질문에 요청 번호를 붙여 매번 다르게 만들므로 질의 임베딩 / 답변 캐시는 적중하지 않습니다.
+
+모드
+- sync        : 사용자마다 스레드, 요청마다 embed_query 왕복
+- sync+batch  : 사용자마다 스레드, EmbeddingBatcher 로 동시 질의를 모아 embed_documents 한 번
+- async       : 한 이벤트 루프, 요청마다 aembed_query 왕복
+- async+batch : 한 이벤트 루프 + EmbeddingBatcher (server.py 와 같은 구성)
+
+사용법:
+    python benchmarks/concurrency.py [--users 1 8 32] [--requests 4] [--embed-latency 0.05] [--llm-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ragbot.corpus import find_corpus_files  # noqa: E402
+from ragbot.engine import RagEngine  # noqa: E402
+from ragbot.fakes import FakeUsageChatModel, HashingEmbeddings  # noqa: E402
+from run_golden import EMBEDDING_NAME, load_golden, percentiles  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+MODES = ("sync", "sync+batch", "async", "async+batch")
+
+
+def make_engine(index_dir: str, files: list, mode: str, args):
+    """모드별 엔진 (캐시가 비어 있는 새 엔진, 인덱스는 미리 빌드한 아티팩트 로드)"""
+    emb = HashingEmbeddings(latency=args.embed_latency, max_concurrency=args.embed_concurrency)
+    engine = RagEngine(
+        llm=FakeUsageChatModel(latency=args.llm_latency),
+        embeddings=emb,
+        index_dir=index_dir,
+        embedding_model=EMBEDDING_NAME,
+        embed_batch_wait_ms=args.batch_wait_ms if mode.endswith("+batch") else 0,
+    )
+    engine.load(files)
+    emb.calls = 0
+    return engine, emb
+
+
+def run_sync(engine, questions: list, users: int) -> list:
+    """사용자마다 스레드 하나, 각자 자기 몫의 질문을 차례로"""
+    def user(qs):
+        out = []
+        for q in qs:
+            t = time.perf_counter()
+            result = engine.refund_rag(q)
+            out.append((time.perf_counter() - t, result.path))
+        return out
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        parts = pool.map(user, [questions[i::users] for i in range(users)])
+        return [row for part in parts for row in part]
+
+
+def run_async(engine, questions: list, users: int) -> list:
+    """한 이벤트 루프에서 사용자 코루틴 users 개"""
+    async def user(qs):
+        out = []
+        for q in qs:
+            t = time.perf_counter()
+            result = await engine.arefund_rag(q)
+            out.append((time.perf_counter() - t, result.path))
+        return out
+
+    async def main():
+        parts = await asyncio.gather(*(user(questions[i::users]) for i in range(users)))
+        return [row for part in parts for row in part]
+
+    return asyncio.run(main())
+
+
+def run_one(index_dir: str, files: list, mode: str, users: int, base_questions: list, args) -> dict:
+    engine, emb = make_engine(index_dir, files, mode, args)
+    n = users * args.requests
+    questions = [f"{base_questions[i % len(base_questions)]} (문의 {i})" for i in range(n)]
+
+    start = time.perf_counter()
+    rows = (run_async if mode.startswith("async") else run_sync)(engine, questions, users)
+    wall = time.perf_counter() - start
+
+    latency = percentiles([sec * 1000 for sec, _ in rows])
+    paths = {}
+    for _, path in rows:
+        paths[path] = paths.get(path, 0) + 1
+    batch = engine.batcher.stats() if engine.batcher is not None else None
+    return {
+        "mode": mode,
+        "users": users,
+        "requests": n,
+        "wall_s": round(wall, 3),
+        "rps": round(n / wall, 2),
+        "p50_ms": latency["p50_ms"],
+        "p95_ms": latency["p95_ms"],
+        "embed_calls": emb.calls,
+        "avg_batch": round(batch["avg_batch"], 2) if batch else 1.0,
+        "paths": paths,
+    }
+
+
+def print_report(rows: list, args) -> None:
+    print(f"임베딩 왕복 {args.embed_latency * 1000:.0f}ms (동시 {args.embed_concurrency or '무제한'}) · "
+          f"LLM {args.llm_latency * 1000:.0f}ms · 배치 대기 {args.batch_wait_ms}ms · 사용자당 {args.requests}건\n")
+    print(f"  {'mode':<12} {'users':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'embed':>6} {'batch':>6}  paths")
+    for r in rows:
+        paths = " ".join(f"{k}={v}" for k, v in sorted(r["paths"].items()))
+        print(f"  {r['mode']:<12} {r['users']:>5} {r['rps']:>8.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['embed_calls']:>6} {r['avg_batch']:>6.2f}  {paths}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동시 사용자 처리량 벤치마크")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32], help="동시 사용자 수")
+    parser.add_argument("--requests", type=int, default=4, help="사용자당 요청 수")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="임베딩 왕복 지연 (초)")
+    parser.add_argument("--embed-concurrency", type=int, default=4, help="임베딩 동시 요청 제한 (0 이면 없음)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="LLM 응답 지연 (초)")
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0, help="마이크로 배치 대기 시간")
+    parser.add_argument("--out", default=None, help="결과 JSON (기본 benchmarks/results/concurrency-<시각>.json)")
+    args = parser.parse_args()
+
+    files = find_corpus_files()
+    base_questions = [c["q"] for c in load_golden(HERE / "golden_set.json") if c["source"] != "filter"]
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="concurrency-index-") as index_dir:
+        # 인덱스는 지연 없는 임베딩으로 한 번만 빌드
+        RagEngine(llm=FakeUsageChatModel(), embeddings=HashingEmbeddings(), index_dir=index_dir,
+                  embedding_model=EMBEDDING_NAME, embed_batch_wait_ms=0).load(files)
+        for users in args.users:
+            for mode in args.modes:
+                rows.append(run_one(index_dir, files, mode, users, base_questions, args))
+                print(f"  ... {mode} × {users}: {rows[-1]['rps']:.2f} req/s", file=sys.stderr)
+
+    print_report(rows, args)
+
+    out = Path(args.out) if args.out else HERE / "results" / f"concurrency-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"args": vars(args), "runs": rows}, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+임베딩 백엔드 비교 (질의 임베딩 지연 + 청크 인코딩 처리량)
+
+같은 코퍼스 청크와 골든셋 질문으로 백엔드마다
+- 질의 한 건 embed_query 지연 p50/p95 (ms)
+- 질의 여러 건 한 번에 (마이크로 배처가 부르는 embed_queries / embed_documents) 건당 ms
+- 전체 청크 embed_documents 처리량 (청크/초)
+를 잽니다. local 은 --model-path 의 ONNX / sentence-transformers 모델, openai 는 API 키가 있을 때만 의미가 있습니다.
+
+사용법:
+    python benchmarks/embedding_backends.py [--backends hashing local] [--model-path models/multilingual-e5-small]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ragbot.config import EMBEDDING_MODEL, EMBEDDING_MODEL_PATH  # noqa: E402
+from ragbot.corpus import find_corpus_files, load_documents, split_documents  # noqa: E402
+from ragbot.embeddings import BACKENDS, embedding_model_name, make_embeddings  # noqa: E402
+from run_golden import load_golden, percentiles  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+
+
+def measure(emb, questions: list, chunks: list, repeat: int) -> dict:
+    emb.embed_query(questions[0])        # 모델 로드 / 첫 호출 준비
+    single = []
+    for _ in range(repeat):
+        for q in questions:
+            t = time.perf_counter()
+            emb.embed_query(q)
+            single.append((time.perf_counter() - t) * 1000)
+
+    embed_batch = getattr(emb, "embed_queries", emb.embed_documents)
+    t = time.perf_counter()
+    for _ in range(repeat):
+        embed_batch(questions)
+    batch_ms = (time.perf_counter() - t) * 1000 / (repeat * len(questions))
+
+    t = time.perf_counter()
+    vectors = emb.embed_documents(chunks)
+    docs_sec = time.perf_counter() - t
+    return {
+        "dim": len(vectors[0]),
+        "query_p50_ms": percentiles(single)["p50_ms"],
+        "query_p95_ms": percentiles(single)["p95_ms"],
+        "batched_query_ms": round(batch_ms, 3),
+        "chunks_per_s": round(len(chunks) / docs_sec, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 비교")
+    parser.add_argument("--backends", nargs="+", default=["hashing", "local"], choices=BACKENDS)
+    parser.add_argument("--model", default=EMBEDDING_MODEL, help="openai 모델 이름")
+    parser.add_argument("--model-path", default=EMBEDDING_MODEL_PATH, help="로컬 모델 폴더")
+    parser.add_argument("--repeat", type=int, default=3, help="질의 반복 횟수")
+    args = parser.parse_args()
+
+    questions = [c["q"] for c in load_golden(HERE / "golden_set.json") if c["source"] != "filter"]
+    docs, _ = load_documents(find_corpus_files())
+    chunks = [d.page_content for d in split_documents(docs)]
+
+    print(f"질문 {len(questions)}건 × {args.repeat} · 청크 {len(chunks)}건\n")
+    print(f"  {'backend':<28} {'dim':>5} {'query p50':>10} {'p95':>8} {'batched':>8} {'chunks/s':>9}")
+    for backend in args.backends:
+        if backend == "local" and not args.model_path:
+            print(f"  {backend:<28} (--model-path 없음, 건너뜀)")
+            continue
+        name = embedding_model_name(backend, args.model, args.model_path)
+        r = measure(make_embeddings(backend, args.model, args.model_path), questions, chunks, args.repeat)
+        print(f"  {name:<28} {r['dim']:>5} {r['query_p50_ms']:>10.3f} {r['query_p95_ms']:>8.3f} "
+              f"{r['batched_query_ms']:>8.3f} {r['chunks_per_s']:>9.1f}")
+    print("\n  (ms: 질의 한 건 / batched: 질의를 한 번에 묶었을 때 건당)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+대화 이력 크기 비교 (지난 답변 원문 vs 요약, 오프라인)
+
+골든셋 질문으로 긴 대화를 흉내 내고, 턴마다 프롬프트 "최근 대화" 부분의 토큰 수를
+format_history(원문 그대로) 와 HistoryCompressor(지난 답변 요약) 로 비교합니다.
+어시스턴트 답변은 실제 검색 결과로 만듭니다.
+- 수수료 표 직접 조회 답변: 엔진 답변 그대로
+- RAG 답변: LLM 출력 형식(## 제목 + 근거 청크 표 + 안내 문구)을 흉내 내 상위 청크 본문을 이어 붙임
+
+사용법:
+    python benchmarks/history_report.py [--turns 30] [--chunks 2]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ragbot.config import HISTORY_TURNS  # noqa: E402
+from ragbot.corpus import find_corpus_files  # noqa: E402
+from ragbot.engine import RagEngine, format_history  # noqa: E402
+from ragbot.fakes import FakeUsageChatModel, HashingEmbeddings  # noqa: E402
+from ragbot.history import HistoryCompressor  # noqa: E402
+from ragbot.tokens import count_tokens, tokenizer_name  # noqa: E402
+from run_golden import EMBEDDING_NAME, load_golden  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+DISCLAIMER = "⚠️ 정확한 정보는 해당 항공사 공식 웹사이트를 확인해주세요."
+
+
+def make_answer(engine, q: str, n_chunks: int) -> str:
+    """질문 → 어시스턴트 답변 (수수료 표 답변은 그대로, RAG 답변은 상위 청크로 흉내)"""
+    result = engine.refund_rag(q)
+    if result.path != "rag":
+        return result.answer
+    parts = [f"## {result.sources[0]['airline']} {result.sources[0]['section'].split(' > ')[-1]}"]
+    for src in result.sources[:n_chunks]:
+        parts.append(engine.chunk(src["chunk_id"])["content"])
+    parts.append(DISCLAIMER)
+    return "\n\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 이력 크기 비교 (원문 vs 요약)")
+    parser.add_argument("--turns", type=int, default=30, help="대화 턴 수 (질문 + 답변 = 1턴)")
+    parser.add_argument("--chunks", type=int, default=2, help="RAG 답변 하나에 들어가는 청크 수")
+    parser.add_argument("--history-turns", type=int, default=HISTORY_TURNS, help="프롬프트에 넣는 최근 대화 수")
+    args = parser.parse_args()
+
+    questions = [c["q"] for c in load_golden(HERE / "golden_set.json") if c["source"] != "filter"]
+    compressor = HistoryCompressor(args.history_turns)
+    history, rows = [], []
+    with tempfile.TemporaryDirectory(prefix="history-index-") as index_dir:
+        engine = RagEngine(llm=FakeUsageChatModel(), embeddings=HashingEmbeddings(), index_dir=index_dir,
+                           embedding_model=EMBEDDING_NAME, embed_batch_wait_ms=0)
+        engine.load(find_corpus_files())
+        for turn in range(args.turns):
+            q = questions[turn % len(questions)]
+            raw = format_history(history, args.history_turns)
+            t = time.perf_counter()
+            compressed = compressor.format(history)
+            ms = (time.perf_counter() - t) * 1000
+            rows.append((turn + 1, count_tokens(raw), count_tokens(compressed), ms))
+            history += [("user", q), ("assistant", make_answer(engine, q, args.chunks))]
+
+    print(f"대화 이력 토큰 ({tokenizer_name()}) · 최근 {args.history_turns}개 대화 · RAG 답변당 청크 {args.chunks}개\n")
+    print(f"  {'turn':>4} {'원문':>8} {'요약':>8} {'절감':>7} {'format ms':>10}")
+    for turn, raw, comp, ms in rows:
+        if turn in (1, 2, 3, 5) or turn % 5 == 0:
+            saved = 1 - comp / raw if raw else 0.0
+            print(f"  {turn:>4} {raw:>8} {comp:>8} {saved:>7.0%} {ms:>10.2f}")
+    tail = rows[args.history_turns // 2 + 1:]
+    if tail:
+        raw_avg = sum(r[1] for r in tail) / len(tail)
+        comp_avg = sum(r[2] for r in tail) / len(tail)
+        print(f"\n  이력이 찬 뒤 평균: 원문 {raw_avg:.0f} → 요약 {comp_avg:.0f} 토큰 "
+              f"(최대 {max(r[1] for r in tail)} → {max(r[2] for r in tail)})")
+    print(f"  요약 캐시: {compressor.stats()['misses']}회 계산 / {compressor.stats()['hits']}회 재사용")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+워커 프로세스별 인덱스 메모리 / 시작 시간 (메모리 매핑 아티팩트 vs 워커마다 사본)
+
+코퍼스 청크를 scale 배로 복제한 인덱스를 임시 폴더에 만들고, 워커 프로세스 N 개가 동시에 로드해
+검색기를 만들고 골든셋 질문을 한 번씩 검색한 뒤 각자의 메모리를 /proc/self/smaps_rollup 으로 잽니다 (Linux).
+
+모드
+- mmap: INDEX_MMAP=1 (기본) - 배열 / 청크 파일을 읽기 전용 매핑, 호스트에 페이지 캐시 한 벌
+- private: INDEX_MMAP=0 - 같은 파일을 워커마다 프로세스 메모리로 읽음
+- rebuild: 이전 방식 흉내 - private + 청크를 모두 Document 로 만들고 BM25 를 다시 토큰화
+
+보고 항목 (워커 평균)
+- start ms: 로드 + 검색기 구성 시간
+- USS MB: 워커 혼자 쓰는 메모리 (로드 전 대비 증가분)
+- PSS MB: 공유 페이지를 매핑한 워커 수로 나눈 몫까지 더한 메모리 (로드 전 대비), × 워커 수 = 호스트 합계
+
+사용법:
+    python benchmarks/index_memory.py [--scales 1 100 1000] [--workers 4] [--modes mmap private rebuild]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from ragbot.corpus import find_corpus_files, load_documents, split_documents  # noqa: E402
+from ragbot.fakes import HashingEmbeddings  # noqa: E402
+from ragbot.index_store import FORMAT_VERSION, save_index  # noqa: E402
+from run_golden import load_golden  # noqa: E402
+from vector_index import make_corpus  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+HERE = ROOT / "benchmarks"
+MODES = ("mmap", "private", "rebuild")
+
+
+def smaps() -> dict:
+    """현재 프로세스 메모리 (KB): Rss / Pss / USS(Private_Clean + Private_Dirty)"""
+    fields = {}
+    for line in Path("/proc/self/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return {"rss": fields["Rss"], "pss": fields["Pss"],
+            "uss": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def child(index_dir: str, mode: str, dtype: str) -> None:
+    """(자식 프로세스) 인덱스 로드 + 검색 → ready 출력 → 부모 신호를 받으면 메모리 보고"""
+    from langchain_core.documents import Document  # noqa: F401  (import 비용은 측정에서 제외)
+
+    from ragbot.index_store import load_index
+    from ragbot.retrieval import HybridRetriever
+    from ragbot.sparse import BM25Index
+
+    emb = HashingEmbeddings()
+    questions = [c["q"] for c in load_golden(HERE / "golden_set.json")]
+    vectors = emb.embed_documents(questions)
+    before = smaps()
+
+    t = time.perf_counter()
+    index = load_index(index_dir, mmap=mode == "mmap")
+    retriever = HybridRetriever.from_index(index, emb, "numpy", dtype)
+    keep = None
+    if mode == "rebuild":
+        keep = list(index.chunks)
+        retriever.sparse = BM25Index([d.page_content for d in keep])
+    start_ms = (time.perf_counter() - t) * 1000
+
+    for q, v in zip(questions, vectors):
+        retriever.search(q, v, 10)
+    print("ready", flush=True)
+    sys.stdin.readline()
+    after = smaps()
+    print(json.dumps({
+        "start_ms": round(start_ms, 1),
+        "uss_mb": round((after["uss"] - before["uss"]) / 1024, 2),
+        "pss_mb": round((after["pss"] - before["pss"]) / 1024, 2),
+        "rss_mb": round((after["rss"] - before["rss"]) / 1024, 2),
+        "kept": len(keep or ()),
+    }), flush=True)
+
+
+def run_workers(index_dir: str, mode: str, dtype: str, n: int) -> list:
+    """워커 n 개를 동시에 띄워 모두 로드를 마친 뒤 한꺼번에 메모리 측정"""
+    argv = [sys.executable, __file__, "--child", index_dir, "--modes", mode, "--dtype", dtype]
+    procs = [subprocess.Popen(argv, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+             for _ in range(n)]
+    for p in procs:
+        if p.stdout.readline().strip() != "ready":
+            raise RuntimeError(f"워커가 준비되지 않았습니다 (exit {p.wait()})")
+    for p in procs:
+        p.stdin.write("\n")
+        p.stdin.flush()
+    results = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.wait()
+    return results
+
+
+def build_scaled(index_dir: str, chunks: list, base: np.ndarray, scale: int) -> int:
+    """청크 scale 배 복제 인덱스를 index_dir 에 저장 → 청크 수"""
+    matrix, docs = make_corpus(chunks, base, scale, noise=0.02)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "corpus_hash": f"bench{scale:08d}",
+        "embedding_model": "hashing-512",
+        "dim": int(matrix.shape[1]),
+        "n_documents": 0,
+        "n_chunks": len(docs),
+        "airlines": sorted({d.metadata["airline"] for d in docs}),
+        "files": [],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    save_index(index_dir, manifest, matrix, docs)
+    return len(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 프로세스별 인덱스 메모리 / 시작 시간")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100, 1000], help="코퍼스 복제 배수")
+    parser.add_argument("--workers", type=int, default=4, help="동시 워커 프로세스 수")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16", "int8"], help="벡터 저장 형식")
+    parser.add_argument("--out", default=None, help="결과 JSON (기본 benchmarks/results/index-memory-<시각>.json)")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.modes[0], args.dtype)
+        return
+
+    emb = HashingEmbeddings()
+    docs, _ = load_documents(find_corpus_files())
+    chunks = split_documents(docs)
+    base = np.asarray(emb.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+
+    rows = []
+    print(f"워커 {args.workers}개 동시 로드 · 벡터 {args.dtype}\n")
+    print(f"  {'scale':>5} {'chunks':>7} {'mode':<8} {'start ms':>9} {'USS MB':>8} {'PSS MB':>8} {'host PSS':>9}")
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory(prefix="index-memory-") as index_dir:
+            n_chunks = build_scaled(index_dir, chunks, base, scale)
+            for mode in args.modes:
+                workers = run_workers(index_dir, mode, args.dtype, args.workers)
+                row = {
+                    "scale": scale, "chunks": n_chunks, "mode": mode,
+                    "start_ms": round(float(np.mean([w["start_ms"] for w in workers])), 1),
+                    "uss_mb": round(float(np.mean([w["uss_mb"] for w in workers])), 2),
+                    "pss_mb": round(float(np.mean([w["pss_mb"] for w in workers])), 2),
+                    "host_pss_mb": round(float(np.sum([w["pss_mb"] for w in workers])), 2),
+                }
+                rows.append(row)
+                print(f"  {scale:>5} {n_chunks:>7} {mode:<8} {row['start_ms']:>9.1f} {row['uss_mb']:>8.2f} "
+                      f"{row['pss_mb']:>8.2f} {row['host_pss_mb']:>9.2f}")
+
+    out = Path(args.out) if args.out else HERE / "results" / f"index-memory-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"args": vars(args), "runs": rows}, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
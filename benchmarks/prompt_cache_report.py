@@ -0,0 +1,76 @@
+"""
+프롬프트 배치별 접두어 캐시 재사용률 비교 (오프라인)
+
+이전 배치(고정 지시문 중간에 이력/문서/질문)와 현재 배치(고정 system 접두어 + 가변 human 메시지)로
+같은 요청들을 FakeUsageChatModel 에 보내고, 응답 usage_metadata 를 UsageRecorder 로 모아
+프롬프트 / 캐시된 프롬프트 토큰을 비교합니다.
+(FakeUsageChatModel 은 OpenAI 규칙을 흉내냄: 1024 토큰 이상 같은 접두어, 128 토큰 단위)
+
+사용법:
+    python benchmarks/prompt_cache_report.py [--requests 20]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.output_parsers import StrOutputParser  # noqa: E402
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+
+from ragbot.corpus import find_corpus_files, load_documents, split_documents  # noqa: E402
+from ragbot.fakes import FakeUsageChatModel  # noqa: E402
+from ragbot.prompts import RAG_PROMPT_VERSION, RAG_SYSTEM, build_rag_prompt, prefix_fingerprint  # noqa: E402
+from ragbot.tokens import count_tokens, tokenizer_name  # noqa: E402
+from ragbot.usage import UsageRecorder  # noqa: E402
+
+QUESTIONS = [
+    "대한항공 국제선 환불 수수료는 얼마인가요?",
+    "제주항공 국제선 변경 수수료는?",
+    "진에어 국제선 노쇼 위약금은?",
+    "아시아나 국제선 탑승수속 후 미탑승 위약금",
+    "에어서울 국내선 환불 수수료",
+    "이스타항공 국제선 특가운임 변경 수수료는?",
+]
+
+
+def legacy_prompt() -> ChatPromptTemplate:
+    """rag-v1 배치: 가변 부분이 고정 지시문 한가운데"""
+    intro, rules = RAG_SYSTEM.split("\n\n📋 ", 1)
+    return ChatPromptTemplate.from_template(
+        "\n" + intro + "\n\n최근 대화:\n{history}\n\n참고 정책 문서:\n{context}\n\n사용자 질문: {q}\n\n📋 "
+        + rules + "\n\n답변:\n"
+    )
+
+
+def run(prompt, requests: list) -> dict:
+    recorder = UsageRecorder()
+    chain = prompt | FakeUsageChatModel() | StrOutputParser()
+    for inputs in requests:
+        chain.invoke(inputs, config={"callbacks": [recorder]})
+    return recorder.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프롬프트 접두어 캐시 재사용률 비교")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    docs, _ = load_documents(find_corpus_files())
+    chunks = split_documents(docs)
+    requests = []
+    for i in range(args.requests):
+        context = "\n\n".join(c.page_content for c in chunks[i % len(chunks):i % len(chunks) + 3])
+        requests.append({"history": "", "context": context, "q": QUESTIONS[i % len(QUESTIONS)]})
+
+    print(f"요청 {len(requests)}건, 토크나이저: {tokenizer_name()}")
+    print(f"고정 접두어: {count_tokens(RAG_SYSTEM)} 토큰 ({RAG_PROMPT_VERSION}, {prefix_fingerprint()})\n")
+    print(f"{'배치':<14}{'프롬프트':>10}{'캐시':>10}{'캐시 비율':>10}")
+    for name, prompt in (("rag-v1 (이전)", legacy_prompt()), (f"{RAG_PROMPT_VERSION} (현재)", build_rag_prompt())):
+        s = run(prompt, requests)
+        print(f"{name:<14}{s['prompt_tokens']:>10,}{s['cached_tokens']:>10,}{s['cache_ratio']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+규정 문서 수정 반영 비용 (전체 재빌드 vs 증분 재색인)
+
+코퍼스 MD 파일을 scale 벌 복사한 임시 코퍼스로 인덱스를 만든 뒤 파일 하나를 고치고
+- full: 새 인덱스 폴더에서 engine.load() (재시작 / 캐시 초기화 후 콜드 빌드와 같은 경로)
+- refresh: 기존 엔진의 engine.refresh() (파일 감시가 부르는 증분 재색인 + 세대 교체)
+의 소요 시간과 다시 임베딩한 청크 수를 비교합니다. 임베딩은 해싱 대역이라 시간은 분할 / 저장 비용 위주이고,
+원격 임베딩이면 "임베딩 청크" 수만큼 API 호출 비용이 더 듭니다.
+
+사용법:
+    python benchmarks/reindex.py [--scales 1 10 100] [--repeat 3]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ragbot.corpus import find_corpus_files  # noqa: E402
+from ragbot.embedding_cache import CachedEmbeddings  # noqa: E402
+from ragbot.engine import RagEngine  # noqa: E402
+from ragbot.fakes import FakeUsageChatModel, HashingEmbeddings  # noqa: E402
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """임베딩한 텍스트 수를 세는 해싱 임베딩"""
+
+    def __init__(self):
+        super().__init__()
+        self.texts = 0
+
+    def embed_documents(self, texts: list) -> list:
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+
+def make_corpus(root: Path, scale: int) -> list:
+    """
+    코퍼스 파일을 scale 벌 복사 (파일명에 번호를 붙여 항공사 추출은 그대로)
+    본문 줄마다 벌 번호를 붙여 복사본 청크끼리 임베딩 캐시에서 겹치지 않게
+    """
+    root.mkdir(parents=True)
+    for i in range(scale):
+        for fp in find_corpus_files():
+            lines = Path(fp).read_text(encoding="utf-8").splitlines()
+            text = "\n".join(f"{line} ({i})" if line.strip() and not line.startswith("#") else line for line in lines)
+            (root / f"{Path(fp).stem}_{i:04d}.md").write_text(text + "\n", encoding="utf-8")
+    return [str(root / "*.md")]
+
+
+def make_engine(index_dir: Path, emb) -> RagEngine:
+    """벤치마크 엔진 (임베딩 디스크 캐시도 index_dir 안에 따로 두어 공유 캐시가 임베딩 수를 가리지 않게)"""
+    engine = RagEngine(llm=FakeUsageChatModel(), embeddings=emb, index_dir=index_dir,
+                       embedding_model="hashing-512", embed_batch_wait_ms=0)
+    engine.embeddings = CachedEmbeddings(emb, "hashing-512", cache_dir=Path(index_dir) / "embeddings")
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규정 문서 수정 반영 비용 (전체 재빌드 vs 증분 재색인)")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="코퍼스 복사 벌 수")
+    parser.add_argument("--repeat", type=int, default=3, help="수정 반복 횟수")
+    args = parser.parse_args()
+
+    print(f"  {'scale':>5} {'files':>6} {'chunks':>7} {'full ms':>9} {'embedded':>9} {'refresh ms':>11} {'embedded':>9}")
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory(prefix="reindex-") as tmp:
+            tmp = Path(tmp)
+            patterns = make_corpus(tmp / "corpus", scale)
+            emb = CountingEmbeddings()
+            engine = make_engine(tmp / "live", emb)
+            engine.load(find_corpus_files(patterns))
+            target = Path(find_corpus_files(patterns)[0])
+
+            full_ms, refresh_ms, full_texts, refresh_texts = [], [], [], []
+            for i in range(args.repeat):
+                target.write_text(target.read_text(encoding="utf-8") + f"\n\n추가 안내 {i}: 수수료 면제 기간 연장.\n",
+                                  encoding="utf-8")
+                files = find_corpus_files(patterns)
+
+                before = emb.texts
+                t = time.perf_counter()
+                engine.refresh(files)
+                refresh_ms.append((time.perf_counter() - t) * 1000)
+                refresh_texts.append(emb.texts - before)
+
+                cold = CountingEmbeddings()
+                t = time.perf_counter()
+                make_engine(tmp / f"cold-{i}", cold).load(files)
+                full_ms.append((time.perf_counter() - t) * 1000)
+                full_texts.append(cold.texts)
+
+            n_files = len(find_corpus_files(patterns))
+            n_chunks = engine.info()["n_chunks"]
+            print(f"  {scale:>5} {n_files:>6} {n_chunks:>7} {sorted(full_ms)[len(full_ms) // 2]:>9.1f} "
+                  f"{max(full_texts):>9} {sorted(refresh_ms)[len(refresh_ms) // 2]:>11.1f} {max(refresh_texts):>9}")
+    print("\n  (ms: 중앙값 / embedded: 다시 임베딩한 청크 수)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+골든셋 오프라인 벤치마크 (검색 품질 + 단계별 지연)
+
+SYNONYM_DICT / 청크 분할 / k / 유사도 임계값을 바꿨을 때 검색이 나아졌는지 비교하기 위한 도구입니다.
+네트워크 없이 결정적 대역(HashingEmbeddings, FakeUsageChatModel)으로 인덱스를 임시 폴더에 빌드하고,
+골든셋 질문을 refund_rag() 와 같은 경로(route_to_rag → ragbot.pipeline.retrieve → RAG 프롬프트)로 재생합니다.
+
+골든셋 (benchmarks/golden_set.json)
+- 사이드바 예시 질문
+- 사이드바 필터 검색의 모든 조합 (필터 검색은 앱과 같이 라우팅 없이 바로 RAG)
+- 노쇼 / Gate No-Show 등 경계 사례
+- 여러 항공사 비교 질문
+
+보고 항목
+- recall@k: 상위 k 근거 중 기대 항공사 + 기대 절(제목)이 하나라도 있는 질문 비율 (수수료 표 답변은 해당 행 기준)
+- 항공사 recall@k: 기대 항공사 청크가 하나라도 있는 비율 / 항공사 정밀도: 근거 중 기대 항공사 비율
+- 정밀도: 근거 중 기대 항공사 + 기대 절까지 맞는 비율 (재순위로 적은 청크를 고를 때 함께 확인)
+- 항공사 커버리지: 비교 질문에서 기대 항공사마다 절까지 맞는 근거가 있는 비율
+- 수수료 표 답변: 기대 금액으로 답했는지 / 조건이 모자란 질문은 검색으로 넘어갔는지 (fare, no_fare_answer)
+- 단계별 p50/p95 지연 (ms), 컨텍스트 토큰 합계/평균
+결과는 JSON 으로 저장하며 --compare 로 이전 실행과 비교합니다.
+(해싱 임베딩은 실제 임베딩보다 의미 검색이 약하므로 절대값보다 변경 전/후 비교에 사용,
+ 관련도 척도도 달라 유사도 임계값은 기본으로 끄고 순위만 비교)
+
+사용법:
+    python benchmarks/run_golden.py [--k 5] [--threshold 0.3] [--repeat 3] [--compare 이전결과.json]
+    python benchmarks/run_golden.py --reranker lexical --compare 재순위전.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from langchain_core.output_parsers import StrOutputParser  # noqa: E402
+
+from ragbot.config import (  # noqa: E402
+    CHUNK_MIN_SIZE, CHUNK_SIZE, CHUNKER, CONTEXT_TOKEN_BUDGET, LEXICAL_MIN_RATIO, LLM_MODEL, MULTI_AIRLINE_QUOTA,
+    RERANK_MIN_RATIO,
+    RERANK_TOP_N, RERANKER, VECTOR_DTYPE, VECTOR_INDEX,
+)
+from ragbot.corpus import corpus_hash, find_corpus_files  # noqa: E402
+from ragbot.fakes import FakeUsageChatModel, HashingEmbeddings  # noqa: E402
+from ragbot.index_store import build_index  # noqa: E402
+from ragbot.matcher import route_to_rag  # noqa: E402
+from ragbot.pipeline import STAGES, retrieve  # noqa: E402
+from ragbot.prompts import RAG_PROMPT_VERSION, build_rag_prompt  # noqa: E402
+from ragbot.query_cache import QueryEmbeddingCache  # noqa: E402
+from ragbot.rerank import RERANKERS, make_reranker  # noqa: E402
+from ragbot.retrieval import HybridRetriever  # noqa: E402
+from ragbot.tokens import tokenizer_name  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+EMBEDDING_NAME = "hashing-512"
+REPORT_STAGES = ("route",) + STAGES + ("llm", "total")
+SUMMARY_KEYS = ("recall@k", "airline_recall@k", "airline_precision", "precision", "empty_correct",
+                "fare_answers", "fare_correct", "context_tokens_mean", "total_p50_ms", "total_p95_ms")
+
+
+def load_golden(path) -> list:
+    """골든셋 파일 → 질문 목록 (필터 조합 펼침)"""
+    golden = json.loads(Path(path).read_text(encoding="utf-8"))
+    cases = [dict(c) for c in golden["questions"]]
+
+    f = golden.get("filters")
+    if f:
+        absent = set(f.get("absent_airlines", []))
+        no_fare = set(f.get("no_fare_answer", []))
+        options = [[None] + f[name] for name in ("airline", "route", "seat", "regulation")]
+        for airline, route, seat, regulation in itertools.product(*options):
+            parts = [p for p in (airline, route, seat, regulation) if p]
+            if not parts:
+                continue
+            case = {
+                "id": "filter-" + "-".join(parts),
+                "source": "filter",
+                "q": " ".join(parts),
+                "airlines": [airline] if airline else [],
+                "sections": f["sections_by_regulation"].get(regulation, []) if regulation else [],
+                "expect_empty": airline in absent,
+            }
+            if regulation in no_fare:
+                case["fare"] = False
+            cases.append(case)
+    return cases
+
+
+def chunk_headings(doc) -> str:
+    """청크의 제목 문자열 (제목 경로 + 본문 안 제목 줄, 소문자)"""
+    lines = [doc.metadata.get("heading_path", "")]
+    lines += [line for line in doc.page_content.splitlines() if line.startswith("#")]
+    return "\n".join(lines).lower()
+
+
+def is_relevant(airline: str, headings: str, case: dict) -> tuple:
+    """(항공사 일치, 항공사 + 절 일치)"""
+    airline_ok = not case["airlines"] or airline in case["airlines"]
+    section_ok = not case["sections"] or any(s.lower() in headings for s in case["sections"])
+    return airline_ok, airline_ok and section_ok
+
+
+def run_case(case: dict, retriever, query_cache, fare_table, chain, args, reranker=None) -> dict:
+    """질문 한 건 재생 (필터 조합은 앱과 같이 라우팅 없이 RAG)"""
+    q = case["q"]
+    timings = {}
+    start = time.perf_counter()
+
+    t = time.perf_counter()
+    routed = case["source"] == "filter" or route_to_rag(q)
+    timings["route"] = time.perf_counter() - t
+
+    row = {"id": case["id"], "source": case["source"], "q": q, "routed": routed,
+           "fare_answer": False, "detected": [], "ranks": [], "hit_rank": None,
+           "airline_hit": False, "hit": False, "airline_precision": None, "precision": None,
+           "context_tokens": 0, "n_results": 0, "airline_coverage": None}
+
+    if routed:
+        threshold = -math.inf if args.threshold is None else args.threshold
+        r = retrieve(q, retriever, query_cache, args.k, threshold, fare_table, args.budget, LLM_MODEL,
+                     airline_quota=args.airline_quota, reranker=reranker)
+        timings.update(r.timings)
+        row["detected"] = list(r.airlines)
+
+        if r.fare_answer:
+            rec = r.fare.record
+            row["fare_value"] = rec["value"]
+            airline_ok, hit = is_relevant(rec["airline"], rec["section"].lower(), case)
+            row.update(fare_answer=True, n_results=1, airline_hit=airline_ok, hit=hit,
+                       hit_rank=1 if hit else None, airline_precision=float(airline_ok), precision=float(hit),
+                       ranks=[{"airline": rec["airline"], "section": rec["section"], "score": 1.0}])
+        else:
+            matches = [is_relevant(d.metadata.get("airline", ""), chunk_headings(d), case) for d, _ in r.results]
+            row["ranks"] = [
+                {"airline": d.metadata.get("airline", ""), "section": d.metadata.get("heading_path", ""),
+                 "score": round(float(score), 4)}
+                for d, score in r.results
+            ]
+            row["n_results"] = len(r.results)
+            row["airline_hit"] = any(a for a, _ in matches)
+            row["hit"] = any(h for _, h in matches)
+            row["hit_rank"] = next((i for i, (_, h) in enumerate(matches, 1) if h), None)
+            if matches:
+                row["airline_precision"] = sum(a for a, _ in matches) / len(matches)
+                row["precision"] = sum(h for _, h in matches) / len(matches)
+            # 여러 항공사 비교 질문: 기대 항공사마다 절까지 맞는 근거가 하나 이상 있는지
+            if len(case["airlines"]) > 1:
+                covered = {d.metadata.get("airline", "") for (d, _), (_, h) in zip(r.results, matches) if h}
+                row["airline_coverage"] = len(covered & set(case["airlines"])) / len(case["airlines"])
+
+            if r.packed is not None:
+                row["context_tokens"] = r.packed.tokens
+                t = time.perf_counter()
+                chain.invoke({"history": "대화이력 없음", "context": r.packed.text, "q": q})
+                timings["llm"] = time.perf_counter() - t
+
+    timings["total"] = time.perf_counter() - start
+    row["timings_ms"] = {name: round(sec * 1000, 3) for name, sec in timings.items()}
+    if case.get("expect_empty"):
+        row["expect_empty"] = True
+        row["empty_correct"] = not row["fare_answer"] and row["n_results"] == 0
+    if "fare" in case:
+        # 수수료 표 답변 기대값: 금액이면 그 금액으로 답해야, false 면 검색으로 넘어가야 정답
+        row["expect_fare"] = case["fare"]
+        row["fare_correct"] = row.get("fare_value") == case["fare"] if case["fare"] else not row["fare_answer"]
+    return row
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"n": 0, "p50_ms": None, "p95_ms": None}
+    arr = np.asarray(values)
+    return {"n": len(values), "p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3)}
+
+
+def summarize(rows: list) -> dict:
+    """질문 결과 → 지표 (기대 근거가 있는 질문만 recall 계산)"""
+    scored = [r for r in rows if not r.get("expect_empty")]
+    empty = [r for r in rows if r.get("expect_empty")]
+    fares = [r for r in rows if "fare_correct" in r]
+    precisions = [r["airline_precision"] for r in scored if r["airline_precision"] is not None]
+    section_precisions = [r["precision"] for r in scored if r["precision"] is not None]
+    coverage = [r["airline_coverage"] for r in rows if r.get("airline_coverage") is not None]
+    tokens = [r["context_tokens"] for r in rows if r["context_tokens"]]
+    totals = [r["timings_ms"]["total"] for r in rows]
+    return {
+        "questions": len(rows),
+        "recall@k": round(sum(r["hit"] for r in scored) / len(scored), 4) if scored else None,
+        "airline_recall@k": round(sum(r["airline_hit"] for r in scored) / len(scored), 4) if scored else None,
+        "airline_precision": round(float(np.mean(precisions)), 4) if precisions else None,
+        "precision": round(float(np.mean(section_precisions)), 4) if section_precisions else None,
+        "airline_coverage": round(float(np.mean(coverage)), 4) if coverage else None,
+        "mrr": round(sum(1 / r["hit_rank"] for r in scored if r["hit_rank"]) / len(scored), 4) if scored else None,
+        "empty_correct": f"{sum(r['empty_correct'] for r in empty)}/{len(empty)}",
+        "not_routed": sum(not r["routed"] for r in rows),
+        "fare_answers": sum(r["fare_answer"] for r in rows),
+        "fare_correct": f"{sum(r['fare_correct'] for r in fares)}/{len(fares)}",
+        "context_tokens_total": sum(tokens),
+        "context_tokens_mean": round(sum(tokens) / len(tokens), 1) if tokens else 0,
+        "total_p50_ms": percentiles(totals)["p50_ms"],
+        "total_p95_ms": percentiles(totals)["p95_ms"],
+    }
+
+
+def stage_latency(rows: list, samples: dict) -> dict:
+    """단계별 p50/p95 (반복 실행 샘플 포함)"""
+    return {name: percentiles(samples.get(name, [])) for name in REPORT_STAGES}
+
+
+def print_report(result: dict, previous: dict = None) -> None:
+    meta = result["meta"]
+    threshold = "끔" if meta["threshold"] is None else meta["threshold"]
+    print(f"골든셋 {meta['questions']}문항 · k={meta['k']} · 임계값 {threshold} · BM25 인정 {meta.get('lexical_min_ratio', 0.5)} · "
+          f"예산 {meta['budget']:,} · 항공사당 {meta.get('airline_quota', 0)} · 재순위 {meta.get('reranker', 'none')} · 벡터 {meta.get('vector_index', 'chroma')} · 청크 {meta['chunker']} · 임베딩 {meta['embedding']} · "
+          f"토크나이저 {meta['tokenizer']} · 반복 {meta['repeat']}\n")
+
+    print("[품질]")
+    groups = ["all"] + sorted(k for k in result["summary"] if k != "all")
+    for key in ("recall@k", "airline_recall@k", "airline_precision", "precision", "airline_coverage", "mrr",
+                "empty_correct", "not_routed", "fare_answers", "fare_correct", "context_tokens_total", "context_tokens_mean"):
+        cells = []
+        for g in groups:
+            value = result["summary"][g].get(key)
+            cell = f"{g}={value}"
+            if previous and key in previous.get("summary", {}).get(g, {}):
+                before = previous["summary"][g][key]
+                if isinstance(value, (int, float)) and isinstance(before, (int, float)) and value != before:
+                    cell += f" ({value - before:+.4g})"
+            cells.append(cell)
+        print(f"  {key:<22} " + "  ".join(cells))
+
+    print("\n[단계별 지연 ms]")
+    for name, p in result["stages"].items():
+        if p["n"]:
+            print(f"  {name:<12} n={p['n']:<5} p50={p['p50_ms']:>9.3f}  p95={p['p95_ms']:>9.3f}")
+
+    misses = [r for r in result["questions"] if not r.get("expect_empty") and not r["hit"]]
+    print(f"\n[놓친 질문] {len(misses)}건")
+    for r in misses[:15]:
+        top = r["ranks"][0]["airline"] + " | " + r["ranks"][0]["section"][:40] if r["ranks"] else "(근거 없음)"
+        print(f"  {r['id']:<40} {r['q'][:30]:<30} → {top}")
+
+    wrong = [r for r in result["questions"] if r.get("fare_correct") is False]
+    if wrong:
+        print(f"\n[수수료 표 답변 오답] {len(wrong)}건")
+        for r in wrong[:15]:
+            print(f"  {r['id']:<40} {r['q'][:30]:<30} 기대 {r['expect_fare']} → {r.get('fare_value') or '(검색)'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="골든셋 오프라인 벤치마크")
+    parser.add_argument("--golden", default=str(HERE / "golden_set.json"), help="골든셋 JSON")
+    parser.add_argument("--k", type=int, default=5, help="검색 개수 (사이드바 기본 5)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="유사도 임계값 (기본 끔: 해싱 임베딩은 관련 청크도 관련도가 0 안팎이라 사이드바 기본 0.3 이면 "
+                             "거의 다 걸러짐, 실제 임베딩 인덱스와 비교할 때만 지정)")
+    parser.add_argument("--lexical-min-ratio", type=float, default=LEXICAL_MIN_RATIO,
+                        help="BM25 최고점 대비 이 비율 이상이면 임계값 아래여도 근거로 인정 (0 이면 끔)")
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET, help="컨텍스트 토큰 예산")
+    parser.add_argument("--airline-quota", type=int, default=MULTI_AIRLINE_QUOTA,
+                        help="비교 질문의 항공사당 최소 근거 수 (0 이면 항공사별 검색 끔)")
+    parser.add_argument("--vector-index", default=VECTOR_INDEX, choices=["numpy", "chroma"], help="벡터 검색 백엔드")
+    parser.add_argument("--vector-dtype", default=VECTOR_DTYPE, choices=["float32", "float16", "int8"],
+                        help="numpy 벡터 행렬 저장 형식")
+    parser.add_argument("--reranker", default=RERANKER, choices=RERANKERS, help="검색 후보 재순위기")
+    parser.add_argument("--rerank-top-n", type=int, default=RERANK_TOP_N, help="재순위 후 남길 최대 청크 수")
+    parser.add_argument("--rerank-min-ratio", type=float, default=RERANK_MIN_RATIO,
+                        help="재순위 1위 점수의 이 비율 미만 후보는 버림")
+    parser.add_argument("--repeat", type=int, default=1, help="지연 측정 반복 횟수 (2회째부터 질의 임베딩 캐시 적중)")
+    parser.add_argument("--out", default=None, help="결과 JSON (기본 benchmarks/results/golden-<시각>.json)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    cases = load_golden(args.golden)
+    files = find_corpus_files()
+    emb = HashingEmbeddings()
+
+    with tempfile.TemporaryDirectory(prefix="golden-index-") as index_dir:
+        t = time.perf_counter()
+        index, _ = build_index(files, emb, EMBEDDING_NAME, index_dir, corpus_hash(files))
+        build_sec = time.perf_counter() - t
+
+        retriever = HybridRetriever.from_index(index, emb, args.vector_index, args.vector_dtype)
+        retriever.lexical_min_ratio = args.lexical_min_ratio
+        query_cache = QueryEmbeddingCache()
+        reranker = make_reranker(args.reranker, top_n=args.rerank_top_n, min_ratio=args.rerank_min_ratio)
+        chain = build_rag_prompt() | FakeUsageChatModel() | StrOutputParser()
+
+        samples = {}
+        rows = []
+        for i in range(max(1, args.repeat)):
+            for case in cases:
+                row = run_case(case, retriever, query_cache, index.fares, chain, args, reranker)
+                for name, ms in row["timings_ms"].items():
+                    samples.setdefault(name, []).append(ms)
+                if i == 0:
+                    rows.append(row)
+
+        summary = {"all": summarize(rows)}
+        for source in sorted({r["source"] for r in rows}):
+            summary[source] = summarize([r for r in rows if r["source"] == source])
+
+        result = {
+            "meta": {
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "golden": Path(args.golden).name,
+                "questions": len(cases),
+                "k": args.k,
+                "threshold": args.threshold,
+                "lexical_min_ratio": args.lexical_min_ratio,
+                "budget": args.budget,
+                "airline_quota": args.airline_quota,
+                "reranker": f"{args.reranker}:{args.rerank_top_n}/{args.rerank_min_ratio}" if reranker else "none",
+                "vector_index": f"{args.vector_index}:{args.vector_dtype}" if args.vector_index == "numpy"
+                                else args.vector_index,
+                "repeat": args.repeat,
+                "chunker": f"{CHUNKER}:{CHUNK_SIZE}/{CHUNK_MIN_SIZE}",
+                "embedding": EMBEDDING_NAME,
+                "tokenizer": tokenizer_name(LLM_MODEL),
+                "prompt_version": RAG_PROMPT_VERSION,
+                "corpus_hash": index.manifest["corpus_hash"],
+                "n_chunks": index.manifest["n_chunks"],
+                "index_build_ms": round(build_sec * 1000, 1),
+            },
+            "summary": summary,
+            "stages": stage_latency(rows, samples),
+            "questions": rows,
+        }
+
+    previous = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_report(result, previous)
+
+    out = Path(args.out) if args.out else HERE / "results" / f"golden-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
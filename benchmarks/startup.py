@@ -0,0 +1,172 @@
+"""
+시작 시간 벤치마크 (import 시간 + 첫 화면까지 걸린 시간)
+
+app.py 첫 렌더링이 무거운 import(langchain / OpenAI / Chroma)나 인덱스 로드에 다시 묶이지 않았는지 확인합니다.
+측정마다 새 파이썬 프로세스를 띄워 모듈 캐시 없이(cold) 잽니다.
+
+보고 항목
+- import: app.py 가 맨 위에서 불러오는 모듈과, 준비 스레드로 미룬 모듈의 import 시간 (ms, 중앙값)
+- first_render: streamlit AppTest 로 app.py 를 처음 실행해 화면이 그려질 때까지 (ms)
+- ready: 첫 실행 시작부터 백그라운드 준비(엔진 생성 + 인덱스 아티팩트 로드)가 끝날 때까지 (ms)
+인덱스는 임시 폴더에 미리 빌드(해싱 임베딩, 모델 이름은 설정값)해 두므로 네트워크 없이 아티팩트 로드 경로를 잽니다.
+
+사용법:
+    python benchmarks/startup.py [--repeat 3] [--compare 이전결과.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HERE = ROOT / "benchmarks"
+
+# app.py 첫 렌더링 경로의 import / 준비 스레드에서 처음 import 되는 모듈
+EAGER_MODULES = ("streamlit", "ragbot.config", "ragbot.corpus", "ragbot.filters", "ragbot.matcher",
+                 "ragbot.metrics", "ragbot.streaming", "ragbot.warmup")
+DEFERRED_MODULES = ("ragbot.engine", "langchain_openai", "langchain_community.vectorstores.chroma")
+
+
+def _python(argv: list, env: dict = None) -> str:
+    """새 파이썬 프로세스 실행 → 표준 출력 마지막 줄"""
+    out = subprocess.run([sys.executable, *argv], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def import_ms(modules: tuple) -> float:
+    """새 프로세스에서 modules 를 차례로 import 하는 데 걸린 시간 (ms)"""
+    code = ("import time; t = time.perf_counter()\n"
+            + "".join(f"import {m}\n" for m in modules)
+            + "print((time.perf_counter() - t) * 1000)")
+    return float(_python(["-c", code]))
+
+
+def child_render(timeout: float) -> dict:
+    """(자식 프로세스) AppTest 로 app.py 첫 실행 + 준비 완료까지 대기"""
+    import warnings
+
+    warnings.filterwarnings("ignore")
+    t = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    harness_ms = (time.perf_counter() - t) * 1000
+
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    first_render = time.perf_counter() - start
+    warming = any("준비" in i.value for i in at.info)
+
+    ready = None
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        if any("인덱싱 완료" in s.value for s in at.success):
+            ready = time.perf_counter() - start
+            break
+        if at.exception or at.error:
+            break
+        time.sleep(0.05)
+        at.run()
+
+    return {
+        "harness_import_ms": round(harness_ms, 1),
+        "first_render_ms": round(first_render * 1000, 1),
+        "warming_on_first_render": warming,
+        "ready_ms": round(ready * 1000, 1) if ready is not None else None,
+        "errors": [e.value for e in at.error] + [str(e.value) for e in at.exception],
+    }
+
+
+def build_artifact(index_dir: str) -> None:
+    """네트워크 없이 아티팩트 로드 경로를 재도록 설정값 모델 이름으로 해싱 임베딩 인덱스 빌드"""
+    sys.path.insert(0, str(ROOT))
+    from ragbot.config import EMBEDDING_MODEL
+    from ragbot.corpus import corpus_hash, find_corpus_files
+    from ragbot.fakes import HashingEmbeddings
+    from ragbot.index_store import build_index
+
+    files = find_corpus_files()
+    build_index(files, HashingEmbeddings(), EMBEDDING_MODEL, index_dir, corpus_hash(files))
+
+
+def median(values: list) -> float:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    mid = len(values) // 2
+    return round(values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2, 1)
+
+
+def print_report(result: dict, previous: dict = None) -> None:
+    def line(name, value):
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        cell = f"{value:>9.1f} ms" if numeric else f"{value!s:>12}"
+        before = (previous or {}).get("summary", {}).get(name)
+        if numeric and isinstance(before, (int, float)):
+            cell += f"  ({value - before:+.1f})"
+        print(f"  {name:<34} {cell}")
+
+    print(f"시작 시간 · 반복 {result['meta']['repeat']}회 (중앙값)\n")
+    for name, value in result["summary"].items():
+        line(name, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시작 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 반복 횟수 (회마다 새 프로세스)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="준비 완료 대기 최대 시간 (초)")
+    parser.add_argument("--out", default=None, help="결과 JSON (기본 benchmarks/results/startup-<시각>.json)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child_render(args.timeout)))
+        return
+
+    runs = {"eager_import_ms": [], "deferred_import_ms": []}
+    renders = []
+    with tempfile.TemporaryDirectory(prefix="startup-") as tmp:
+        build_artifact(str(Path(tmp) / "index"))
+        env = {**os.environ, "INDEX_DIR": str(Path(tmp) / "index"), "EMBEDDING_CACHE_DIR": str(Path(tmp) / "cache"),
+               "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-startup-benchmark"),
+               "METRICS_PORT": "0", "METRICS_JSON_LOG": "0", "RAGBOT_API_URL": ""}
+        for _ in range(max(1, args.repeat)):
+            runs["eager_import_ms"].append(import_ms(EAGER_MODULES))
+            runs["deferred_import_ms"].append(import_ms(DEFERRED_MODULES))
+            out = _python([__file__, "--child", "--timeout", str(args.timeout)], env)
+            renders.append(json.loads(out))
+
+    summary = {
+        "eager_import_ms": median(runs["eager_import_ms"]),
+        "deferred_import_ms": median(runs["deferred_import_ms"]),
+        "first_render_ms": median([r["first_render_ms"] for r in renders]),
+        "ready_ms": median([r["ready_ms"] for r in renders]),
+        "warming_on_first_render": all(r["warming_on_first_render"] for r in renders),
+    }
+    result = {
+        "meta": {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "repeat": args.repeat,
+                 "python": sys.version.split()[0], "eager_modules": EAGER_MODULES,
+                 "deferred_modules": DEFERRED_MODULES},
+        "summary": summary,
+        "runs": {**runs, "render": renders},
+    }
+
+    previous = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_report(result, previous)
+    for r in renders:
+        for e in r["errors"]:
+            print(f"  ⚠️ {e[:200]}")
+
+    out = Path(args.out) if args.out else HERE / "results" / f"startup-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
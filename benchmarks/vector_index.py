@@ -0,0 +1,182 @@
+"""
+벡터 검색 백엔드 비교 (NumPy VectorIndex vs Chroma, 코퍼스 규모별)
+
+실제 코퍼스 청크 벡터(해싱 임베딩)를 scale 배로 복제하고(작은 잡음을 더해 모두 다른 벡터로)
+골든셋 질문으로 상위 k 검색을 잽니다. 항공사가 늘어 코퍼스가 커질 때 어디까지 NumPy 전수 검색이 나은지 보기 위한 도구입니다.
+
+보고 항목 (백엔드 × 규모)
+- build: 인덱스 구성 시간 (numpy: 정규화/양자화, chroma: 인메모리 컬렉션 upsert)
+- MB: 벡터 저장 메모리 (chroma 는 측정하지 않음)
+- query p50/p95: 질의 한 건 상위 k (ms)
+- batch: 질의 전체를 한 번에 (numpy search_batch, 건당 ms)
+- masked: 항공사 하나로 제한한 검색 p50 (ms)
+- recall@k: float32 전수 검색 결과 대비 상위 k 일치 비율 (양자화 / HNSW 근사 오차)
+
+사용법:
+    python benchmarks/vector_index.py [--scales 1 100 1000] [--k 10] [--dim 512] [--skip-chroma]
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+
+from ragbot.corpus import find_corpus_files, load_documents, split_documents  # noqa: E402
+from ragbot.fakes import HashingEmbeddings  # noqa: E402
+from ragbot.vector_index import DTYPES, VectorIndex  # noqa: E402
+from run_golden import load_golden, percentiles  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+CHROMA_BATCH = 5000
+
+
+def make_corpus(chunks: list, vectors: np.ndarray, scale: int, noise: float, seed: int = 0):
+    """청크 벡터를 scale 배로 복제 (잡음 + 정규화) → (행렬, Document 목록)"""
+    rng = np.random.default_rng(seed)
+    m = np.tile(vectors, (scale, 1))
+    if scale > 1:
+        m = m + rng.normal(0, noise, m.shape).astype(np.float32)
+        m /= np.linalg.norm(m, axis=1, keepdims=True)
+    docs = [
+        Document(page_content=c.page_content, metadata={**c.metadata, "chunk_id": f"{c.metadata['chunk_id']}-{i}"})
+        for i in range(scale) for c in chunks
+    ]
+    return m.astype(np.float32), docs
+
+
+def timed(fn, queries: list, repeat: int) -> list:
+    out = []
+    for _ in range(repeat):
+        for q in queries:
+            t = time.perf_counter()
+            fn(q)
+            out.append((time.perf_counter() - t) * 1000)
+    return out
+
+
+def recall(found: list, exact: list) -> float:
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact) if e]))
+
+
+def bench_numpy(matrix, docs, queries, mask, k, repeat, exact) -> list:
+    rows = []
+    for dtype in DTYPES:
+        t = time.perf_counter()
+        index = VectorIndex(matrix, docs, dtype=dtype)
+        build = time.perf_counter() - t
+        single = timed(lambda q: index.search(q, k), queries, repeat)
+        t = time.perf_counter()
+        for _ in range(repeat):
+            found = index.search_batch(queries, k)
+        batch = (time.perf_counter() - t) * 1000 / (repeat * len(queries))
+        masked = timed(lambda q: index.search(q, k, mask), queries, repeat)
+        rows.append({
+            "backend": f"numpy:{dtype}",
+            "build_ms": round(build * 1000, 1),
+            "mb": round(index.nbytes / 2**20, 2),
+            "query_p50_ms": percentiles(single)["p50_ms"],
+            "query_p95_ms": percentiles(single)["p95_ms"],
+            "batch_ms": round(batch, 3),
+            "masked_p50_ms": percentiles(masked)["p50_ms"],
+            "recall@k": round(recall([[r for r, _ in f] for f in found], exact), 4),
+        })
+    return rows
+
+
+def bench_chroma(matrix, docs, queries, airline, k, repeat, exact) -> dict:
+    from langchain_community.vectorstores import Chroma
+
+    t = time.perf_counter()
+    db = Chroma(collection_name=f"bench-{uuid.uuid4().hex[:8]}", embedding_function=HashingEmbeddings())
+    for start in range(0, len(docs), CHROMA_BATCH):
+        part = docs[start:start + CHROMA_BATCH]
+        db._collection.upsert(
+            ids=[d.metadata["chunk_id"] for d in part],
+            embeddings=matrix[start:start + CHROMA_BATCH].tolist(),
+            documents=[d.page_content for d in part],
+            metadatas=[{"airline": d.metadata.get("airline", ""), "row": start + i} for i, d in enumerate(part)],
+        )
+    build = time.perf_counter() - t
+
+    def search(q, where=None):
+        return db.similarity_search_by_vector_with_relevance_scores(q, k=k, filter=where)
+
+    single = timed(search, queries, repeat)
+    masked = timed(lambda q: search(q, {"airline": airline}), queries, repeat)
+    found = [[d.metadata["row"] for d, _ in search(q)] for q in queries]
+    db.delete_collection()
+    return {
+        "backend": "chroma",
+        "build_ms": round(build * 1000, 1),
+        "mb": None,
+        "query_p50_ms": percentiles(single)["p50_ms"],
+        "query_p95_ms": percentiles(single)["p95_ms"],
+        "batch_ms": None,
+        "masked_p50_ms": percentiles(masked)["p50_ms"],
+        "recall@k": round(recall(found, exact), 4),
+    }
+
+
+def print_report(results: list, args) -> None:
+    print(f"질문 {args.n_queries}건 × {args.repeat} · k={args.k} · 차원 {args.dim} · 잡음 {args.noise}\n")
+    print(f"  {'scale':>5} {'chunks':>7} {'backend':<14} {'build ms':>9} {'MB':>7} {'p50':>8} {'p95':>8} "
+          f"{'batch':>7} {'masked':>8} {'recall':>7}")
+    for r in results:
+        mb = f"{r['mb']:.2f}" if r["mb"] is not None else "-"
+        batch = f"{r['batch_ms']:.3f}" if r["batch_ms"] is not None else "-"
+        print(f"  {r['scale']:>5} {r['chunks']:>7} {r['backend']:<14} {r['build_ms']:>9.1f} {mb:>7} "
+              f"{r['query_p50_ms']:>8.3f} {r['query_p95_ms']:>8.3f} {batch:>7} {r['masked_p50_ms']:>8.3f} "
+              f"{r['recall@k']:>7.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 검색 백엔드 비교 (NumPy vs Chroma)")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100, 1000], help="코퍼스 복제 배수")
+    parser.add_argument("--k", type=int, default=10, help="검색 개수")
+    parser.add_argument("--dim", type=int, default=512, help="해싱 임베딩 차원")
+    parser.add_argument("--noise", type=float, default=0.02, help="복제 벡터에 더하는 잡음 표준편차")
+    parser.add_argument("--repeat", type=int, default=3, help="질의 반복 횟수")
+    parser.add_argument("--skip-chroma", action="store_true", help="Chroma 측정 생략")
+    parser.add_argument("--out", default=None, help="결과 JSON (기본 benchmarks/results/vector-index-<시각>.json)")
+    args = parser.parse_args()
+
+    emb = HashingEmbeddings(dim=args.dim)
+    docs, _ = load_documents(find_corpus_files())
+    chunks = split_documents(docs)
+    base = np.asarray(emb.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+    questions = [c["q"] for c in load_golden(HERE / "golden_set.json") if c["source"] != "filter"]
+    queries = np.asarray(emb.embed_documents(questions), dtype=np.float32)
+    args.n_queries = len(questions)
+    airline = chunks[0].metadata["airline"]
+
+    results = []
+    for scale in args.scales:
+        matrix, scaled_docs = make_corpus(chunks, base, scale, args.noise)
+        mask = np.array([d.metadata.get("airline") == airline for d in scaled_docs])
+        exact = [[r for r, _ in hits] for hits in VectorIndex(matrix, scaled_docs).search_batch(queries, args.k)]
+        rows = bench_numpy(matrix, scaled_docs, list(queries), mask, args.k, args.repeat, exact)
+        if not args.skip_chroma:
+            rows.append(bench_chroma(matrix, scaled_docs, [q.tolist() for q in queries], airline, args.k,
+                                     args.repeat, exact))
+        for r in rows:
+            r.update(scale=scale, chunks=len(scaled_docs))
+            print(f"  ... {scale}x {r['backend']}: p50 {r['query_p50_ms']:.3f} ms", file=sys.stderr)
+        results += rows
+
+    print_report(results, args)
+
+    out = Path(args.out) if args.out else HERE / "results" / f"vector-index-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"args": vars(args), "runs": results}, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
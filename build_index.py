@@ -0,0 +1,63 @@
+"""
+인덱스 아티팩트 오프라인 빌드 스크립트
+
+사용법:
+    python build_index.py            # 코퍼스가 바뀐 경우에만 빌드
+    python build_index.py --force    # 기존 세대를 무시하고 다시 빌드
+    python build_index.py --backend local --model-path models/multilingual-e5-small   # 네트워크 없이 로컬 모델로 빌드
+"""
+
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+from ragbot.config import EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_MODEL_PATH, INDEX_DIR
+from ragbot.corpus import corpus_hash, find_corpus_files
+from ragbot.embedding_cache import CachedEmbeddings
+from ragbot.embeddings import BACKENDS, embedding_model_name, make_embeddings
+from ragbot.index_store import build_index, generation_name, load_index, set_current
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="항공사 규정 인덱스 빌드")
+    parser.add_argument("--index-dir", default=INDEX_DIR, help="아티팩트 저장 위치")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=BACKENDS, help="임베딩 백엔드")
+    parser.add_argument("--model", default=EMBEDDING_MODEL, help="임베딩 모델 (openai)")
+    parser.add_argument("--model-path", default=EMBEDDING_MODEL_PATH, help="로컬 모델 폴더 (local)")
+    parser.add_argument("--force", action="store_true", help="강제 재빌드")
+    args = parser.parse_args()
+
+    files = find_corpus_files()
+    if not files:
+        print("❌ MD 파일을 찾지 못했습니다. ./data/airlines_md/ 폴더를 확인하세요.")
+        return 1
+
+    c_hash = corpus_hash(files)
+    model = embedding_model_name(args.backend, args.model, args.model_path)
+    print(f"📄 MD 파일 {len(files)}개, 코퍼스 해시 {c_hash[:16]}, 임베딩 {model}")
+
+    if args.force:
+        shutil.rmtree(Path(args.index_dir) / generation_name(c_hash, model), ignore_errors=True)
+
+    index = load_index(args.index_dir, c_hash, model)
+    if index is not None:
+        set_current(args.index_dir, index.generation)
+        print(f"✅ 최신 인덱스가 이미 있습니다: {index.path}")
+        return 0
+
+    t0 = time.perf_counter()
+    emb = CachedEmbeddings(make_embeddings(args.backend, args.model, args.model_path), model)
+    index, failed = build_index(files, emb, model, args.index_dir, c_hash)
+    for fp, e in failed:
+        print(f"⚠️ 로드 실패: {fp} ({e})")
+
+    m = index.manifest
+    print(f"✅ 인덱싱 완료: 문서 {m['n_documents']}건, 청크 {m['n_chunks']}건 "
+          f"({time.perf_counter() - t0:.1f}초, {emb.stats_text()}) → {index.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,31 @@
+"""
+항공권 환불 상담 RAG 챗봇 코어 모듈
+
+Streamlit 화면(app.py), API 서버(server.py), 오프라인 스크립트(build_index.py)가 함께 사용합니다.
+하위 모듈(ragbot.config 등)만 쓰는 경우 langchain / numpy 를 불러오지 않도록
+아래 이름들은 처음 접근할 때 import 합니다.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "AIRLINE_MAPPING": "ragbot.corpus",
+    "extract_airline_name": "ragbot.corpus",
+    "find_corpus_files": "ragbot.corpus",
+    "IndexArtifact": "ragbot.index_store",
+    "build_index": "ragbot.index_store",
+    "load_index": "ragbot.index_store",
+    "RagEngine": "ragbot.engine",
+    "RagResult": "ragbot.engine",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'ragbot' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,77 @@
+"""
+RAG 답변 캐시
+
+temperature=0 이므로 같은 입력이면 사실상 같은 답변이 나옵니다.
+키: (정규화 질문, 검색된 청크 ID 순서, 대화이력 해시, 프롬프트 버전, 모델명)
+- 최대 개수를 넘으면 가장 오래 안 쓴 항목부터 제거 (LRU)
+- 인덱스 세대가 바뀌면 전체 무효화
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from ragbot.query_cache import normalize_query
+
+
+def history_fingerprint(history_text: str) -> str:
+    """대화이력 텍스트 해시"""
+    return hashlib.sha256(history_text.encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerCache:
+    """(질문, 청크 집합, 이력, 프롬프트, 모델) → 답변 텍스트"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.generation = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(q: str, chunk_ids: list, history_text: str, prompt_version: str, model: str) -> tuple:
+        return (
+            normalize_query(q),
+            tuple(chunk_ids),
+            history_fingerprint(history_text),
+            prompt_version,
+            model,
+        )
+
+    def bind_generation(self, generation: str) -> None:
+        """인덱스 세대가 바뀌었으면 캐시 전체 무효화"""
+        with self._lock:
+            if generation != self.generation:
+                self._data.clear()
+                self.generation = generation
+
+    def get(self, key: tuple):
+        with self._lock:
+            answer = self._data.get(key)
+            if answer is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return answer
+
+    def put(self, key: tuple, answer: str) -> None:
+        with self._lock:
+            self._data[key] = answer
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "generation": self.generation,
+            }
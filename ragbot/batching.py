@@ -0,0 +1,99 @@
+"""
+질의 임베딩 마이크로 배치
+
+동시에 들어온 사용자 N명의 질의 임베딩을 각각 원격 호출하면 N번 왕복합니다.
+EmbeddingBatcher 는 첫 요청이 들어온 뒤 max_wait 초(수 ms) 동안 도착한 요청을 모아
+embed_documents(한 번의 배치 호출)로 보내고 결과를 요청별로 나눠 돌려줍니다.
+- 같은 텍스트는 배치 안에서 한 번만 임베딩
+- 스레드(Streamlit 스크립트 스레드)에서는 embed(), asyncio 에서는 await aembed()
+- 배치 호출은 별도 스레드 풀에서 실행 → 호출이 진행 중이어도 다음 배치를 계속 모음
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class EmbeddingBatcher:
+    """
+    embed_documents 앞단의 마이크로 배처
+    max_wait: 첫 요청 후 다음 요청을 기다리는 최대 시간 (초)
+    max_batch: 배치 하나의 최대 텍스트 수 (차면 바로 보냄)
+    max_inflight: 동시에 진행할 수 있는 배치 호출 수
+    """
+
+    def __init__(self, embed_documents, max_wait: float = 0.005, max_batch: int = 64, max_inflight: int = 4):
+        self.embed_documents = embed_documents
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._pending = []          # [(텍스트, Future)]
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="embed-batch")
+        self._worker = None
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0              # 실제로 임베딩한 (중복 제거) 텍스트 수
+
+    def submit(self, text: str) -> Future:
+        """임베딩 요청 등록 (결과는 Future 로)"""
+        future = Future()
+        with self._cond:
+            self._pending.append((text, future))
+            self.requests += 1
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._collect_loop, name="embed-batcher", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future
+
+    def embed(self, text: str) -> list:
+        """동기 호출 (스레드에서 사용)"""
+        return self.submit(text).result()
+
+    async def aembed(self, text: str) -> list:
+        """비동기 호출 (이벤트 루프를 막지 않음)"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    if not self._cond.wait(timeout=30.0):
+                        # 오래 요청이 없으면 수집 스레드 종료 (다음 요청에서 다시 시작)
+                        if not self._pending:
+                            self._worker = None
+                            return
+                deadline = time.monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: list):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = self.embed_documents(texts)
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        by_text = dict(zip(texts, vectors))
+        with self._cond:
+            self.batches += 1
+            self.texts += len(texts)
+        for text, future in batch:
+            future.set_result(list(by_text[text]))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "texts": self.texts,
+                "avg_batch": self.requests / self.batches if self.batches else 0.0,
+            }
@@ -0,0 +1,163 @@
+"""
+마크다운 구조 기반 청크 분할
+
+RecursiveCharacterTextSplitter(겹침 400자) 대신 문서의 제목 계층(#/##/###)을 따라 자릅니다.
+- YAML front matter(title:, note: ...)는 색인하지 않음
+- 표는 절대 중간에서 자르지 않음 (한도를 넘는 표는 그 표 하나가 청크)
+- 청크 사이 겹침 없음 → 같은 문장을 두 번 임베딩/전송하지 않음
+- 청크마다 제목 경로(heading_path)와 원문 위치(start_index/end_index)를 메타데이터로 저장
+- 하위 절로 시작하는 청크는 상위 제목 줄을 앞에 붙여 맥락 유지 (prefix_len 글자)
+"""
+
+import re
+from typing import NamedTuple
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*$")
+
+# 청크 경계 / 원문 위치 규칙 버전 (바뀌면 corpus_hash 가 달라져 인덱스를 다시 빌드)
+REVISION = 2
+
+
+class Section(NamedTuple):
+    level: int          # 제목 수준 (front matter 뒤 첫 제목 전 본문은 0)
+    path: tuple         # 제목 경로 (최상위부터)
+    start: int          # 원문 시작 위치
+    end: int            # 원문 끝 위치
+
+
+def strip_front_matter(text: str) -> int:
+    """YAML front matter 가 끝나는 위치 (없으면 0)"""
+    if not text.startswith("---"):
+        return 0
+    m = re.compile(r"^---\s*$", re.M).search(text, 3)
+    if m is None:
+        return 0
+    return m.end() + 1 if m.end() < len(text) else m.end()
+
+
+def iter_sections(text: str):
+    """제목 줄마다 새 절 (front matter 제외)"""
+    pos = strip_front_matter(text)
+    path = ()
+    level = 0
+    start = pos
+
+    for m in re.finditer(r"[^\n]*\n?", text[pos:]):
+        if not m.group():
+            break
+        heading = _HEADING.match(m.group().rstrip("\n"))
+        if heading is None:
+            continue
+        line_start = pos + m.start()
+        if text[start:line_start].strip():
+            yield Section(level, path, start, line_start)
+        level = len(heading.group(1))
+        path = path[:level - 1] + ("",) * max(0, level - 1 - len(path)) + (heading.group(2),)
+        start = line_start
+
+    if text[start:].strip():
+        yield Section(level, path, start, len(text))
+
+
+def split_blocks(text: str, start: int, end: int) -> list:
+    """
+    절 내부를 (시작, 끝) 블록으로 분할
+    - 연속된 표 줄은 한 블록
+    - 나머지는 빈 줄 기준 문단
+    """
+    blocks = []
+    block_start = None
+    in_table = False
+    pos = start
+    for line in text[start:end].splitlines(keepends=True):
+        is_table = line.lstrip().startswith("|")
+        is_blank = not line.strip()
+        if block_start is not None and (is_blank or is_table != in_table):
+            blocks.append((block_start, pos))
+            block_start = None
+        if not is_blank and block_start is None:
+            block_start = pos
+            in_table = is_table
+        pos += len(line)
+    if block_start is not None:
+        blocks.append((block_start, end))
+    return blocks
+
+
+def _pieces(text: str, sec: Section, max_size: int) -> list:
+    """한도를 넘는 절은 블록 경계에서 나눔 (표는 나누지 않음)"""
+    if sec.end - sec.start <= max_size:
+        return [(sec.start, sec.end)]
+    pieces = []
+    cur_start = cur_end = None
+    for b_start, b_end in split_blocks(text, sec.start, sec.end):
+        if cur_start is not None and b_end - cur_start > max_size:
+            pieces.append((cur_start, cur_end))
+            cur_start = None
+        if cur_start is None:
+            cur_start = b_start
+        cur_end = b_end
+    if cur_start is not None:
+        pieces.append((cur_start, cur_end))
+    return pieces
+
+
+def chunk_markdown(text: str, max_size: int = 2000, min_size: int = 1000) -> list:
+    """
+    원문 → [(시작, 끝, 제목 경로)] 청크 구간
+    - #/## 제목에서는 현재 청크가 min_size 이상이면 새 청크
+    - 그 밖에는 max_size 를 넘기 전까지 같은 청크에 이어 붙임 (작은 절끼리 합침)
+    """
+    spans = []
+    cur = None  # [시작, 끝, 제목 경로]
+
+    for sec in iter_sections(text):
+        for i, (p_start, p_end) in enumerate(_pieces(text, sec, max_size)):
+            new_chunk = (
+                cur is None
+                or i > 0
+                or (sec.level <= 2 and cur[1] - cur[0] >= min_size)
+                or p_end - cur[0] > max_size
+            )
+            if new_chunk:
+                if cur is not None:
+                    spans.append(tuple(cur))
+                cur = [p_start, p_end, sec.path]
+            else:
+                cur[1] = p_end
+    if cur is not None:
+        spans.append(tuple(cur))
+    return spans
+
+
+def context_prefix(text: str, start: int, path: tuple) -> str:
+    """청크가 하위 제목으로 시작하면 앞에 붙일 상위 제목 줄"""
+    first = _HEADING.match(text[start:text.find("\n", start) if "\n" in text[start:] else len(text)])
+    own_level = len(first.group(1)) if first else len(path) + 1
+    parents = [(lvl, h) for lvl, h in enumerate(path[:own_level - 1], 1) if h]
+    return "".join(f"{'#' * lvl} {h}\n" for lvl, h in parents)
+
+
+def split_markdown_documents(docs: list, max_size: int = 2000, min_size: int = 1000) -> list:
+    """LangChain Document 목록을 구조 기반 청크로 분할"""
+    from langchain_core.documents import Document
+
+    chunks = []
+    for d in docs:
+        text = d.page_content
+        for start, end, path in chunk_markdown(text, max_size, min_size):
+            # 앞뒤 빈 줄을 뺀 본문 위치를 기록 (context.merge_spans 가 이 위치로 겹침을 판단)
+            raw = text[start:end]
+            body = raw.strip("\n")
+            start += len(raw) - len(raw.lstrip("\n"))
+            end = start + len(body)
+            prefix = context_prefix(text, start, path)
+            meta = dict(d.metadata)
+            meta.update(
+                heading_path=" > ".join(h for h in path if h),
+                start_index=start,
+                end_index=end,
+                prefix_len=len(prefix),
+            )
+            chunks.append(Document(page_content=prefix + body, metadata=meta))
+    return chunks
@@ -0,0 +1,146 @@
+"""
+RAG API 서버(server.py) 클라이언트
+
+RagEngine 과 같은 호출 방식(ask / filter_search / info / stats)으로 HTTP API 를 부릅니다.
+Streamlit 화면은 RAGBOT_API_URL 이 설정되면 이 클라이언트를, 아니면 같은 프로세스의 RagEngine 을 씁니다.
+서버가 기록한 단계 구간은 화면 쪽 Trace 에 이어 붙여 워터폴에 함께 표시합니다.
+"""
+
+import json
+import time
+from functools import lru_cache
+
+import httpx
+
+from ragbot.config import API_TIMEOUT
+from ragbot.engine import RagResult
+from ragbot.metrics import Trace
+
+
+class EngineClient:
+    """HTTP 로 호출하는 RagEngine 대역"""
+
+    def __init__(self, base_url: str, timeout: float = API_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self._http = httpx.Client(base_url=self.base_url, timeout=timeout)
+        # 청크 ID 는 본문 해시라 바뀌지 않으므로 프로세스 안에서 한 번만 받아 공유
+        self.chunk = lru_cache(maxsize=1024)(self._chunk)
+
+    @property
+    def ready(self) -> bool:
+        try:
+            return self._http.get("/ready").status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def wait_ready(self, timeout: float = 300.0, interval: float = 1.0) -> bool:
+        """서버 인덱스 로드 완료까지 대기"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready:
+                return True
+            time.sleep(interval)
+        return False
+
+    def info(self) -> dict:
+        resp = self._http.get("/health")
+        resp.raise_for_status()
+        return resp.json()
+
+    def _chunk(self, chunk_id: str) -> dict:
+        """근거 청크 본문 (없는 ID 면 None)"""
+        resp = self._http.get(f"/chunks/{chunk_id}")
+        if resp.status_code == 404:
+            return None
+        _raise_for_status(resp)
+        return resp.json()
+
+    def stats(self) -> dict:
+        resp = self._http.get("/stats")
+        resp.raise_for_status()
+        return resp.json()
+
+    def ask(self, q: str, history=(), k: int = 5, threshold: float = 0.3, stream: bool = False,
+            trace: Trace = None) -> RagResult:
+        payload = {"q": q, "history": _turns(history), "k": k, "threshold": threshold, "stream": stream}
+        return self._call("/ask", payload, stream, trace if trace is not None else Trace("rag"))
+
+    def filter_search(self, airline=None, route=None, seat=None, regulation=None, history=(), k: int = 5,
+                      threshold: float = 0.3, stream: bool = False, trace: Trace = None) -> RagResult:
+        payload = {"airline": airline, "route": route, "seat": seat, "regulation": regulation,
+                   "history": _turns(history), "k": k, "threshold": threshold, "stream": stream}
+        return self._call("/filter-search", payload, stream, trace if trace is not None else Trace("filter"))
+
+    def _call(self, path: str, payload: dict, stream: bool, trace: Trace) -> RagResult:
+        start = time.perf_counter()
+        if not stream:
+            resp = self._http.post(path, json=payload)
+            _raise_for_status(resp)
+            data = resp.json()
+            result = RagResult(data["answer"], data["sources"], data["path"], data["debug"], trace)
+            result.usage = data.get("usage")
+            _set_path(trace, data["path"])
+            _merge_trace(trace, data.get("trace"), start)
+            return result
+
+        cm = self._http.stream("POST", path, json=payload)
+        resp = cm.__enter__()
+        try:
+            if resp.status_code >= 400:
+                resp.read()
+                _raise_for_status(resp)
+            lines = resp.iter_lines()
+            meta = json.loads(next(lines))
+        except BaseException:
+            cm.__exit__(None, None, None)
+            raise
+
+        result = RagResult(None, meta["sources"], meta["path"], meta["debug"], trace)
+        _set_path(trace, meta["path"])
+
+        def tokens():
+            try:
+                for line in lines:
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event["type"] == "token":
+                        yield event["text"]
+                    elif event["type"] == "done":
+                        result.usage = event.get("usage")
+                        _merge_trace(trace, event.get("trace"), start)
+                    elif event["type"] == "error":
+                        raise RuntimeError(event["message"])
+            finally:
+                cm.__exit__(None, None, None)
+
+        result.answer = tokens()
+        return result
+
+
+def _turns(history) -> list:
+    return [
+        dict(turn) if isinstance(turn, dict) else {"role": turn[0], "content": turn[1]}
+        for turn in history or []
+    ]
+
+
+def _raise_for_status(resp) -> None:
+    if resp.status_code >= 400:
+        try:
+            detail = resp.json().get("detail", resp.text)
+        except ValueError:
+            detail = resp.text
+        raise RuntimeError(f"API 오류 {resp.status_code}: {detail}")
+
+
+def _set_path(trace: Trace, path: str) -> None:
+    """서버가 고른 경로(수수료 표 / 일반 대화)를 화면 쪽 Trace 에도 반영"""
+    if path in ("fare", "base"):
+        trace.set_path(path)
+
+
+def _merge_trace(trace: Trace, remote: dict, start: float) -> None:
+    if remote:
+        trace.add_remote(remote.get("spans", []), start)
+        trace.set(api_request_id=remote.get("request_id"))
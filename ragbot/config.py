@@ -0,0 +1,114 @@
+"""
+챗봇 공통 설정값
+
+환경변수로 덮어쓸 수 있으며, 기본값은 로컬 실행 기준입니다.
+"""
+
+import os
+
+# 정책 문서 위치
+DATA_PATTERNS = [
+    # "/content/data/airlines_md/*.md",
+    # "./data/airlines_md/*.md",
+    "data/airlines_md/*.md",
+]
+
+# LLM 모델
+LLM_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+# 임베딩 모델
+# - EMBEDDING_BACKEND: openai (원격) | local (EMBEDDING_MODEL_PATH 의 ONNX / sentence-transformers 모델, CPU)
+#                      | hashing (결정적 해싱, 테스트용)
+# - EMBEDDING_MODEL: openai 모델 이름
+# - EMBEDDING_QUERY_PREFIX / EMBEDDING_PASSAGE_PREFIX: 로컬 모델 질의/문서 접두어 (e5 계열: "query: " / "passage: ")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", "")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_QUERY_PREFIX = os.getenv("EMBEDDING_QUERY_PREFIX", "")
+EMBEDDING_PASSAGE_PREFIX = os.getenv("EMBEDDING_PASSAGE_PREFIX", "")
+
+# 임베딩 디스크 캐시 (모델 + 청크 본문 해시 기준)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")  # float16 | float32
+
+# 질의 임베딩 캐시 (LRU + TTL, 선택적으로 디스크 공유)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_CACHE_DISK = os.getenv("QUERY_CACHE_DISK", "0") == "1"
+
+# 질의 임베딩 마이크로 배치 (동시에 들어온 질의를 EMBED_BATCH_WAIT_MS 안에서 모아 한 번에 임베딩, 0 이면 끔)
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "64"))
+
+# 답변 캐시 최대 개수
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+
+# LLM 컨텍스트 토큰 예산 (검색 결과를 합친 뒤 점수 순으로 이 안에 담음)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+
+# 하이브리드 검색: BM25 최고점 대비 이 비율 이상인 청크는 벡터 유사도 임계값 아래여도 근거로 인정
+# (0 이면 끔 - 모든 후보에 사이드바 유사도 임계값 적용)
+LEXICAL_MIN_RATIO = float(os.getenv("LEXICAL_MIN_RATIO", "0"))
+
+# 여러 항공사 비교 질문: 항공사마다 따로(동시에) 검색해 항공사당 최소 이 개수만큼 근거를 담음 (0 이면 한 번에 검색)
+MULTI_AIRLINE_QUOTA = int(os.getenv("MULTI_AIRLINE_QUOTA", "2"))
+
+# 검색 후보 재순위 (ragbot.rerank): 임계값을 넘은 후보를 다시 점수 매겨 상위 RERANK_TOP_N 개만 컨텍스트에 담음
+# - RERANKER: none (재순위 없음, 기본) | lexical (어휘 특징, 추가 의존성 없음) | cross-encoder (RERANKER_MODEL_PATH 의 ONNX 모델, CPU)
+# - RERANK_MIN_RATIO: 1위 점수의 이 비율 미만 후보는 top_n 안이어도 버림 (0 이면 항상 top_n 개)
+RERANKER = os.getenv("RERANKER", "none")
+RERANKER_MODEL_PATH = os.getenv("RERANKER_MODEL_PATH", "")
+RERANKER_THREADS = int(os.getenv("RERANKER_THREADS", "0"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "3"))
+RERANK_MIN_RATIO = float(os.getenv("RERANK_MIN_RATIO", "0"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+
+# 요청 지표 내보내기
+# - METRICS_PORT: Prometheus 텍스트 형식 /metrics 엔드포인트 포트 (0 이면 끔, 로컬 주소에만 바인딩)
+# - METRICS_JSON_LOG: 요청마다 단계별 소요 시간을 JSON 한 줄로 표준 에러에 기록
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+METRICS_JSON_LOG = os.getenv("METRICS_JSON_LOG", "1") == "1"
+
+# RAG API 서버 주소 (설정하면 Streamlit 화면이 같은 프로세스 엔진 대신 server.py 를 호출)
+API_URL = os.getenv("RAGBOT_API_URL", "")
+API_TIMEOUT = float(os.getenv("RAGBOT_API_TIMEOUT", "120"))
+
+# 화면 세션 상태
+# - SESSION_MAX_MESSAGES: 세션마다 보관하는 최근 메시지 수 (화면 표시용)
+# - SESSION_HISTORY_SIZE: LLM 에 넘기는 최근 대화 수
+# - SESSION_IDLE_TTL: 이 시간(초) 동안 요청이 없던 세션은 정리
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "100"))
+SESSION_HISTORY_SIZE = int(os.getenv("SESSION_HISTORY_SIZE", "20"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+
+# 프롬프트 대화 이력
+# - HISTORY_TURNS: 프롬프트에 넣는 최근 대화 수
+# - HISTORY_COMPRESS: 지난 답변을 요약(항공사/노선/규정/주요 금액)으로 바꿔 넣음 (0 이면 원문 그대로)
+HISTORY_TURNS = int(os.getenv("HISTORY_TURNS", "6"))
+HISTORY_COMPRESS = os.getenv("HISTORY_COMPRESS", "1") == "1"
+
+# 사전 빌드된 인덱스 아티팩트 저장 위치
+INDEX_DIR = os.getenv("INDEX_DIR", "index")
+# 아티팩트 파일을 읽기 전용 메모리 매핑 (워커 프로세스끼리 페이지 캐시 공유, 0 이면 워커마다 메모리로 읽음)
+INDEX_MMAP = os.getenv("INDEX_MMAP", "1") == "1"
+# 코퍼스 변경 감시 (ragbot.watcher): 초 단위 폴링 간격 (0 이면 끔), 바뀐 문서만 재색인해 새 세대로 교체
+# 오래된 세대는 CURRENT 포함 최근 INDEX_KEEP_GENERATIONS 개만 남김
+CORPUS_WATCH_INTERVAL = float(os.getenv("CORPUS_WATCH_INTERVAL", "5"))
+INDEX_KEEP_GENERATIONS = int(os.getenv("INDEX_KEEP_GENERATIONS", "3"))
+
+# 벡터 검색 백엔드
+# - VECTOR_INDEX: numpy (정규화 행렬 전수 검색, ragbot.vector_index) | chroma (인메모리 Chroma, 이전 방식)
+# - VECTOR_DTYPE: numpy 행렬 저장 형식 float32 | float16 | int8 (메모리 1/2, 1/4)
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "numpy")
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+
+# 청크 분할 설정 (표 보존을 위해 크기 증가)
+# - markdown: 제목 계층 기준 분할, 표 보존, 겹침 없음 (ragbot.chunker)
+# - recursive: 이전 방식 (RecursiveCharacterTextSplitter, CHUNK_OVERLAP 만큼 겹침)
+CHUNKER = os.getenv("CHUNKER", "markdown")
+CHUNK_SIZE = 2000
+CHUNK_MIN_SIZE = 1200   # markdown: 이 크기 이상이면 #/## 제목에서 새 청크
+CHUNK_OVERLAP = 400     # recursive 전용
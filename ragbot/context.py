@@ -0,0 +1,175 @@
+"""
+LLM 컨텍스트 조립 (토큰 예산 + 겹침 제거)
+
+검색 결과 청크를 그대로 이어 붙이면
+- 같은 파일에서 겹치거나 이웃한 청크의 같은 문장이 두 번 들어가고
+- 검색 개수가 늘면 프롬프트 토큰이 제한 없이 커집니다.
+검색 순위대로 청크를 보면서 이미 담은 원문 범위와 겹치는 부분은 빼고 새 내용의 토큰만 예산에서 차감하고,
+담긴 청크 중 같은 원문(source_path)에서 겹치거나 맞닿은 것은 한 구간으로 합쳐 보냅니다.
+여러 항공사 비교 질문은 항공사별로 예산을 나눠 조립하고 항공사 제목 아래에 묶습니다 (pack_grouped).
+"""
+
+from typing import NamedTuple
+
+from ragbot.tokens import count_tokens
+
+SEPARATOR = "\n\n"
+
+
+def join_parts(parts: list) -> str:
+    """기존 프롬프트와 같은 형식으로 이어 붙임"""
+    return "\n\n" + "=" * 50 + SEPARATOR.join(parts)
+
+
+class Span(NamedTuple):
+    source_path: str
+    start: int
+    end: int
+    text: str
+    score: float
+    docs: tuple          # 이 구간에 합쳐진 (Document, 점수)
+
+
+class ContextPack(NamedTuple):
+    text: str
+    spans: list          # 담긴 구간 (점수 순)
+    tokens: int          # 최종 컨텍스트 토큰
+    raw_tokens: int      # 검색 결과를 그대로 이어 붙였을 때 토큰
+    merged: int          # 합쳐져서 없어진 청크 수
+    dropped: int         # 예산 초과로 빠진 구간 수
+
+    @property
+    def saved(self) -> int:
+        return self.raw_tokens - self.tokens
+
+
+def _body(doc):
+    """청크 본문의 (원문 시작, 원문 끝, 상위 제목 접두어, 본문)"""
+    prefix_len = doc.metadata.get("prefix_len", 0)
+    body = doc.page_content[prefix_len:]
+    start = doc.metadata.get("start_index", -1)
+    return start, start + len(body), doc.page_content[:prefix_len], body
+
+
+def merge_spans(results: list, gap: int = 2) -> list:
+    """
+    같은 원문에서 겹치거나 gap 글자 이내로 맞닿은 청크를 한 구간으로 합침
+    (원문 위치 정보가 없는 청크는 단독 구간)
+    Returns: [Span] 검색 순위 순 (구간 안에서 가장 앞 순위 기준)
+    """
+    rank = {id(d): i for i, (d, _) in enumerate(results)}
+    by_source = {}
+    singles = []
+    for d, score in results:
+        start, end, prefix, body = _body(d)
+        if start < 0:
+            singles.append(Span("", start, end, d.page_content, score, ((d, score),)))
+            continue
+        by_source.setdefault(d.metadata.get("source_path", ""), []).append((start, end, prefix, body, d, score))
+
+    spans = []
+    for source, items in by_source.items():
+        items.sort(key=lambda x: x[0])
+        cur = None
+        for start, end, prefix, body, d, score in items:
+            if cur is not None and start <= cur["end"] + gap:
+                if end > cur["end"]:
+                    overlap = cur["end"] - start
+                    cur["text"] += body[overlap:] if overlap > 0 else "\n" + body
+                    cur["end"] = end
+                cur["score"] = max(cur["score"], score)
+                cur["docs"].append((d, score))
+                continue
+            if cur is not None:
+                spans.append(_to_span(source, cur))
+            cur = {"start": start, "end": end, "text": prefix + body, "score": score, "docs": [(d, score)]}
+        spans.append(_to_span(source, cur))
+
+    return sorted(spans + singles, key=lambda s: min(rank[id(d)] for d, _ in s.docs))
+
+
+def _to_span(source: str, cur: dict) -> Span:
+    return Span(source, cur["start"], cur["end"], cur["text"], cur["score"], tuple(cur["docs"]))
+
+
+def format_span(span: Span) -> str:
+    airline = span.docs[0][0].metadata.get("airline", "알 수 없음")
+    return f"[{airline} 규정 | 유사도: {span.score:.2f}]\n{span.text}"
+
+
+def _uncovered(body: str, start: int, covered: list) -> str:
+    """이미 담은 범위(covered)를 뺀 본문"""
+    keep = []
+    pos = start
+    for c_start, c_end in sorted(covered):
+        if c_end <= pos or c_start >= start + len(body):
+            continue
+        if c_start > pos:
+            keep.append(body[pos - start:c_start - start])
+        pos = max(pos, c_end)
+    keep.append(body[pos - start:])
+    return "".join(keep)
+
+
+def pack_context(results: list, budget: int, model: str = "gpt-4o-mini") -> ContextPack:
+    """
+    검색 결과(순위 순) → 토큰 예산 안의 컨텍스트
+    - 청크 비용 = 이미 담은 범위와 겹치지 않는 새 내용의 토큰
+    - 1등 청크는 예산을 넘어도 항상 포함 (표를 자르지 않음)
+    - 이후 청크는 예산에 들어가는 것만 순위대로 추가
+    """
+    seen = set()
+    raw_parts = []
+    for d, score in results:
+        if d.page_content in seen:
+            continue
+        seen.add(d.page_content)
+        raw_parts.append(f"[{d.metadata.get('airline', '알 수 없음')} 규정 | 유사도: {score:.2f}]\n{d.page_content}")
+    raw_tokens = count_tokens(join_parts(raw_parts), model) if raw_parts else 0
+
+    header_tokens = count_tokens("[알 수 없음 규정 | 유사도: 0.00]\n" + SEPARATOR, model)
+    selected, covered, used, merged, dropped = [], {}, 0, 0, 0
+    for d, score in results:
+        start, end, prefix, body = _body(d)
+        spans = covered.setdefault(d.metadata.get("source_path", ""), [])
+        new_text = _uncovered(body, start, spans) if start >= 0 else d.page_content
+        if not new_text.strip():
+            merged += 1
+            continue
+        cost = count_tokens(new_text, model) + header_tokens
+        if selected and used + cost > budget:
+            dropped += 1
+            continue
+        selected.append((d, score))
+        if start >= 0:
+            spans.append((start, end))
+        used += cost
+
+    packed = merge_spans(selected)
+    text = join_parts([format_span(span) for span in packed])
+    return ContextPack(
+        text=text,
+        spans=packed,
+        tokens=count_tokens(text, model) if packed else 0,
+        raw_tokens=raw_tokens,
+        merged=merged + len(selected) - len(packed),
+        dropped=dropped,
+    )
+
+
+def pack_grouped(groups: list, budget: int, model: str = "gpt-4o-mini") -> ContextPack:
+    """
+    항공사별 검색 결과 [(항공사, 결과)] → 항공사별로 묶은 컨텍스트
+    예산은 항공사 수로 나눠 각 묶음을 pack_context 로 조립 (항공사마다 1등 청크는 항상 포함)
+    """
+    share = budget // max(1, len(groups))
+    packs = [(airline, pack_context(results, share, model)) for airline, results in groups]
+    text = "".join(f"\n\n■ {airline}{pack.text}" for airline, pack in packs)
+    return ContextPack(
+        text=text,
+        spans=[span for _, pack in packs for span in pack.spans],
+        tokens=count_tokens(text, model) if packs else 0,
+        raw_tokens=sum(pack.raw_tokens for _, pack in packs),
+        merged=sum(pack.merged for _, pack in packs),
+        dropped=sum(pack.dropped for _, pack in packs),
+    )
@@ -0,0 +1,158 @@
+"""
+정책 문서(MD) 로딩 및 청크 분할
+"""
+
+import glob
+import hashlib
+from pathlib import Path
+
+from ragbot.chunker import REVISION as CHUNKER_REVISION
+from ragbot.config import CHUNK_MIN_SIZE, CHUNK_OVERLAP, CHUNK_SIZE, CHUNKER, DATA_PATTERNS
+
+# 항공사 매핑 (파일명 → 표준명)
+AIRLINE_MAPPING = {
+    "대한항공": "대한항공",
+    "koreanair": "대한항공",
+    "korean": "대한항공",
+    "제주항공": "제주항공",
+    "jejuair": "제주항공",
+    "jeju": "제주항공",
+    "아시아나": "아시아나",
+    "asiana": "아시아나",
+    "진에어": "진에어",
+    "jinair": "진에어",
+    "jin": "진에어",
+    "티웨이": "티웨이",
+    "twayair": "티웨이",
+    "tway": "티웨이",
+    "에어서울": "에어서울",
+    "airseoul": "에어서울",
+    "이스타항공": "이스타항공",
+    "이스타": "이스타항공",
+    "eastar": "이스타항공",
+}
+
+
+def extract_airline_name(filepath: str) -> str:
+    """파일명에서 항공사명을 정확하게 추출"""
+    filename = Path(filepath).stem.lower()
+
+    for key, value in AIRLINE_MAPPING.items():
+        if key.lower() in filename:
+            return value
+
+    # 매핑에 없으면 파일명 그대로 사용
+    return Path(filepath).stem
+
+
+def find_corpus_files(patterns=None) -> list:
+    """패턴에 맞는 MD 파일 목록을 정렬된 순서로 반환"""
+    seen = set()
+    loader_files = []
+
+    for pat in patterns or DATA_PATTERNS:
+        for fp in glob.glob(pat, recursive=True):
+            if fp.endswith(".md") and fp not in seen and Path(fp).is_file():
+                seen.add(fp)
+                loader_files.append(fp)
+
+    return sorted(loader_files)
+
+
+def chunk_config() -> str:
+    """청크 설정 문자열 (바뀌면 모든 문서를 다시 분할해야 함)"""
+    return f"chunk={CHUNKER}:{CHUNK_SIZE}/{CHUNK_MIN_SIZE}/{CHUNK_OVERLAP}/r{CHUNKER_REVISION}"
+
+
+def file_hash(fp: str) -> str:
+    """파일 내용 해시 (증분 재색인에서 바뀐 문서 판단용)"""
+    return hashlib.sha256(Path(fp).read_bytes()).hexdigest()
+
+
+def corpus_hash(files: list) -> str:
+    """
+    코퍼스 지문 계산
+    - 파일명 + 파일 내용 + 청크 설정이 같으면 같은 해시
+    """
+    h = hashlib.sha256()
+    h.update(f"{chunk_config()}\n".encode("utf-8"))
+    for fp in sorted(files):
+        h.update(Path(fp).name.encode("utf-8"))
+        h.update(b"\0")
+        h.update(bytes.fromhex(file_hash(fp)))
+    return h.hexdigest()
+
+
+def chunk_id(source_path: str, start_index: int, text: str) -> str:
+    """청크 고유 ID (파일명 + 시작 위치 + 내용 기반)"""
+    key = f"{Path(source_path).name}\0{start_index}\0{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def load_documents(files: list):
+    """
+    MD 파일들을 Document로 로드
+    Returns:
+        (문서 리스트, 로드 실패 목록 [(파일, 오류)])
+    """
+    from langchain_community.document_loaders import TextLoader
+
+    all_docs = []
+    failed = []
+
+    for fp in files:
+        try:
+            docs = TextLoader(fp, encoding="utf-8").load()
+        except Exception as e:
+            failed.append((fp, e))
+            continue
+
+        airline_tag = extract_airline_name(fp)
+
+        for d in docs:
+            if not d.page_content or not d.page_content.strip():
+                continue
+            d.metadata["airline"] = airline_tag
+            d.metadata["source_path"] = fp
+            d.metadata["filename"] = Path(fp).name
+            all_docs.append(d)
+
+    return all_docs, failed
+
+
+def split_documents(docs: list, chunker: str = None) -> list:
+    """문서를 청크로 분할하고 청크 ID를 부여 (chunker: markdown | recursive, 기본값은 설정)"""
+    if (chunker or CHUNKER) == "markdown":
+        from ragbot.chunker import split_markdown_documents
+
+        chunks = split_markdown_documents(docs, CHUNK_SIZE, CHUNK_MIN_SIZE)
+    else:
+        chunks = split_recursive(docs)
+
+    for c in chunks:
+        c.metadata["chunk_id"] = chunk_id(
+            c.metadata["source_path"], c.metadata.get("start_index", 0), c.page_content
+        )
+
+    return chunks
+
+
+def split_recursive(docs: list) -> list:
+    """이전 방식: 글자 수 기준 재귀 분할 (청크 사이 CHUNK_OVERLAP 만큼 겹침)"""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True,
+        separators=[
+            "\n\n## ",
+            "\n\n### ",
+            "\n\n",
+            "\n",
+            ". ",
+            " ",
+            ""
+        ]
+    )
+    return splitter.split_documents(docs)
@@ -0,0 +1,162 @@
+"""
+콘텐츠 해시 기반 디스크 임베딩 캐시
+
+(모델, sha256(청크 본문)) → 벡터
+- 키/행 번호는 SQLite 에, 벡터는 float16/float32 원시 배열 파일에 이어 붙여 저장
+- 캐시에 없는 텍스트만 배치로 임베딩 백엔드에 요청
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ragbot.config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_DTYPE
+
+
+def text_hash(text: str) -> str:
+    """청크 본문 sha256"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    모델 하나에 대한 디스크 벡터 저장소
+    - <dir>/<model>.sqlite : (text_hash → row)
+    - <dir>/<model>.<dtype> : row 순서로 이어 붙인 벡터
+    """
+
+    def __init__(self, cache_dir, model: str, dtype: str = EMBEDDING_CACHE_DTYPE):
+        self.model = model
+        self.dtype = np.dtype(dtype)
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model)
+        self.vectors_path = cache_dir / f"{slug}.{self.dtype.name}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            cache_dir / f"{slug}.sqlite", timeout=30, check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " text_hash TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _dim(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        return int(row[0]) if row else None
+
+    def get_many(self, hashes: list) -> dict:
+        """캐시에 있는 해시만 {hash: vector(float32)} 로 반환"""
+        if not hashes:
+            return {}
+
+        with self._lock:
+            dim = self._dim()
+            if dim is None:
+                return {}
+            rows = {}
+            uniq = list(dict.fromkeys(hashes))
+            for i in range(0, len(uniq), 500):
+                part = uniq[i:i + 500]
+                q = "SELECT text_hash, row FROM embeddings WHERE text_hash IN (%s)" % ",".join("?" * len(part))
+                rows.update(self._conn.execute(q, part).fetchall())
+
+        if not rows:
+            return {}
+
+        data = np.memmap(self.vectors_path, dtype=self.dtype, mode="r").reshape(-1, dim)
+        return {h: np.asarray(data[r], dtype=np.float32) for h, r in rows.items() if r < len(data)}
+
+    def put_many(self, items: dict) -> None:
+        """{hash: vector} 를 파일 끝에 추가하고 행 번호를 기록"""
+        if not items:
+            return
+
+        hashes = list(items)
+        mat = np.asarray([items[h] for h in hashes], dtype=np.float32)
+
+        with self._lock:
+            # 프로세스 간 쓰기 직렬화 (SQLite 쓰기 잠금)
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                dim = self._dim()
+                if dim is None:
+                    dim = mat.shape[1]
+                    self._conn.execute("INSERT INTO meta VALUES ('dim', ?)", (str(dim),))
+                elif dim != mat.shape[1]:
+                    raise ValueError(f"임베딩 차원 불일치: 캐시 {dim}, 입력 {mat.shape[1]}")
+
+                start = self.vectors_path.stat().st_size // (dim * self.dtype.itemsize) \
+                    if self.vectors_path.exists() else 0
+                with open(self.vectors_path, "ab") as f:
+                    f.seek(start * dim * self.dtype.itemsize)
+                    f.truncate()
+                    f.write(mat.astype(self.dtype).tobytes())
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                    [(h, start + i) for i, h in enumerate(hashes)],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 백엔드 앞단의 디스크 캐시
+    - embed_documents: 캐시 미스만 batch_size 단위로 백엔드 호출
+    - hits / misses 카운터 제공 (인덱싱 상태 표시용)
+    """
+
+    def __init__(self, underlying: Embeddings, model: str, cache_dir=EMBEDDING_CACHE_DIR,
+                 dtype: str = EMBEDDING_CACHE_DTYPE, batch_size: int = 64):
+        self.underlying = underlying
+        self.model = model
+        self.store = EmbeddingStore(cache_dir, model, dtype)
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list) -> list:
+        hashes = [text_hash(t) for t in texts]
+        found = self.store.get_many(hashes)
+
+        # 캐시 미스 (중복 제거)
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = t
+
+        for i in range(0, len(missing), self.batch_size):
+            batch = list(missing.items())[i:i + self.batch_size]
+            vectors = self.underlying.embed_documents([t for _, t in batch])
+            new = {h: v for (h, _), v in zip(batch, vectors)}
+            self.store.put_many(new)
+            # 캐시 적중 시와 같은 정밀도로 반환 (빌드 결과가 캐시 상태에 따라 달라지지 않도록)
+            found.update({
+                h: np.asarray(v, dtype=self.store.dtype).astype(np.float32) for h, v in new.items()
+            })
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+
+        return [found[h].tolist() for h in hashes]
+
+    def embed_query(self, text: str) -> list:
+        return self.underlying.embed_query(text)
+
+    def stats_text(self) -> str:
+        return f"임베딩 캐시 적중 {self.hits}건 / 미스 {self.misses}건"
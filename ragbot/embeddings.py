@@ -0,0 +1,217 @@
+"""
+임베딩 백엔드 (EMBEDDING_BACKEND 로 선택)
+
+- openai : OpenAIEmbeddings (원격 호출, 기본값)
+- local  : 로컬 폴더의 다국어 모델을 CPU 에서 실행 (네트워크 없이 인덱스 빌드 / 질의 임베딩)
+    - 폴더에 model.onnx (또는 onnx/model.onnx) + tokenizer.json 이 있으면 onnxruntime + tokenizers
+    - 아니면 sentence-transformers 모델 폴더로 보고 sentence_transformers 로 로드 (설치 필요)
+- hashing: 글자 n-gram 해싱 (ragbot.fakes.HashingEmbeddings, 결정적 - 테스트 / 벤치마크용)
+
+로컬 백엔드는 길이가 비슷한 텍스트끼리 batch_size 개씩 묶어 한 번에 인코딩하고 (패딩 최소화),
+풀링 / 정규화도 배치 단위 행렬 연산으로 처리합니다.
+e5 계열처럼 질의 / 문서 접두어가 필요한 모델은 EMBEDDING_QUERY_PREFIX / EMBEDDING_PASSAGE_PREFIX 로 지정합니다.
+인덱스 세대와 임베딩 캐시는 embedding_model_name() 이름으로 구분합니다 (백엔드를 바꾸면 새로 빌드).
+로컬 모델 이름에는 모델 파일 내용 해시를 붙여, 같은 폴더(또는 같은 이름의 폴더)에 다른 모델을 넣어도
+이전 모델의 인덱스 / 캐시 벡터를 재사용하지 않습니다.
+"""
+
+import asyncio
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ragbot.config import (
+    EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, EMBEDDING_MODEL_PATH, EMBEDDING_PASSAGE_PREFIX,
+    EMBEDDING_QUERY_PREFIX, EMBEDDING_THREADS,
+)
+
+BACKENDS = ("openai", "local", "hashing")
+
+# 로컬 모델 지문에 넣는 파일 (가중치 / 토크나이저 / 설정 / 풀링, 있는 것만)
+FINGERPRINT_FILES = ("model.onnx", "onnx/model.onnx", "model.safetensors", "pytorch_model.bin", "tokenizer.json",
+                     "config.json", "modules.json", "1_Pooling/config.json")
+
+
+def embedding_model_name(backend: str = EMBEDDING_BACKEND, model: str = EMBEDDING_MODEL,
+                         path: str = EMBEDDING_MODEL_PATH) -> str:
+    """인덱스 세대 / 임베딩 캐시 키에 쓰는 모델 이름"""
+    if backend == "openai":
+        return model
+    if backend == "local":
+        return f"local-{Path(path).name}-{model_fingerprint(path)}"
+    if backend == "hashing":
+        return "hashing-512"
+    raise ValueError(f"알 수 없는 임베딩 백엔드: {backend} (가능: {', '.join(BACKENDS)})")
+
+
+def make_embeddings(backend: str = EMBEDDING_BACKEND, model: str = EMBEDDING_MODEL,
+                    path: str = EMBEDDING_MODEL_PATH) -> Embeddings:
+    """설정된 백엔드의 임베딩 모델 (무거운 라이브러리는 고른 백엔드만 import)"""
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        return OpenAIEmbeddings(model=model)
+    if backend == "local":
+        if not path or not Path(path).is_dir():
+            raise ValueError(f"EMBEDDING_MODEL_PATH 에 로컬 모델 폴더를 지정해주세요: {path!r}")
+        kwargs = {"batch_size": EMBEDDING_BATCH_SIZE, "query_prefix": EMBEDDING_QUERY_PREFIX,
+                  "passage_prefix": EMBEDDING_PASSAGE_PREFIX}
+        if find_onnx(path) is not None:
+            return OnnxEmbeddings(path, threads=EMBEDDING_THREADS, **kwargs)
+        return SentenceTransformerEmbeddings(path, **kwargs)
+    if backend == "hashing":
+        from ragbot.fakes import HashingEmbeddings
+
+        return HashingEmbeddings()
+    raise ValueError(f"알 수 없는 임베딩 백엔드: {backend} (가능: {', '.join(BACKENDS)})")
+
+
+def model_fingerprint(path) -> str:
+    """로컬 모델 폴더 파일 내용 해시 앞 8자리"""
+    return _fingerprint(str(Path(path).resolve()))
+
+
+@lru_cache(maxsize=16)
+def _fingerprint(path: str) -> str:
+    # 프로세스당 한 번 (수백 MB 모델도 1초 이내)
+    h = hashlib.sha256()
+    for name in FINGERPRINT_FILES:
+        fp = Path(path) / name
+        if not fp.is_file():
+            continue
+        h.update(name.encode("utf-8") + b"\0")
+        with open(fp, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()[:8]
+
+
+def find_onnx(path) -> Path:
+    """모델 폴더의 ONNX 파일 (없으면 None)"""
+    for name in ("model.onnx", "onnx/model.onnx"):
+        if (Path(path) / name).is_file():
+            return Path(path) / name
+    return None
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """행별 L2 정규화"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    로컬 CPU 임베딩 공통 부분
+    - 질의 / 문서 접두어
+    - 길이순 정렬 후 batch_size 개씩 _encode_batch() (하위 클래스 구현: 텍스트 목록 → 정규화된 행렬)
+    - 비동기 메서드는 스레드에서 실행 (이벤트 루프를 막지 않음)
+    """
+
+    def __init__(self, batch_size: int = 32, query_prefix: str = "", passage_prefix: str = ""):
+        self.batch_size = batch_size
+        self.query_prefix = query_prefix
+        self.passage_prefix = passage_prefix
+
+    def _encode_batch(self, texts: list) -> np.ndarray:
+        raise NotImplementedError
+
+    def encode(self, texts: list) -> np.ndarray:
+        """텍스트 목록 → (n, dim) float32 행렬 (입력 순서 유지)"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        parts = []
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            parts.append(self._encode_batch([texts[i] for i in idx]))
+        out = np.empty((len(texts), parts[0].shape[1]), dtype=np.float32)
+        out[order] = np.concatenate(parts)
+        return out
+
+    def embed_documents(self, texts: list) -> list:
+        return self.encode([self.passage_prefix + t for t in texts]).tolist()
+
+    def embed_queries(self, texts: list) -> list:
+        """질의 여러 개 한 번에 (마이크로 배처용, 질의 접두어 적용)"""
+        return self.encode([self.query_prefix + t for t in texts]).tolist()
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_queries([text])[0]
+
+    async def aembed_documents(self, texts: list) -> list:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> list:
+        return await asyncio.to_thread(self.embed_query, text)
+
+
+class OnnxEmbeddings(LocalEmbeddings):
+    """
+    ONNX 문장 임베딩 모델 (onnxruntime CPU + tokenizers)
+    출력이 토큰별 은닉 상태면 풀링 설정(1_Pooling/config.json, 없으면 평균)으로 문장 벡터를 만듦
+    threads: onnxruntime 연산 스레드 수 (0 이면 기본값)
+    """
+
+    def __init__(self, path, batch_size: int = 32, max_length: int = 512, threads: int = 0,
+                 query_prefix: str = "", passage_prefix: str = ""):
+        super().__init__(batch_size, query_prefix, passage_prefix)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = Path(path)
+        self.tokenizer = Tokenizer.from_file(str(path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        if self.tokenizer.padding is None:
+            pad_token = next((t for t in ("[PAD]", "<pad>") if self.tokenizer.token_to_id(t) is not None), None)
+            pad_id = self.tokenizer.token_to_id(pad_token) if pad_token else 0
+            self.tokenizer.enable_padding(pad_id=pad_id, pad_token=pad_token or "[PAD]")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(find_onnx(path)), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        pooling = path / "1_Pooling" / "config.json"
+        config = json.loads(pooling.read_text(encoding="utf-8")) if pooling.is_file() else {}
+        self.cls_pooling = bool(config.get("pooling_mode_cls_token"))
+
+    def _encode_batch(self, texts: list) -> np.ndarray:
+        encoded = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        out = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        if out.ndim == 3:
+            if self.cls_pooling:
+                out = out[:, 0]
+            else:
+                m = mask[:, :, None].astype(np.float32)
+                out = (out * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+        return normalize(out.astype(np.float32))
+
+
+class SentenceTransformerEmbeddings(LocalEmbeddings):
+    """sentence-transformers 모델 폴더 (CPU, sentence_transformers 패키지 필요)"""
+
+    def __init__(self, path, batch_size: int = 32, query_prefix: str = "", passage_prefix: str = ""):
+        super().__init__(batch_size, query_prefix, passage_prefix)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                f"{path} 에 model.onnx 가 없어 sentence-transformers 로 로드하려 했지만 패키지가 없습니다. "
+                "pip install sentence-transformers 또는 ONNX 로 내보낸 모델을 사용하세요."
+            ) from e
+        self.model = SentenceTransformer(str(path), device="cpu")
+
+    def _encode_batch(self, texts: list) -> np.ndarray:
+        out = self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(out, dtype=np.float32)
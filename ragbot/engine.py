@@ -0,0 +1,620 @@
+"""
+RAG 엔진 (프로세스당 한 번 생성)
+
+Streamlit 은 상호작용마다 app.py 를 다시 실행하므로 LLM / 프롬프트 / 인덱스 / 캐시를
+스크립트 전역에 두면 화면 밖(HTTP API, 메시징 봇)에서 쓸 수 없습니다.
+RagEngine 이 이 자원을 한 번 만들어 들고 있고, 요청 단위 메서드(ask / refund_rag / filter_search)는
+대화 이력과 검색 설정을 인자로 받아 상태 없이 동작합니다 (여러 스레드에서 동시에 호출 가능).
+비동기 서버용으로 같은 메서드의 async 버전(aask / arefund_rag / afilter_search)이 있고,
+동시에 들어온 질의 임베딩은 스레드/코루틴 구분 없이 마이크로 배처(ragbot.batching)에서 한 번에 호출합니다.
+- Streamlit 화면(app.py): 같은 프로세스의 엔진 또는 API 서버(ragbot.client)를 호출하는 얇은 클라이언트
+- HTTP API(server.py): 워커 프로세스마다 엔진 하나
+"""
+
+import threading
+from typing import NamedTuple
+
+from ragbot.answer_cache import AnswerCache
+from ragbot.batching import EmbeddingBatcher
+from ragbot.config import (
+    ANSWER_CACHE_SIZE, CONTEXT_TOKEN_BUDGET, CORPUS_WATCH_INTERVAL, EMBED_BATCH_MAX, EMBED_BATCH_WAIT_MS,
+    EMBEDDING_CACHE_DIR, HISTORY_COMPRESS, HISTORY_TURNS, INDEX_DIR, INDEX_KEEP_GENERATIONS, INDEX_MMAP, LLM_MODEL,
+    MULTI_AIRLINE_QUOTA, QUERY_CACHE_DISK, QUERY_CACHE_SIZE, QUERY_CACHE_TTL, RERANKER, VECTOR_DTYPE, VECTOR_INDEX,
+)
+from ragbot.corpus import corpus_hash, find_corpus_files
+from ragbot.embedding_cache import CachedEmbeddings, EmbeddingStore
+from ragbot.embeddings import embedding_model_name, make_embeddings
+from ragbot.filters import build_filter_query
+from ragbot.history import HistoryCompressor
+from ragbot.index_store import build_index, build_lock, load_index, prune_generations, set_current, update_index
+from ragbot.matcher import route_to_rag
+from ragbot.metrics import Trace
+from ragbot.pipeline import aretrieve, retrieve
+from ragbot.prompts import BASE_PROMPT_VERSION, RAG_PROMPT_VERSION, build_base_prompt, build_rag_prompt
+from ragbot.query_cache import QueryEmbeddingCache
+from ragbot.rerank import make_reranker
+from ragbot.retrieval import HybridRetriever
+from ragbot.session import ChunkStore
+from ragbot.streaming import astream_with_callback, stream_with_callback
+from ragbot.usage import UsageRecorder
+
+
+def format_history(history, n_turns: int = 6) -> str:
+    """최근 n_turns 개의 대화 → 프롬프트용 텍스트, 답변 원문 그대로 (HISTORY_COMPRESS=0 일 때)"""
+    lines = []
+    for turn in list(history or [])[-n_turns:]:
+        role, content = (turn["role"], turn["content"]) if isinstance(turn, dict) else turn
+        prefix = "사용자" if role == "user" else "어시스턴트"
+        lines.append(f"{prefix}: {content}")
+    return "\n".join(lines) if lines else "대화이력 없음"
+
+
+def no_airline_message(airlines, th: float) -> str:
+    """항공사를 지정했는데 임계값을 넘는 근거가 없을 때 안내"""
+    return f"""
+❌ **{', '.join(airlines)}** 항공사의 관련 규정을 찾을 수 없습니다.
+
+**확인 사항:**
+1. 로드된 항공사 목록을 확인해주세요 (사이드바 참조)
+2. 항공사명 표기를 확인해주세요:
+   - "진에어" / "JIN AIR"
+   - "아시아나" / "ASIANA"
+   - "대한항공" / "KOREAN AIR"
+
+**해결 방법:**
+- 유사도 임계값을 낮춰보세요 (현재: {th:.2f} → 권장: 0.2~0.3)
+- 항공사명을 생략하고 검색해보세요 (예: "국제선 노쇼 위약금")
+- 디버그 모드를 켜서 전체 검색 결과를 확인해보세요
+"""
+
+
+def no_result_message(expanded_query: str, th: float) -> str:
+    """근거를 찾지 못했을 때 안내"""
+    return f"""
+관련 규정을 찾지 못했습니다. 😥
+
+**시도한 검색어:** `{expanded_query}`
+
+**가능한 원인:**
+- 유사도 임계값({th:.2f})이 너무 높습니다
+- 질문이 너무 추상적이거나 문서에 없는 내용입니다
+
+**해결 방법:**
+1. 유사도 임계값을 **0.2~0.3**으로 낮춰보세요
+2. 질문을 더 구체적으로 작성해보세요
+   - 좋은 예: "제주항공 국제선 BASIC 운임 출발 3일 전 변경 수수료"
+3. 항공사명을 명확히 해주세요
+"""
+
+
+def doc_source(d, score: float) -> dict:
+    """검색 청크 → 근거 참조 dict (본문은 chunk_id 로 RagEngine.chunk() 에서 조회)"""
+    return {
+        "chunk_id": d.metadata.get("chunk_id"),
+        "airline": d.metadata.get("airline", "알 수 없음"),
+        "filename": d.metadata.get("filename", "알 수 없음"),
+        "section": d.metadata.get("heading_path", ""),
+        "score": float(score),
+    }
+
+
+def retrieval_debug(r, th: float, budget: int) -> dict:
+    """검색 경로 중간값 → 디버그 표시용 dict (JSON 직렬화 가능)"""
+    debug = {
+        "query": r.query,
+        "expanded_query": r.expanded_query,
+        "airlines": list(r.airlines),
+        "search_k": r.search_k,
+        "is_table_query": r.is_table_query,
+        "threshold": th,
+    }
+    if r.fare is not None:
+        debug["fare"] = {"candidates": r.fare.candidates, "answered": bool(r.fare.answer),
+                         "missing": list(r.fare.missing)}
+    if r.hybrid is not None:
+        debug["hybrid"] = {"dense": len(r.hybrid.dense_rows), "sparse": len(r.hybrid.sparse_rows),
+                           "fused": len(r.candidates), "lexical": len(r.hybrid.lexical_ids)}
+        debug["candidates"] = [
+            {"airline": d.metadata.get("airline", "알 수 없음"), "score": float(score)}
+            for d, score in r.candidates[:10]
+        ]
+    if r.fan_out:
+        per_airline = {a: 0 for a in r.airlines}
+        for d, _ in r.results:
+            per_airline[d.metadata.get("airline")] = per_airline.get(d.metadata.get("airline"), 0) + 1
+        debug["fan_out"] = {"quota": r.quota, "per_airline": per_airline}
+    if r.reranked:
+        debug["rerank"] = [{"chunk_id": chunk_id, "score": score} for chunk_id, score in r.reranked]
+    if r.packed is not None:
+        p = r.packed
+        debug["context"] = {"raw_tokens": p.raw_tokens, "tokens": p.tokens, "saved": p.saved,
+                            "merged": p.merged, "dropped": p.dropped, "budget": budget}
+    return debug
+
+
+def refresh_status(summary: dict) -> str:
+    """증분 재색인 요약 (ragbot.index_store.update_index) → 표시용 문자열"""
+    if summary["full"]:
+        return f"전체 재빌드 (청크 {summary['new_chunks']}건)"
+    parts = [f"{label} {len(summary[key])}" for key, label in (("changed", "변경"), ("added", "추가"),
+                                                                 ("removed", "삭제")) if summary[key]]
+    return (f"증분 재색인: 문서 {', '.join(parts) or '변경 없음'} · "
+            f"청크 재사용 {summary['reused_chunks']}건 / 새로 임베딩 {summary['new_chunks']}건")
+
+
+class IndexNotReadyError(RuntimeError):
+    """인덱스가 아직 로드되지 않았는데 규정 검색을 호출함 (일반 대화는 가능)"""
+
+
+class LoadReport(NamedTuple):
+    files: list          # 코퍼스 파일
+    failed: list         # [(파일, 오류)] 로드 실패
+    rebuilt: bool        # 새로 빌드했는지 (False 면 아티팩트 로드)
+    status: str          # 화면 표시용 요약
+
+
+class LiveIndex(NamedTuple):
+    """한 번에 교체되는 인덱스 세대 (요청은 시작할 때 한 번 읽고 끝까지 같은 세대를 씀)"""
+    index: object        # IndexArtifact
+    retriever: object    # HybridRetriever
+    chunks: object       # ChunkStore
+    fares: object        # FareTable
+
+
+class RagResult:
+    """
+    요청 한 건의 결과
+    - answer: 답변 문자열, stream=True 이고 LLM 을 호출하면 토큰 제너레이터
+    - path: rag / fare / no_context / base
+    - sources: 근거 참조 [{"chunk_id", "airline", "filename", "section", "score"}]
+      (청크 본문은 RagEngine.chunk(chunk_id), 수수료 표 답변은 chunk_id 없이 "content" 에 표 행 요약)
+    - usage: 이번 호출 토큰 사용량 dict (스트리밍은 토큰을 모두 소비한 뒤 채워짐, LLM 미호출이면 None)
+    """
+
+    def __init__(self, answer, sources=None, path: str = "rag", debug: dict = None, trace: Trace = None):
+        self.answer = answer
+        self.sources = sources or []
+        self.path = path
+        self.debug = debug or {}
+        self.trace = trace
+        self.usage = None
+
+    @property
+    def streaming(self) -> bool:
+        return not isinstance(self.answer, str)
+
+    @property
+    def outcome(self) -> str:
+        return "no_context" if self.path == "no_context" else "ok"
+
+    def finish(self) -> None:
+        """요청 종료 (답변 출력/전송까지 끝난 뒤 지표/로그 기록)"""
+        if self.trace is not None:
+            self.trace.finish(self.outcome)
+
+    def to_dict(self) -> dict:
+        """JSON 응답용 (answer 는 문자열이어야 함)"""
+        return {
+            "answer": self.answer,
+            "sources": self.sources,
+            "path": self.path,
+            "debug": self.debug,
+            "usage": self.usage,
+            "trace": self.trace.to_dict() if self.trace is not None else None,
+        }
+
+
+class RagEngine:
+    """
+    LLM / 프롬프트 체인 / 인덱스 / 캐시를 한 번 만들어 두고 요청마다 재사용
+    llm, embeddings 를 넘기면 그 모델을 사용 (기본: OpenAI LLM + EMBEDDING_BACKEND 임베딩, 벤치마크는 ragbot.fakes 대역)
+    embedding_model: 인덱스 세대 / 임베딩 캐시 이름 (기본: 설정된 백엔드의 embedding_model_name())
+    embed_batch_wait_ms: 질의 임베딩 마이크로 배치 대기 시간 (0 이면 요청마다 embed_query 호출)
+    airline_quota: 여러 항공사 질문의 항공사당 최소 근거 수 (0 이면 항공사별 검색 끔)
+    reranker: 검색 후보 재순위기 종류 (ragbot.rerank, none 이면 임계값을 넘은 상위 k 를 그대로)
+    """
+
+    def __init__(self, llm=None, embeddings=None, index_dir=INDEX_DIR, embedding_model: str = None,
+                 llm_model: str = LLM_MODEL, context_budget: int = CONTEXT_TOKEN_BUDGET,
+                 embed_batch_wait_ms: float = EMBED_BATCH_WAIT_MS, airline_quota: int = MULTI_AIRLINE_QUOTA,
+                 reranker: str = RERANKER):
+        if llm is None:
+            from langchain_openai import ChatOpenAI
+
+            # stream_usage: 스트리밍 응답에도 토큰 사용량(usage_metadata)이 실리도록
+            llm = ChatOpenAI(model=llm_model, temperature=0, stream_usage=True)
+        embedding_model = embedding_model or embedding_model_name()
+        if embeddings is None:
+            embeddings = make_embeddings()
+        from langchain_core.output_parsers import StrOutputParser
+
+        self.index_dir = index_dir
+        self.embedding_model = embedding_model
+        self.llm_model = llm_model
+        self.context_budget = context_budget
+        self.airline_quota = airline_quota
+
+        # 프롬프트: 고정 지시문(system)을 앞에, 이력/문서/질문(human)을 뒤에 두어 제공자 접두어 캐시 재사용
+        self.rag_chain = build_rag_prompt() | llm | StrOutputParser()
+        self.base_chain = build_base_prompt() | llm | StrOutputParser()
+
+        # 임베딩 디스크 캐시 (바뀐 청크만 임베딩)
+        self.embeddings = CachedEmbeddings(embeddings, embedding_model)
+        disk_store = EmbeddingStore(EMBEDDING_CACHE_DIR, f"{embedding_model}-query") if QUERY_CACHE_DISK else None
+        self.query_cache = QueryEmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL, disk_store)
+
+        # 질의 임베딩: 동시에 들어온 요청을 모아 embed_documents 한 번으로 (청크 디스크 캐시는 거치지 않음)
+        if embed_batch_wait_ms > 0:
+            # 로컬 모델은 질의 접두어를 붙이는 embed_queries 로 배치
+            embed_batch = getattr(embeddings, "embed_queries", embeddings.embed_documents)
+            self.batcher = EmbeddingBatcher(embed_batch, embed_batch_wait_ms / 1000, EMBED_BATCH_MAX)
+            self.embed_query, self.aembed_query = self.batcher.embed, self.batcher.aembed
+        else:
+            self.batcher = None
+            self.embed_query, self.aembed_query = embeddings.embed_query, embeddings.aembed_query
+        self.answer_cache = AnswerCache(ANSWER_CACHE_SIZE)
+        # 재순위: 임계값을 넘은 후보 중 상위 몇 개만 컨텍스트에 (점수는 질의 + chunk_id 로 캐시)
+        self.reranker = make_reranker(reranker)
+        self.usage = UsageRecorder()
+
+        # 대화 이력: 지난 답변은 요약으로 바꿔 프롬프트 이력 크기를 일정하게 (메시지마다 요약 한 번)
+        self.history = HistoryCompressor(HISTORY_TURNS) if HISTORY_COMPRESS else None
+
+        self.live = None
+        self.watcher = None
+        self._load_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 인덱스
+    # ------------------------------------------------------------------
+    @property
+    def ready(self) -> bool:
+        return self.live is not None
+
+    @property
+    def index(self):
+        live = self.live
+        return live.index if live is not None else None
+
+    @property
+    def retriever(self):
+        live = self.live
+        return live.retriever if live is not None else None
+
+    @property
+    def chunks(self):
+        live = self.live
+        return live.chunks if live is not None else None
+
+    @property
+    def fare_table(self):
+        live = self.live
+        return live.fares if live is not None else None
+
+    @property
+    def generation(self) -> str:
+        index = self.index
+        return index.generation if index is not None else ""
+
+    def load(self, files: list = None) -> LoadReport:
+        """
+        사전 빌드된 인덱스 아티팩트 로드
+        - manifest 의 코퍼스 해시/임베딩 모델이 현재 MD 파일과 같으면 재임베딩 없이 로드
+        - 다르면 (또는 아티팩트가 없으면) 새로 빌드 후 저장
+        코퍼스가 없거나 비어 있으면 ValueError
+        """
+        files = find_corpus_files() if files is None else files
+        if not files:
+            raise ValueError("MD 파일을 찾지 못했습니다.")
+
+        with self._load_lock:
+            c_hash = corpus_hash(files)
+            failed = []
+            index = load_index(self.index_dir, c_hash, self.embedding_model, INDEX_MMAP)
+            rebuilt = index is None
+            if rebuilt:
+                with build_lock(self.index_dir):
+                    # 잠금을 기다리는 동안 다른 워커가 같은 세대를 만들었으면 로드만
+                    index = load_index(self.index_dir, c_hash, self.embedding_model, INDEX_MMAP)
+                    if index is None:
+                        index, failed = build_index(files, self.embeddings, self.embedding_model, self.index_dir,
+                                                    c_hash, INDEX_MMAP)
+                        status = f"새로 빌드, {self.embeddings.stats_text()}"
+                    else:
+                        rebuilt = False
+                        status = "아티팩트 로드 (다른 워커가 빌드)"
+            else:
+                set_current(self.index_dir, index.generation)
+                status = "아티팩트 로드"
+            self._swap(index)
+
+        return LoadReport(files, failed, rebuilt, status)
+
+    def refresh(self, files: list = None) -> LoadReport:
+        """
+        코퍼스 변경 반영 (파일 감시 ragbot.watcher 가 호출)
+        - 바뀐 문서만 다시 분할 / 임베딩한 새 세대를 현재 세대 옆에 만든 뒤 live 를 한 번에 교체
+          (진행 중인 요청은 시작할 때 잡은 이전 세대를 끝까지 사용)
+        - 다른 워커가 같은 세대를 이미 만들었으면 로드만 (빌드는 index_dir 잠금으로 한 프로세스씩)
+        - 코퍼스가 그대로면 아무것도 하지 않음 (rebuilt=False, status "변경 없음")
+        """
+        files = find_corpus_files() if files is None else files
+        if not self.ready:
+            return self.load(files)
+        if not files:
+            raise ValueError("MD 파일을 찾지 못했습니다.")
+
+        with self._load_lock:
+            c_hash = corpus_hash(files)
+            old = self.index
+            if old.manifest.get("corpus_hash") == c_hash:
+                return LoadReport(files, [], False, "변경 없음")
+            failed = []
+            with build_lock(self.index_dir):
+                index = load_index(self.index_dir, c_hash, self.embedding_model, INDEX_MMAP)
+                if index is None:
+                    index, failed, summary = update_index(old, files, self.embeddings, self.embedding_model,
+                                                          self.index_dir, c_hash, INDEX_MMAP)
+                    status = refresh_status(summary)
+                    prune_generations(self.index_dir, self.embedding_model, INDEX_KEEP_GENERATIONS)
+                else:
+                    set_current(self.index_dir, index.generation)
+                    status = "다른 워커가 만든 세대 로드"
+            self._swap(index)
+
+        return LoadReport(files, failed, True, status)
+
+    def _swap(self, index) -> None:
+        """새 세대로 검색기 / 청크 저장소를 만든 뒤 live 한 번 대입으로 교체"""
+        previous = self.live
+        retriever = HybridRetriever.from_index(index, self.embeddings, VECTOR_INDEX, VECTOR_DTYPE)
+        # 직전 세대 청크도 한동안 조회 가능 (교체 직전 답변의 근거 표시용)
+        fallback = previous.index.chunks if previous is not None and previous.index is not index else None
+        self.live = LiveIndex(index, retriever, ChunkStore(index.chunks, fallback), index.fares)
+        self.answer_cache.bind_generation(index.generation)
+
+    def watch(self, interval: float = CORPUS_WATCH_INTERVAL):
+        """코퍼스 감시 스레드 시작 (interval 초 폴링, 0 이면 시작하지 않음) → CorpusWatcher 또는 None"""
+        if interval <= 0:
+            return None
+        if self.watcher is None:
+            from ragbot.watcher import CorpusWatcher
+
+            self.watcher = CorpusWatcher(self, interval).start()
+        return self.watcher
+
+    def info(self) -> dict:
+        """인덱스 요약 (헬스 체크 / 화면 표시용)"""
+        if self.index is None:
+            return {"ready": False}
+        m = self.index.manifest
+        return {
+            "ready": True,
+            "generation": self.index.generation,
+            "n_documents": m["n_documents"],
+            "n_chunks": m["n_chunks"],
+            "n_fares": m.get("n_fares", 0),
+            "airlines": list(m["airlines"]),
+            "embedding_model": self.embedding_model,
+            "llm_model": self.llm_model,
+        }
+
+    def chunk(self, chunk_id: str) -> dict:
+        """청크 본문 + 메타데이터 (근거 표시용, 없는 ID 면 None)"""
+        chunks = self.chunks
+        return chunks.source(chunk_id) if chunks is not None else None
+
+    def stats(self) -> dict:
+        """캐시 / 토큰 사용량 누적"""
+        return {
+            "query_cache": self.query_cache.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "embed_batch": self.batcher.stats() if self.batcher is not None else None,
+            "history": self.history.stats() if self.history is not None else None,
+            "rerank": self.reranker.stats() if self.reranker is not None else None,
+            "watcher": self.watcher.stats() if self.watcher is not None else None,
+            "usage": self.usage.stats(),
+        }
+
+    # ------------------------------------------------------------------
+    # 요청
+    # ------------------------------------------------------------------
+    def history_text(self, history) -> str:
+        """대화 이력 → 프롬프트 "최근 대화" 텍스트"""
+        if self.history is None:
+            return format_history(history, HISTORY_TURNS)
+        return self.history.format(history)
+
+    def llm_config(self, prompt_version: str, *callbacks) -> dict:
+        """체인 호출 설정 (토큰 사용량 기록 + 프롬프트 버전 태그)"""
+        return {"callbacks": [self.usage, *callbacks], "metadata": {"prompt_version": prompt_version}}
+
+    def _call_llm(self, chain, inputs: dict, prompt_version: str, result: RagResult, stream: bool,
+                  trace: Trace, on_done=None):
+        """LLM 호출 (이번 호출 토큰 사용량은 result.usage 에 기록)"""
+        config, set_usage = self._llm_call_config(prompt_version, result, on_done)
+        if stream:
+            return trace.wrap_stream("llm", stream_with_callback(chain, inputs, set_usage, config=config))
+        with trace.span("llm"):
+            answer = chain.invoke(inputs, config=config)
+        set_usage(answer)
+        return answer
+
+    async def _acall_llm(self, chain, inputs: dict, prompt_version: str, result: RagResult, stream: bool,
+                         trace: Trace, on_done=None):
+        """_call_llm 의 비동기 버전 (stream=True 이면 비동기 토큰 제너레이터)"""
+        config, set_usage = self._llm_call_config(prompt_version, result, on_done)
+        if stream:
+            return trace.awrap_stream("llm", astream_with_callback(chain, inputs, set_usage, config=config))
+        with trace.span("llm"):
+            answer = await chain.ainvoke(inputs, config=config)
+        set_usage(answer)
+        return answer
+
+    def _llm_call_config(self, prompt_version: str, result: RagResult, on_done) -> tuple:
+        """호출 설정 + 끝난 뒤 result.usage 를 채우는 콜백"""
+        call_usage = UsageRecorder(maxlen=1)
+
+        def set_usage(text):
+            record = call_usage.last()
+            result.usage = record._asdict() if record is not None else None
+            if on_done is not None:
+                on_done(text)
+
+        return self.llm_config(prompt_version, call_usage), set_usage
+
+    def route(self, q: str) -> bool:
+        """질문이 RAG가 필요한지 판단"""
+        return route_to_rag(q)
+
+    def ask(self, q: str, history=(), k: int = 5, threshold: float = 0.3, stream: bool = False,
+            trace: Trace = None) -> RagResult:
+        """채팅 입력 한 건: RAG 라우팅 후 규정 검색 답변 또는 일반 대화"""
+        trace = trace if trace is not None else Trace("rag")
+        with trace.span("route"):
+            use_rag = self.route(q)
+        if use_rag:
+            return self.refund_rag(q, history, k, threshold, stream, trace)
+        return self.chat(q, history, stream, trace)
+
+    async def aask(self, q: str, history=(), k: int = 5, threshold: float = 0.3, stream: bool = False,
+                   trace: Trace = None) -> RagResult:
+        """ask 의 비동기 버전"""
+        trace = trace if trace is not None else Trace("rag")
+        with trace.span("route"):
+            use_rag = self.route(q)
+        if use_rag:
+            return await self.arefund_rag(q, history, k, threshold, stream, trace)
+        return await self.achat(q, history, stream, trace)
+
+    def chat(self, q: str, history=(), stream: bool = False, trace: Trace = None) -> RagResult:
+        """일반 대화 (검색 없이)"""
+        trace = trace if trace is not None else Trace("base")
+        trace.set_path("base")
+        result = RagResult(None, path="base", trace=trace)
+        inputs = {"history": self.history_text(history), "q": q}
+        result.answer = self._call_llm(self.base_chain, inputs, BASE_PROMPT_VERSION, result, stream, trace)
+        return result
+
+    async def achat(self, q: str, history=(), stream: bool = False, trace: Trace = None) -> RagResult:
+        """chat 의 비동기 버전"""
+        trace = trace if trace is not None else Trace("base")
+        trace.set_path("base")
+        result = RagResult(None, path="base", trace=trace)
+        inputs = {"history": self.history_text(history), "q": q}
+        result.answer = await self._acall_llm(self.base_chain, inputs, BASE_PROMPT_VERSION, result, stream, trace)
+        return result
+
+    def filter_search(self, airline=None, route=None, seat=None, regulation=None, history=(), k: int = 5,
+                      threshold: float = 0.3, stream: bool = False, trace: Trace = None) -> RagResult:
+        """사이드바 필터 검색 (라우팅 없이 RAG)"""
+        query, display = build_filter_query(airline, route, seat, regulation)
+        trace = trace if trace is not None else Trace("filter")
+        result = self.refund_rag(query, history, k, threshold, stream, trace)
+        result.debug.update(filter_query=query, filter_display=display)
+        return result
+
+    async def afilter_search(self, airline=None, route=None, seat=None, regulation=None, history=(), k: int = 5,
+                             threshold: float = 0.3, stream: bool = False, trace: Trace = None) -> RagResult:
+        """filter_search 의 비동기 버전"""
+        query, display = build_filter_query(airline, route, seat, regulation)
+        trace = trace if trace is not None else Trace("filter")
+        result = await self.arefund_rag(query, history, k, threshold, stream, trace)
+        result.debug.update(filter_query=query, filter_display=display)
+        return result
+
+    def refund_rag(self, q: str, history=(), k: int = 5, threshold: float = 0.3, stream: bool = False,
+                   trace: Trace = None) -> RagResult:
+        """
+        RAG를 사용한 답변 생성
+        - 한영 동의어 확장, 항공사 필터, 표 데이터 검색 폭 확대 (ragbot.pipeline.retrieve)
+        - 조건이 모두 있는 수수료 질문은 수수료 표에서 바로 답변 (LLM 생략)
+        - stream=True 이면 답변 대신 토큰 제너레이터 (캐시 적중 시에는 문자열)
+        인덱스가 아직 로드되지 않았으면 IndexNotReadyError
+        """
+        if not self.ready:
+            raise IndexNotReadyError("인덱스가 아직 로드되지 않았습니다.")
+        trace = trace if trace is not None else Trace("rag")
+        live = self.live    # 요청 동안 같은 세대 (재색인으로 교체돼도 이 요청은 끝까지 이전 세대)
+
+        r = retrieve(q, live.retriever, self.query_cache, k, threshold, live.fares,
+                     self.context_budget, self.llm_model, trace=trace, embed_fn=self.embed_query,
+                     airline_quota=self.airline_quota, reranker=self.reranker)
+        result, inputs, cache_key = self._rag_result(r, q, history, threshold, trace)
+        if inputs is not None:
+            result.answer = self._call_llm(
+                self.rag_chain, inputs, RAG_PROMPT_VERSION, result, stream, trace,
+                on_done=lambda text: self.answer_cache.put(cache_key, text),
+            )
+        if result.path == "rag":
+            result.debug["answer_cache"] = self.answer_cache.stats()
+        return result
+
+    async def arefund_rag(self, q: str, history=(), k: int = 5, threshold: float = 0.3, stream: bool = False,
+                          trace: Trace = None) -> RagResult:
+        """
+        refund_rag 의 비동기 버전
+        질의 임베딩(마이크로 배치)과 LLM 호출(ainvoke / astream)을 await 하므로
+        한 이벤트 루프에서 여러 요청의 네트워크 대기가 겹침 (stream=True 이면 비동기 토큰 제너레이터)
+        """
+        if not self.ready:
+            raise IndexNotReadyError("인덱스가 아직 로드되지 않았습니다.")
+        trace = trace if trace is not None else Trace("rag")
+        live = self.live
+
+        r = await aretrieve(q, live.retriever, self.query_cache, k, threshold, live.fares,
+                            self.context_budget, self.llm_model, trace=trace, aembed_fn=self.aembed_query,
+                            airline_quota=self.airline_quota, reranker=self.reranker)
+        result, inputs, cache_key = self._rag_result(r, q, history, threshold, trace)
+        if inputs is not None:
+            result.answer = await self._acall_llm(
+                self.rag_chain, inputs, RAG_PROMPT_VERSION, result, stream, trace,
+                on_done=lambda text: self.answer_cache.put(cache_key, text),
+            )
+        if result.path == "rag":
+            result.debug["answer_cache"] = self.answer_cache.stats()
+        return result
+
+    def _rag_result(self, r, q: str, history, threshold: float, trace: Trace) -> tuple:
+        """
+        검색 결과 → (RagResult, LLM 입력, 답변 캐시 키)
+        수수료 표 답변 / 근거 없음 / 답변 캐시 적중이면 LLM 입력은 None (result.answer 가 이미 채워짐)
+        """
+        debug = retrieval_debug(r, threshold, self.context_budget)
+        if r.hybrid is not None:
+            debug["query_cache"] = self.query_cache.stats()
+
+        # 수수료 표 직접 조회: 조건이 모두 있고 금액이 하나로 정해지면 검색/LLM 생략
+        if r.fare_answer:
+            trace.set_path("fare")
+            rec = r.fare.record
+            return RagResult(r.fare_answer, [{
+                "chunk_id": None,
+                "airline": rec["airline"],
+                "filename": rec["filename"],
+                "section": rec["section"],
+                "score": 1.0,
+                "content": f"{rec['section']} | {rec['fare'] or ''} | {rec['value']}",
+            }], path="fare", debug=debug, trace=trace), None, None
+
+        if not r.results:
+            if r.airlines:
+                message = no_airline_message(r.airlines, threshold)
+            else:
+                message = no_result_message(r.expanded_query, threshold)
+            return RagResult(message, path="no_context", debug=debug, trace=trace), None, None
+
+        # 같은 질문/청크/이력이면 캐시된 답변 사용
+        history_text = self.history_text(history)
+        results = r.results
+        cache_key = AnswerCache.make_key(
+            q, [d.metadata.get("chunk_id", "") for d, _ in results],
+            history_text, RAG_PROMPT_VERSION, self.llm_model,
+        )
+        result = RagResult(None, [doc_source(d, score) for d, score in results], debug=debug, trace=trace)
+        answer = self.answer_cache.get(cache_key)
+        trace.set(answer_cache="miss" if answer is None else "hit")
+        if answer is not None:
+            result.answer = answer
+            return result, None, cache_key
+        return result, {"history": history_text, "context": r.packed.text, "q": q}, cache_key
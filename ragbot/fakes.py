@@ -0,0 +1,214 @@
+"""
+네트워크 없이 쓰는 결정적(deterministic) 대역 모델
+
+- FakeUsageChatModel: 고정 답변을 돌려주면서 OpenAI 와 같은 방식으로 usage_metadata 를 보고
+  (같은 접두어가 이전 요청에 있었으면 cache_read 로 집계: 1024 토큰 이상, 128 토큰 단위)
+- HashingEmbeddings: 글자 n-gram 해싱 임베딩 (같은 텍스트 → 항상 같은 벡터, 글자가 겹칠수록 가까움)
+두 대역 모두 latency 를 주면 호출마다 네트워크 왕복처럼 지연을 넣습니다 (동시성 벤치마크용).
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from ragbot.tokens import count_tokens
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    # 슬라이스 비교 이분 탐색 (긴 프롬프트를 글자 단위로 도는 것보다 빠름)
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+@lru_cache(maxsize=65536)
+def _piece_hash(piece: str) -> int:
+    """글자 조각 해시 (크기 제한 캐시 - hashing 백엔드로 오래 돌아도 어휘만큼 커지지 않게)"""
+    return int.from_bytes(hashlib.blake2b(piece.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    OpenAIEmbeddings 대역 (네트워크 없음, 결정적)
+    소문자화한 텍스트의 글자 1~ngram 조각을 dim 차원에 해싱한 뒤 L2 정규화
+    latency: 호출(왕복) 한 번마다 추가할 지연(초) - 배치 크기와 무관
+    max_concurrency: 동시에 처리하는 호출 수 (제공자 동시 요청 제한 흉내, 0 이면 제한 없음)
+    calls: 지금까지의 호출(왕복) 수
+    """
+
+    def __init__(self, dim: int = 512, ngram: int = 2, latency: float = 0.0, max_concurrency: int = 0):
+        self.dim = dim
+        self.ngram = ngram
+        self.latency = latency
+        self.calls = 0
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._aslots = None         # asyncio.Semaphore (첫 비동기 호출 때 생성)
+        self._lock = threading.Lock()
+
+    def _round_trip(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if not self.latency:
+            return
+        if self._slots is None:
+            time.sleep(self.latency)
+            return
+        with self._slots:
+            time.sleep(self.latency)
+
+    async def _around_trip(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if not self.latency:
+            return
+        if not self.max_concurrency:
+            await asyncio.sleep(self.latency)
+            return
+        if self._aslots is None:
+            self._aslots = asyncio.Semaphore(self.max_concurrency)
+        async with self._aslots:
+            await asyncio.sleep(self.latency)
+
+    def embed_query(self, text: str) -> list:
+        self._round_trip()
+        return self._encode([text])[0].tolist()
+
+    def _encode(self, texts: list) -> np.ndarray:
+        """텍스트 목록 → (n, dim) 행렬 (조각 해시는 캐시, 빈도는 bincount 한 번)"""
+        rows, cols = [], []
+        for r, text in enumerate(texts):
+            text = " ".join(text.lower().split())
+            for n in range(1, self.ngram + 1):
+                for i in range(len(text) - n + 1):
+                    piece = text[i:i + n]
+                    if not piece.isspace():
+                        cols.append(_piece_hash(piece) % self.dim)
+                        rows.append(r)
+        flat = np.bincount(np.asarray(rows, dtype=np.int64) * self.dim + np.asarray(cols, dtype=np.int64),
+                           minlength=len(texts) * self.dim)
+        v = flat.reshape(len(texts), self.dim).astype(np.float32)
+        norms = np.linalg.norm(v, axis=1, keepdims=True)
+        return np.divide(v, norms, out=v, where=norms > 0)
+
+    def embed_documents(self, texts: list) -> list:
+        self._round_trip()
+        return self._encode(texts).tolist() if texts else []
+
+    async def aembed_query(self, text: str) -> list:
+        await self._around_trip()
+        return self._encode([text])[0].tolist()
+
+    async def aembed_documents(self, texts: list) -> list:
+        await self._around_trip()
+        return self._encode(texts).tolist() if texts else []
+
+
+class FakeUsageChatModel(BaseChatModel):
+    """
+    고정 답변 + 토큰 사용량 보고 (프롬프트/캐시/완료)
+    latency: 호출마다 추가할 지연(초) - 동시성/지연 측정용
+    """
+
+    responses: List[str] = ["⚠️ 정확한 정보는 해당 항공사 공식 웹사이트를 확인해주세요."]
+    latency: float = 0.0
+    cache_min_tokens: int = 1024
+    cache_block: int = 128
+    model_name: str = "fake-usage"
+
+    _calls: int = PrivateAttr(default=0)
+    _history: list = PrivateAttr(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-usage-chat"
+
+    def _prompt_text(self, messages: List[BaseMessage]) -> str:
+        return "".join(f"<{m.type}>{m.content}" for m in messages)
+
+    def _usage(self, prompt: str, answer: str) -> dict:
+        """OpenAI 접두어 캐시 흉내: 이전 요청과 같은 접두어 중 가장 긴 것"""
+        prompt_tokens = count_tokens(prompt, self.model_name)
+        common = max((_common_prefix_len(prompt, p) for p in self._history), default=0)
+        cached = count_tokens(prompt[:common], self.model_name)
+        cached = cached // self.cache_block * self.cache_block if cached >= self.cache_min_tokens else 0
+        self._history.append(prompt)
+        del self._history[:-64]
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": count_tokens(answer, self.model_name),
+            "total_tokens": prompt_tokens + count_tokens(answer, self.model_name),
+            "input_token_details": {"cache_read": min(cached, prompt_tokens)},
+        }
+
+    def _next_answer(self) -> str:
+        answer = self.responses[self._calls % len(self.responses)]
+        self._calls += 1
+        return answer
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        answer = self._next_answer()
+        usage = self._usage(self._prompt_text(messages), answer)
+        message = AIMessage(content=answer, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        answer = self._next_answer()
+        usage = self._usage(self._prompt_text(messages), answer)
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=word if last else word + " ",
+                usage_metadata=usage if last else None,
+            ))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        answer = self._next_answer()
+        usage = self._usage(self._prompt_text(messages), answer)
+        message = AIMessage(content=answer, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        answer = self._next_answer()
+        usage = self._usage(self._prompt_text(messages), answer)
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=word if last else word + " ",
+                usage_metadata=usage if last else None,
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
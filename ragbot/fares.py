@@ -0,0 +1,528 @@
+"""
+정책 문서 표 → 구조화된 수수료 조회표
+
+색인 시점에 MD 문서의 수수료 표를 읽어 한 칸(셀)을 한 행으로 펼친 열 지향(columnar) 표로 만듭니다.
+각 행은 항공사 / 노선(국제선·국내선) / 좌석 등급 / 수수료 종류(변경·취소·노쇼) / 거리 /
+출발 지역 / 통화 / 운임 종류 / 출발 전 남은 일수 구간 / 금액 을 가집니다.
+
+질문에 항공사·수수료 종류·운임·출발 시점 등 필요한 조건이 모두 들어 있어
+조회 결과가 하나의 금액으로 정해지면 벡터 검색과 LLM 없이 바로 답하고,
+조건이 빠졌거나 결과가 둘 이상이면 None 을 돌려 기존 RAG 경로로 넘깁니다.
+
+지원하는 표 모양:
+- 행 = 출발 시점 구간, 열 = 운임 종류   (대한항공 일반석, 제주항공, 진에어, 에어서울)
+- 행 = 거리, 열 = 출발 시점 구간        (대한항공 프리미엄 이코노미, 아시아나 클래스별)
+- 행 = 출발 지역, 열 = 운임 종류         (제주항공 국제선 변경 수수료)
+- 행 = 출발 시점 구간, 열 = 통화         (이스타항공 국제선, 운임은 제목에서)
+- 행 = 운임 종류, 열 = 금액              (대한항공 국내선)
+"""
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from ragbot.chunker import strip_front_matter
+from ragbot.matcher import analyze_query
+
+FARES_FILE = "fares.json"
+
+# 수수료 표가 아닌 표 (서비스 이용료, 비교/요약표 등)
+SKIP_SECTIONS = (
+    "비교", "빠른 검색", "서비스 이용료", "서비스 수수료", "발권 수수료", "이름",
+    "보너스", "라운지", "승급", "문서 구조", "통화별 기준", "노선 구분", "검색 키워드",
+)
+
+# 값 열이 아니라 행의 조건을 나타내는 열 머리글
+KEY_HEADER_WORDS = ("기간", "지역", "시점", "기준", "구분", "노선 구분", "통화", "발권일", "대상", "방법", "채널", "거리", "클래스", "운임 종류")
+
+REGIONS = (
+    "한국", "대한민국", "일본", "중국", "홍콩", "마카오", "대만", "태국", "베트남", "필리핀",
+    "라오스", "괌", "사이판", "몽골", "말레이시아", "러시아", "싱가포르", "인도네시아", "캐나다", "해외",
+)
+CURRENCIES = ("KRW", "JPY", "CNY", "HKD", "MOP", "TWD", "THB", "USD", "MYR", "EUR", "SGD", "IDR")
+DISTANCES = ("단거리", "중거리", "장거리")
+CABINS = {
+    "일반석": "일반석", "이코노미": "일반석",
+    "프리미엄": "프리미엄", "비즈니스": "비즈니스", "프레스티지": "비즈니스", "일등석": "일등석",
+}
+
+# 운임 이름에서 빼는 일반 단어
+FARE_STOPWORDS = {
+    "변경", "취소", "수수료", "위약금", "환불", "금액", "요금", "편도", "1인", "운임", "클래스",
+    "예약부도", "상위", "이코노미", "비즈니스", "정액", "시점무관",
+}
+
+COLUMNS = (
+    "airline", "route", "cabin", "fee_types", "distances", "regions", "currency",
+    "fare", "fare_tokens", "variant", "conditions", "day_min", "day_max", "value", "section", "filename",
+)
+
+_TABLE_ROW = re.compile(r"^\s*\|(.*)\|\s*$")
+_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{2,}")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_DAY_NUMBER = re.compile(r"(\d+)(?=\s*(?:일|~\s*\d+\s*일))")
+_CLASS_LETTER = re.compile(r"(?<![A-Za-z])[A-Z](?![A-Za-z])")
+_WORDS = re.compile(r"[a-z]{2,}|[가-힣]{2,}")
+
+
+def _clean(cell: str) -> str:
+    return re.sub(r"\s+", " ", cell.replace("**", "")).strip()
+
+
+def fee_types(text: str) -> frozenset:
+    """문구에 들어 있는 수수료 종류"""
+    t = text.lower()
+    if "부분 환불" in t or "부분환불" in t:
+        return frozenset({"부분환불"})
+    found = set()
+    if "게이트" in t or "gate" in t or "출국장" in t:
+        found.add("게이트노쇼")
+    elif "노쇼" in t or "no-show" in t or "예약부도" in t or "미탑승" in t:
+        if "직전" not in t:
+            found.add("노쇼")
+    if "변경" in t or "재발행" in t:
+        found.add("변경")
+    if "취소" in t or "환불" in t:
+        found.add("취소")
+    if not found and "위약금" in t:
+        found.add("취소")
+    return frozenset(found)
+
+
+def parse_days(label: str):
+    """
+    출발 전 남은 일수 구간 (최소, 최대) - 해당 없으면 None
+    예: "90~61일" → (61, 90), "91일 이상" → (91, inf), "3일 이내" → (0, 3), "출발 당일" → (0, 0)
+    """
+    if re.search(r"\d{4}", label) or "유효기간" in label:
+        return None
+    numbers = [(int(m.group(1)), m.end()) for m in _DAY_NUMBER.finditer(label)]
+    if len(numbers) >= 2:
+        values = [n for n, _ in numbers]
+        return (min(values), max(values))
+    if len(numbers) == 1:
+        n, end = numbers[0]
+        head, tail = label[:end], label[end:]
+        if re.search(r"이내|시간|직전|당일|~\s*출발", tail):
+            return (0, n)
+        if re.search(r"이상|이전|까지", tail) or "~" in head:
+            return (n, math.inf)
+        return (n, n)
+    if "당일" in label and "구매" not in label and "예매" not in label:
+        return (0, 0)
+    return None
+
+
+def _fare_tokens(label: str) -> frozenset:
+    """운임 이름 → 매칭용 토큰 (예약 클래스 문자 + 단어)"""
+    tokens = {c.lower() for c in _CLASS_LETTER.findall(label)}
+    tokens.update(w for w in _WORDS.findall(label.lower()) if w not in FARE_STOPWORDS)
+    return frozenset(tokens)
+
+
+def classify(label: str) -> dict:
+    """
+    표 머리글/행 이름 하나를 속성으로 분류
+    분류되지 않은 이름은 {"fare": ...} 후보로 남김
+    """
+    attrs = {}
+    fees = fee_types(label)
+    if fees & {"부분환불", "노쇼", "게이트노쇼"} or "재발행" in label:
+        attrs["fee_types"] = fees
+    distances = frozenset(d for d in DISTANCES if d in label)
+    if distances:
+        attrs["distances"] = distances
+    if "국제선" in label or "국내선" in label:
+        if len(label) <= 12:
+            attrs["route"] = "국제선" if "국제선" in label else "국내선"
+    regions = frozenset("한국" if r == "대한민국" else r for r in REGIONS if r in label)
+    if regions:
+        attrs["regions"] = regions
+    currency = re.search(r"\b(" + "|".join(CURRENCIES) + r")\b", label)
+    if currency:
+        attrs["currency"] = currency.group(1)
+    if "노선" in label:
+        attrs["variant"] = _variant(label)
+    days = parse_days(label)
+    if days is not None:
+        attrs["days"] = days
+    if not attrs:
+        tokens = _fare_tokens(label)
+        if tokens:
+            attrs["fare"] = re.sub(r"\s*(?:변경|취소)?\s*(?:수수료|위약금)$", "", label) or label
+            attrs["fare_tokens"] = tokens
+    return attrs
+
+
+def _variant(text: str):
+    """기본 규정과 다른 적용 대상 (특정 노선 / 제주 노선 / 해외 출발)"""
+    if "특정 노선" in text:
+        return "특정 노선"
+    if "제주 노선" in text:
+        return "제주 노선"
+    return None
+
+
+def _section_context(headings: list) -> dict:
+    """제목 경로에서 표 전체에 적용되는 속성 (가까운 제목 우선)"""
+    ctx = {"variant": None}
+    for h in reversed(headings):
+        if "route" not in ctx and ("국제선" in h or "국내선" in h):
+            ctx["route"] = "국제선" if "국제선" in h else "국내선"
+        if "fee_types" not in ctx and fee_types(h):
+            ctx["fee_types"] = fee_types(h)
+        if "distances" not in ctx:
+            distances = frozenset(d for d in DISTANCES if d in h)
+            if distances:
+                ctx["distances"] = distances
+        if "cabin" not in ctx:
+            for word, cabin in CABINS.items():
+                if word in h:
+                    ctx["cabin"] = cabin
+                    break
+        if "regions" not in ctx:
+            if "한국 출발" in h:
+                ctx["regions"] = frozenset({"한국"})
+            elif "해외 출발" in h:
+                ctx["regions"] = frozenset({"해외"})
+        if "fare" not in ctx:
+            m = re.search(r"((?:[A-Z]\s*,\s*)*[A-Z])\s*클래스", h) or re.search(r"([가-힣]+)\s*운임", h)
+            if m:
+                ctx["fare"] = m.group(0)
+                ctx["fare_tokens"] = _fare_tokens(m.group(1))
+        if ctx["variant"] is None:
+            ctx["variant"] = _variant(h)
+    return ctx
+
+
+def iter_tables(text: str):
+    """MD 본문의 (제목 경로, 머리글, 본문 행들) - YAML front matter 는 건너뜀"""
+    lines = text[strip_front_matter(text):].splitlines()
+
+    headings = []
+    table = []
+    for line in lines + [""]:
+        row = _TABLE_ROW.match(line)
+        if row:
+            if not _SEPARATOR.match(line):
+                table.append([_clean(c) for c in row.group(1).split("|")])
+            continue
+        if len(table) >= 2:
+            yield list(headings), table[0], table[1:]
+        table = []
+        heading = _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            headings = headings[:level - 1] + [""] * max(0, level - 1 - len(headings))
+            headings.append(_clean(heading.group(2)))
+
+
+def parse_table(airline: str, filename: str, headings: list, header: list, rows: list) -> list:
+    """표 하나 → 셀 단위 레코드 목록"""
+    section = " > ".join(h for h in headings if h)
+    if any(word in section for word in SKIP_SECTIONS):
+        return []
+
+    ctx = _section_context([h for h in headings if h])
+    n_keys = 1
+    while n_keys < len(header) - 1 and any(w in header[n_keys] for w in KEY_HEADER_WORDS):
+        n_keys += 1
+    fare_rows = any(w in header[0] for w in ("클래스", "운임"))
+
+    records = []
+    for row in rows:
+        if len(row) != len(header):
+            continue
+        row_attrs, conditions = {}, []
+        for cell in row[:n_keys]:
+            attrs = classify(cell)
+            if "fare" in attrs and not fare_rows:
+                conditions.append(cell)
+                attrs = {}
+            row_attrs.update(attrs)
+
+        for col, value in zip(header[n_keys:], row[n_keys:]):
+            if not value or value == "-":
+                continue
+            col_attrs = classify(col)
+            rec = {
+                "airline": airline,
+                "route": None, "cabin": None, "fee_types": frozenset(), "distances": None,
+                "regions": None, "currency": None, "fare": None, "fare_tokens": None,
+                "variant": None, "days": None,
+            }
+            for attrs in (ctx, row_attrs, col_attrs):
+                rec.update({k: v for k, v in attrs.items() if v is not None})
+            if not rec["fee_types"]:
+                continue
+            day_min, day_max = rec.pop("days") or (-1, -1)
+            rec.update(
+                conditions=tuple(conditions), day_min=day_min, day_max=day_max,
+                value=value, section=section, filename=filename,
+            )
+            records.append(rec)
+    return records
+
+
+class FareMatch(NamedTuple):
+    answer: str           # 결정적 답변 (조회 실패 시 None)
+    record: dict          # 답에 사용한 레코드
+    candidates: int       # 조건 적용 후 남은 레코드 수
+    missing: tuple        # 결과가 갈려서 질문에 더 필요한 조건
+
+
+class QuerySlots(NamedTuple):
+    airlines: tuple
+    route: str
+    cabin: str
+    fee_type: str
+    distance: str
+    regions: frozenset
+    currency: str
+    variant: str
+    days: int
+    text: str            # 운임 매칭용 (질문 원문, 소문자 - 동의어로 넓히면 다른 운임까지 걸림)
+    classes: frozenset   # 질문에 쓰인 예약 클래스 문자
+
+
+def parse_query(q: str) -> QuerySlots:
+    """질문 → 조회 조건"""
+    analysis = analyze_query(q)
+    text = q.lower()
+
+    route = "국제선" if "국제" in q else "국내선" if "국내" in q else None
+    cabin = next((c for w, c in CABINS.items() if w in q), None)
+    # 수수료 종류: 부분환불/노쇼는 취소·환불 표현을 함께 쓰므로 취소보다 우선,
+    # 그 밖에 두 종류 이상이 나오면 ("변경 말고 환불은?") 모호 → 조회하지 않고 검색으로
+    fee_types = set()
+    if "부분" in q and "환불" in q:
+        fee_types.add("부분환불")
+    elif any(w in text for w in ("게이트", "gate", "출국장")):
+        fee_types.add("게이트노쇼")
+    elif any(w in text for w in ("노쇼", "no-show", "예약부도", "미탑승")):
+        fee_types.add("노쇼")
+    if not fee_types and any(w in q for w in ("취소", "환불")):
+        fee_types.add("취소")
+    if "변경" in q:
+        fee_types.add("변경")
+    if not fee_types and "위약금" in q:
+        fee_types.add("취소")
+    fee_type = fee_types.pop() if len(fee_types) == 1 else None
+    distance = next((d for d in DISTANCES if d in q), None)
+    regions = frozenset("한국" if r == "대한민국" else r for r in REGIONS if r in q)
+    currency = next((c for c in CURRENCIES if c in q.upper()), None)
+
+    days = None
+    m = re.search(r"(\d+)\s*일\s*(?:전|앞|이전|남)", q) or re.search(r"출발\s*(\d+)\s*일", q) \
+        or re.search(r"[Dd]\s*-\s*(\d+)", q)
+    if m:
+        days = int(m.group(1))
+    elif "당일" in q:
+        days = 0
+
+    classes = frozenset(c.lower() for c in re.findall(r"(?<![A-Za-z])([A-Z])\s*(?:클래스|class|등급|석)", q))
+
+    return QuerySlots(
+        airlines=analysis.airlines, route=route, cabin=cabin, fee_type=fee_type,
+        distance=distance, regions=regions, currency=currency, variant=_variant(q),
+        days=days, text=text, classes=classes,
+    )
+
+
+class FareTable:
+    """
+    수수료 레코드 열 지향 저장소
+    - 열마다 리스트 하나 (일수 구간은 numpy 배열)
+    - 조회는 열별 bool 마스크를 차례로 곱해서 후보를 좁힘
+    """
+
+    def __init__(self, columns: dict):
+        self.columns = {name: list(columns.get(name, [])) for name in COLUMNS}
+        self.day_min = np.asarray(self.columns["day_min"], dtype=np.float64)
+        self.day_max = np.asarray(self.columns["day_max"], dtype=np.float64)
+        self.airline = np.asarray(self.columns["airline"], dtype=object)
+
+    def __len__(self):
+        return len(self.columns["value"])
+
+    @classmethod
+    def from_records(cls, records: list) -> "FareTable":
+        return cls({name: [r[name] for r in records] for name in COLUMNS})
+
+    @classmethod
+    def from_documents(cls, docs: list) -> "FareTable":
+        """로드한 문서(LangChain Document)의 수수료 표 전체 파싱"""
+        records = []
+        for d in docs:
+            for headings, header, rows in iter_tables(d.page_content):
+                records.extend(parse_table(
+                    d.metadata.get("airline", ""), d.metadata.get("filename", ""), headings, header, rows,
+                ))
+        return cls.from_records(records)
+
+    def record(self, i: int) -> dict:
+        return {name: self.columns[name][i] for name in COLUMNS}
+
+    def _shared_record(self, rows) -> dict:
+        """금액이 같은 여러 레코드 → 모두 같은 속성만 남긴 레코드 (근거 표는 첫 레코드)"""
+        rec = self.record(int(rows[0]))
+        for name in ("route", "cabin", "fare", "fare_tokens", "distances", "regions", "currency",
+                     "variant", "conditions"):
+            if len({str(self.columns[name][i]) for i in rows}) > 1:
+                rec[name] = None
+        if len({(self.columns["day_min"][i], self.columns["day_max"][i]) for i in rows}) > 1:
+            rec["day_min"] = rec["day_max"] = None
+        return rec
+
+    # ---- 저장/로드 ----
+
+    def save(self, path) -> None:
+        data = {}
+        for name, values in self.columns.items():
+            data[name] = [
+                sorted(v) if isinstance(v, frozenset) else
+                None if isinstance(v, float) and math.isinf(v) else v
+                for v in values
+            ]
+        with open(Path(path), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path) -> "FareTable":
+        with open(Path(path), encoding="utf-8") as f:
+            data = json.load(f)
+        for name in ("fee_types", "distances", "regions", "fare_tokens"):
+            data[name] = [frozenset(v) if v is not None else None for v in data.get(name, [])]
+        data["conditions"] = [tuple(v) for v in data.get("conditions", [])]
+        data["day_max"] = [math.inf if v is None else v for v in data.get("day_max", [])]
+        return cls(data)
+
+    # ---- 조회 ----
+
+    def _mask(self, name: str, keep) -> np.ndarray:
+        return np.fromiter((keep(v) for v in self.columns[name]), dtype=bool, count=len(self))
+
+    def lookup(self, q: str) -> FareMatch:
+        """
+        질문 조건으로 조회 - 금액이 하나로 정해질 때만 answer 를 채움
+        표가 노선 / 운임 / 출발 시점 / 거리로 나뉘어 있는데 질문에 그 조건이 없으면
+        금액이 우연히 하나로 모여도 답하지 않고 missing 으로 돌려줌 (→ 검색)
+        """
+        s = parse_query(q)
+        if len(s.airlines) != 1 or s.fee_type is None:
+            missing = ("항공사",) if len(s.airlines) != 1 else ("수수료 종류",)
+            return FareMatch(None, None, 0, missing)
+
+        mask = self.airline == s.airlines[0]
+        mask &= self._mask("fee_types", lambda v: s.fee_type in v)
+        mask &= self._mask("variant", lambda v: v == s.variant)
+        unstated = []
+        if not s.route and any(self.columns["route"][i] for i in np.flatnonzero(mask)):
+            unstated.append("국제선/국내선")
+        if s.route:
+            mask &= self._mask("route", lambda v: v in (None, s.route))
+        if s.cabin:
+            mask &= self._mask("cabin", lambda v: v in (None, s.cabin))
+        if s.distance:
+            mask &= self._mask("distances", lambda v: v is None or s.distance in v)
+
+        # 출발 지역 / 통화: 언급이 없으면 한국 출발(KRW) 기준
+        if s.regions:
+            mask &= self._mask("regions", lambda v: v is None or bool(v & s.regions))
+        else:
+            mask &= self._mask("regions", lambda v: v is None or "한국" in v)
+        if s.currency:
+            mask &= self._mask("currency", lambda v: v in (None, s.currency))
+        elif not s.regions:
+            mask &= self._mask("currency", lambda v: v in (None, "KRW"))
+
+        # 운임: 후보 레코드의 운임 어휘 중 질문에 나온 것
+        vocab = set()
+        for i in np.flatnonzero(mask):
+            vocab |= self.columns["fare_tokens"][i] or set()
+        asked = {t for t in vocab if (len(t) == 1 and t in s.classes) or (len(t) > 1 and t in s.text)}
+        if asked:
+            mask &= self._mask("fare_tokens", lambda v: v is None or bool(v & asked))
+        elif vocab:
+            unstated.append("운임 종류")
+        candidates = np.flatnonzero(mask)
+        if s.distance is None and any(self.columns["distances"][i] for i in candidates):
+            unstated.append("거리")
+        if s.days is None and (self.day_min[candidates] >= 0).any():
+            unstated.append("출발 시점")
+
+        # 출발 시점: 구간이 있는 표를 시점 무관 항목보다 우선
+        if s.days is not None:
+            in_band = mask & (self.day_min <= s.days) & (s.days <= self.day_max)
+            mask = in_band if in_band.any() else mask & (self.day_min < 0)
+
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return FareMatch(None, None, 0, ())
+        if unstated:
+            return FareMatch(None, None, len(rows), tuple(unstated))
+
+        values = {self.columns["value"][i] for i in rows}
+        if len(values) == 1:
+            rec = self._shared_record(rows)
+            return FareMatch(format_answer(rec, s), rec, len(rows), ())
+
+        missing = []
+        for name, label in (
+            ("fare", "운임 종류"), ("day_min", "출발 시점"), ("route", "국제선/국내선"),
+            ("cabin", "좌석 등급"), ("distances", "거리"), ("regions", "출발 지역"),
+            ("variant", "적용 노선"), ("conditions", "적용 조건"), ("section", "규정 표"),
+        ):
+            if len({str(self.columns[name][i]) for i in rows}) > 1:
+                missing.append(label)
+        return FareMatch(None, None, len(rows), tuple(missing))
+
+
+def _days_text(rec: dict) -> str:
+    lo, hi = rec["day_min"], rec["day_max"]
+    if lo < 0:
+        return "시점 무관"
+    if math.isinf(hi):
+        return f"출발 {int(lo)}일 전 이전"
+    if lo == hi:
+        return "출발 당일" if lo == 0 else f"출발 {int(lo)}일 전"
+    return f"출발 {int(hi)}일 ~ {int(lo)}일 전"
+
+
+def format_answer(rec: dict, slots: QuerySlots) -> str:
+    """조회 결과 → 답변 마크다운 (RAG 답변과 같은 표 형식)"""
+    value = rec["value"]
+    if re.fullmatch(r"[\d,]+", value) and rec["currency"] in (None, "KRW"):
+        value += "원"
+    fee_name = {"변경": "변경 수수료", "취소": "취소/환불 위약금", "노쇼": "예약부도(노쇼) 위약금",
+                "게이트노쇼": "게이트 노쇼 위약금", "부분환불": "부분 환불 위약금"}[slots.fee_type]
+
+    rows = [("항공사", rec["airline"])]
+    if rec["route"]:
+        rows.append(("노선", rec["route"]))
+    if rec["cabin"]:
+        rows.append(("좌석 등급", rec["cabin"]))
+    if rec["fare"]:
+        rows.append(("운임", rec["fare"]))
+    if rec["distances"]:
+        rows.append(("거리", " / ".join(d for d in DISTANCES if d in rec["distances"])))
+    if rec["regions"]:
+        rows.append(("출발 지역", " / ".join(sorted(rec["regions"]))))
+    if rec["variant"]:
+        rows.append(("적용 노선", rec["variant"]))
+    if slots.days is not None:
+        band = f" (규정 구간: {_days_text(rec)})" if rec["day_min"] is not None else ""
+        rows.append(("출발 시점", f"출발 {slots.days}일 전{band}"))
+    rows.append((fee_name, f"**{value}**"))
+
+    table = "\n".join(f"| {k} | {v} |" for k, v in rows)
+    return (
+        f"## {rec['airline']} {fee_name}\n\n"
+        f"| 항목 | 내용 |\n|---|---|\n{table}\n\n"
+        f"**근거 표**: {rec['section']} ({rec['filename']})\n\n"
+        "⚠️ 정확한 정보는 해당 항공사 공식 웹사이트를 확인해주세요."
+    )
@@ -0,0 +1,31 @@
+"""
+사이드바 필터 검색 선택지 → 검색 질의
+
+화면(app.py)이 첫 렌더링에 쓰므로 무거운 의존성 없이 가볍게 유지합니다.
+"""
+
+# 사이드바 필터 검색 선택지 ("선택안함" 제외)
+FILTER_OPTIONS = {
+    "airline": ["대한항공", "제주항공", "진에어", "아시아나", "티웨이", "에어서울"],
+    "route": ["국제선", "국내선"],
+    "seat": ["일반석", "비즈니스석", "프리미엄이코노미"],
+    "regulation": ["환불", "변경", "노쇼", "취소"],
+}
+NO_FILTER = "선택안함"
+
+
+def build_filter_query(airline=None, route=None, seat=None, regulation=None) -> tuple:
+    """
+    필터 선택값 → (검색 질의, 화면 표시용 문자열)
+    선택하지 않은 값(None, "", "선택안함")은 건너뜀. 모두 비었으면 ValueError
+    """
+    parts = []
+    for name, value in (("airline", airline), ("route", route), ("seat", seat), ("regulation", regulation)):
+        if not value or value == NO_FILTER:
+            continue
+        if value not in FILTER_OPTIONS[name]:
+            raise ValueError(f"알 수 없는 {name} 필터 값: {value}")
+        parts.append(value)
+    if not parts:
+        raise ValueError("최소 하나 이상의 필터를 선택해주세요")
+    return " ".join(parts), " > ".join(parts)
@@ -0,0 +1,154 @@
+"""
+대화 이력 압축 (프롬프트의 "최근 대화" 부분)
+
+어시스턴트 답변은 표가 여러 개 들어간 긴 마크다운이라 그대로 이력에 넣으면
+대화가 길어질수록 매 요청마다 지난 표 수천 토큰을 다시 보내게 됩니다. 그래서
+- 사용자 발화: 그대로 (너무 길면 user_chars 에서 자름)
+- 어시스턴트 답변: 짧은 일반 대화는 그대로, 규정 답변은 규칙 기반 요약 한 줄 (항공사 / 노선 / 규정 / 주요 금액 / 주요 사항)
+으로 바꿔 이력 크기가 턴 수 × 요약 길이 안에서 거의 일정하게 유지되도록 합니다.
+요약은 LLM 없이 만들고, 답변 본문 해시로 캐시하므로 메시지마다 한 번만 계산합니다
+(같은 답변이면 세션 / API 요청이 달라도 공유).
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from ragbot.embedding_cache import text_hash
+from ragbot.filters import FILTER_OPTIONS
+from ragbot.matcher import analyze
+
+_TITLE = re.compile(r"^#{1,3}\s+(.+)$", re.MULTILINE)
+_AMOUNT = re.compile(r"(?:USD|KRW|JPY|EUR)\s?[\d,.]+|[\d][\d,.]*\s?(?:만원|원|달러|엔|%)")
+_KEY_POINTS = re.compile(r"\*\*주요 사항\*\*\s*:?\s*\n((?:\s*[-*]\s+.+\n?)+)")
+_BOLD = re.compile(r"\*\*([^*\n]+)\*\*")
+_MARKUP = re.compile(r"[*#`|]+")
+
+# 규정 종류 (요약 표시 이름 → 답변에서 찾을 단어)
+REGULATIONS = {
+    "환불": ("환불",),
+    "취소": ("취소", "위약금"),
+    "변경": ("변경",),
+    "노쇼": ("노쇼", "No-Show", "예약부도", "미탑승"),
+}
+
+
+def _clean(text: str) -> str:
+    return " ".join(_MARKUP.sub(" ", text).split())
+
+
+def _unique(items, limit: int) -> list:
+    out = []
+    for item in items:
+        if item not in out:
+            out.append(item)
+        if len(out) >= limit:
+            break
+    return out
+
+
+def summarize_answer(text: str, max_points: int = 3, max_amounts: int = 6, max_chars: int = 400) -> str:
+    """어시스턴트 답변 → 요약 한 줄 (제목, 항공사, 노선, 규정, 주요 금액, 주요 사항)"""
+    parts = []
+    # 제목 (## ...), 없으면 첫 줄 (안내 문구 등)
+    title = _TITLE.search(text)
+    headline = _clean(title.group(1)) if title else next((_clean(l) for l in text.splitlines() if _clean(l)), "")
+    if headline:
+        parts.append(headline[:120])
+    if not title and "|" not in text:
+        # 규정 답변 형식이 아님 (검색 실패 안내 등): 안내 문구의 예시 항공사/규정은 요약하지 않음
+        return headline[:max_chars]
+
+    airlines = analyze(text).airlines
+    if airlines:
+        parts.append("항공사: " + ", ".join(airlines))
+    routes = [r for r in FILTER_OPTIONS["route"] if r in text]
+    if routes:
+        parts.append("노선: " + ", ".join(routes))
+    regulations = [name for name, words in REGULATIONS.items() if any(w in text for w in words)]
+    if regulations:
+        parts.append("규정: " + ", ".join(regulations))
+
+    # 수수료 표 답변은 굵게 표시한 금액, RAG 답변은 표 안 금액을 등장 순서대로
+    amounts = [m for b in _BOLD.findall(text) for m in _AMOUNT.findall(b)] + _AMOUNT.findall(text)
+    amounts = _unique((" ".join(a.split()) for a in amounts), max_amounts)
+    if amounts:
+        parts.append("금액: " + ", ".join(amounts))
+
+    points = _KEY_POINTS.search(text)
+    if points:
+        lines = [_clean(line.lstrip(" -*")) for line in points.group(1).splitlines() if line.strip()]
+        parts.append("주요 사항: " + "; ".join(lines[:max_points]))
+    summary = " · ".join(parts)
+    return summary if len(summary) <= max_chars else summary[:max_chars - 1] + "…"
+
+
+class HistoryCompressor:
+    """
+    (역할, 내용) 대화 목록 → 프롬프트용 이력 텍스트 (어시스턴트 답변은 요약으로 대체)
+    keep_chars 이하이고 제목(##)이 없는 답변은 그대로 둠 (일반 대화의 짧은 답변)
+    요약은 답변 본문 해시 → 요약 LRU 캐시 (maxsize 개)
+    """
+
+    def __init__(self, n_turns: int = 6, keep_chars: int = 300, user_chars: int = 500, maxsize: int = 4096):
+        self.n_turns = n_turns
+        self.keep_chars = keep_chars
+        self.user_chars = user_chars
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.chars_in = 0       # 압축 전 이력 글자 수 (누적)
+        self.chars_out = 0      # 압축 후
+
+    def summary(self, text: str) -> str:
+        """답변 요약 (캐시)"""
+        key = text_hash(text)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        summary = summarize_answer(text)
+        with self._lock:
+            self._cache[key] = summary
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return summary
+
+    def compress(self, role: str, content: str) -> str:
+        if role == "user":
+            if len(content) <= self.user_chars:
+                return f"사용자: {content}"
+            return f"사용자: {content[:self.user_chars - 1]}…"
+        if len(content) <= self.keep_chars and not _TITLE.search(content):
+            return f"어시스턴트: {content}"
+        return f"어시스턴트(요약): {self.summary(content)}"
+
+    def format(self, history) -> str:
+        """최근 n_turns 개의 대화 → 프롬프트용 텍스트 ((역할, 내용) 또는 {"role", "content"} 목록)"""
+        lines = []
+        raw = 0
+        for turn in list(history or [])[-self.n_turns:]:
+            role, content = (turn["role"], turn["content"]) if isinstance(turn, dict) else turn
+            raw += len(content)
+            lines.append(self.compress(role, content))
+        text = "\n".join(lines) if lines else "대화이력 없음"
+        with self._lock:
+            self.chars_in += raw
+            self.chars_out += len(text)
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "summaries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "chars_in": self.chars_in,
+                "chars_out": self.chars_out,
+                "ratio": self.chars_out / self.chars_in if self.chars_in else 1.0,
+            }
@@ -0,0 +1,508 @@
+"""
+사전 빌드 인덱스 아티팩트 저장/로드
+
+디렉터리 구조:
+    index/
+      CURRENT                 # 현재 세대 디렉터리 이름
+      <corpus_hash>-<model>/  # 한 번 쓰면 수정하지 않는 세대
+        manifest.json         # 코퍼스 해시, 임베딩 모델, 청크 수 등
+        vectors.npy           # 정규화된 float32 임베딩 행렬 (청크 순서와 동일)
+        vectors.float16.npy   # 같은 행렬의 float16 / int8(+ 행별 스케일) 저장본 (VECTOR_DTYPE)
+        vectors.int8.npy
+        vectors.int8.scale.npy
+        chunks.bin            # 청크별 JSON 레코드(ID / 본문 / 메타데이터) UTF-8 을 이어 붙인 파일
+        chunks.offsets.npy    # 레코드 시작 위치 (청크 수 + 1)
+        ids.npy               # 청크 ID (행 순서) / 정렬본 / 정렬본의 원래 행
+        ids.sorted.npy
+        ids.order.npy
+        airline.npy           # 행별 항공사 (항공사 마스크용)
+        bm25.*.npy            # BM25 역색인 (ragbot.sparse.BM25Index.save)
+        fares.json            # 수수료 표 구조화 조회표 (ragbot.fares)
+
+세대 파일은 읽기 전용으로 메모리 매핑해서 읽습니다 (INDEX_MMAP).
+같은 호스트의 워커 프로세스들은 OS 페이지 캐시의 한 벌을 공유하고,
+새 워커는 파싱 / 토큰화 / 재임베딩 없이 파일을 매핑만 하므로 바로 뜹니다.
+청크 본문과 메타데이터는 검색 결과로 꺼낼 때만 디코딩합니다.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from ragbot.fares import FARES_FILE, FareTable
+from ragbot.sparse import BM25Index
+from ragbot.vector_index import DTYPES, quantize
+
+FORMAT_VERSION = 3
+CURRENT_FILE = "CURRENT"
+
+
+def generation_name(corpus_hash: str, embedding_model: str) -> str:
+    """세대 디렉터리 이름 (코퍼스 해시 + 임베딩 모델)"""
+    model_slug = re.sub(r"[^A-Za-z0-9._-]+", "_", embedding_model)
+    return f"{corpus_hash[:16]}-{model_slug}"
+
+
+class ChunkTable:
+    """
+    청크 본문 / 메타데이터 (오프셋 색인 레코드 파일 위의 읽기 전용 시퀀스)
+    - table[row]: LangChain Document (레코드 하나만 디코딩, 최근 cache_size 개는 워커마다 LRU 로 재사용)
+    - chunk_id(row) / row(chunk_id): 청크 ID ↔ 행 번호 (정렬된 ID 배열 이진 탐색)
+    - mask(key, values): 저장된 열(airline)은 레코드 디코딩 없이 bool 마스크
+    """
+
+    COLUMNS = ("airline",)
+
+    def __init__(self, data, offsets, ids, sorted_ids, order, columns: dict, cache_size: int = 1024):
+        self.data = data
+        self.offsets = offsets
+        self.ids = ids
+        self.sorted_ids = sorted_ids
+        self.order = order
+        self.columns = columns
+        self._document = lru_cache(maxsize=cache_size)(self._decode)
+
+    @classmethod
+    def write(cls, path, chunks: list) -> None:
+        """청크 목록 → path 의 chunks.bin / chunks.offsets.npy / ids*.npy / 열 파일"""
+        path = Path(path)
+        offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        with open(path / "chunks.bin", "wb") as f:
+            for i, c in enumerate(chunks):
+                row = {"id": c.metadata["chunk_id"], "text": c.page_content, "metadata": c.metadata}
+                offsets[i + 1] = offsets[i] + f.write(json.dumps(row, ensure_ascii=False).encode("utf-8"))
+        np.save(path / "chunks.offsets.npy", offsets)
+
+        ids = np.array([c.metadata["chunk_id"].encode("ascii") for c in chunks], dtype=bytes)
+        order = np.argsort(ids, kind="stable")
+        np.save(path / "ids.npy", ids)
+        np.save(path / "ids.sorted.npy", ids[order])
+        np.save(path / "ids.order.npy", order.astype(np.int64))
+        for key in cls.COLUMNS:
+            values = [str(c.metadata.get(key, "")).encode("utf-8") for c in chunks]
+            np.save(path / f"{key}.npy", np.array(values, dtype=bytes))
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "ChunkTable":
+        """write() 로 저장한 파일 (mmap 이면 읽기 전용 메모리 매핑, 아니면 프로세스 메모리로 읽음)"""
+        path = Path(path)
+        mode = "r" if mmap else None
+
+        def array(name):
+            # memmap 하위 클래스 대신 같은 매핑을 가리키는 ndarray (슬라이싱 부담이 적음)
+            return np.asarray(np.load(path / name, mmap_mode=mode))
+
+        if mmap:
+            data = np.asarray(np.memmap(path / "chunks.bin", dtype=np.uint8, mode="r")) \
+                if (path / "chunks.bin").stat().st_size else np.zeros(0, dtype=np.uint8)
+        else:
+            data = np.fromfile(path / "chunks.bin", dtype=np.uint8)
+        return cls(
+            data, array("chunks.offsets.npy"), array("ids.npy"), array("ids.sorted.npy"), array("ids.order.npy"),
+            {key: array(f"{key}.npy") for key in cls.COLUMNS},
+        )
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def record(self, row: int) -> dict:
+        """행 → {"id", "text", "metadata"}"""
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return json.loads(self.data[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8"))
+
+    def __getitem__(self, row: int):
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self._document(int(row))
+
+    def _decode(self, row: int):
+        from langchain_core.documents import Document
+
+        rec = self.record(row)
+        return Document(page_content=rec["text"], metadata=rec["metadata"])
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+    def chunk_id(self, row: int) -> str:
+        return self.ids[row].decode("ascii")
+
+    def row(self, chunk_id: str):
+        """chunk_id → 행 번호 (없으면 None)"""
+        if not isinstance(chunk_id, str):
+            return None
+        key = chunk_id.encode("ascii", errors="replace")
+        i = int(np.searchsorted(self.sorted_ids, key))
+        if i == len(self.sorted_ids) or self.sorted_ids[i] != key:
+            return None
+        return int(self.order[i])
+
+    def values(self, key: str) -> list:
+        """열의 서로 다른 값 (정렬)"""
+        if key in self.columns:
+            return sorted(v.decode("utf-8") for v in np.unique(self.columns[key]))
+        return sorted({str(self.record(r)["metadata"].get(key, "")) for r in range(len(self))})
+
+    def mask(self, key: str, values) -> np.ndarray:
+        """key 값이 values 중 하나인 행 마스크 (저장된 열이 아니면 레코드를 모두 디코딩)"""
+        if key in self.columns:
+            return np.isin(self.columns[key], [str(v).encode("utf-8") for v in values])
+        values = set(values)
+        return np.array([self.record(r)["metadata"].get(key) in values for r in range(len(self))], dtype=bool)
+
+
+class IndexArtifact:
+    """디스크에서 읽어 온 인덱스 한 세대 (배열은 기본적으로 읽기 전용 메모리 매핑)"""
+
+    def __init__(self, path, manifest, vectors, chunks: ChunkTable, fares=None, mmap: bool = True):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.vectors = vectors
+        self.chunks = chunks
+        self.fares = fares
+        self.mmap = mmap
+
+    @property
+    def generation(self) -> str:
+        return self.path.name
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def quantized(self, dtype: str = "float32"):
+        """저장된 dtype 별 벡터 행렬 → (행렬, int8 행별 스케일 또는 None)"""
+        if dtype not in DTYPES:
+            raise ValueError(f"알 수 없는 벡터 dtype: {dtype} (가능: {', '.join(DTYPES)})")
+        if dtype == "float32":
+            return self.vectors, None
+        mode = "r" if self.mmap else None
+        matrix = np.asarray(np.load(self.path / f"vectors.{dtype}.npy", mmap_mode=mode))
+        scale = np.asarray(np.load(self.path / "vectors.int8.scale.npy", mmap_mode=mode)) if dtype == "int8" else None
+        return matrix, scale
+
+    def to_vector_index(self, embedding, dtype: str = "float32"):
+        """
+        저장된 벡터로 NumPy 인덱스 구성 (재임베딩 / 양자화 / 복사 없음)
+        - embedding 은 질의 임베딩에만 사용
+        """
+        from ragbot.vector_index import VectorIndex
+
+        matrix, scale = self.quantized(dtype)
+        return VectorIndex.from_quantized(matrix, self.chunks, embedding, scale)
+
+    def to_sparse(self) -> BM25Index:
+        """저장된 BM25 역색인 (토큰화 없이 로드)"""
+        return BM25Index.load(self.path, len(self), mmap=self.mmap)
+
+    def to_chroma(self, embedding):
+        """
+        저장된 벡터로 인메모리 Chroma 컬렉션 구성 (재임베딩 없음, 컬렉션은 프로세스마다 한 벌)
+        - embedding 은 질의 임베딩에만 사용
+        """
+        from langchain_community.vectorstores import Chroma
+
+        records = [self.chunks.record(r) for r in range(len(self))]
+        db = Chroma(collection_name=f"airlines-{self.generation}", embedding_function=embedding)
+        db._collection.upsert(
+            ids=[r["id"] for r in records],
+            embeddings=np.asarray(self.vectors).tolist(),
+            documents=[r["text"] for r in records],
+            metadatas=[r["metadata"] for r in records],
+        )
+        return db
+
+
+def _write_json(path: Path, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def save_index(index_dir, manifest: dict, vectors, chunks, fares=None) -> Path:
+    """
+    청크와 벡터를 새 세대로 저장하고 CURRENT 를 교체
+    - 임시 디렉터리에 모두 쓴 뒤 rename 하므로 반쯤 쓰인 세대는 보이지 않음
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    gen = generation_name(manifest["corpus_hash"], manifest["embedding_model"])
+    target = index_dir / gen
+
+    if target.exists() and load_index(index_dir, manifest["corpus_hash"], manifest["embedding_model"]) is None:
+        # 이전 형식이거나 배열 파일이 깨진 같은 세대는 지우고 다시 씀 (이미 매핑한 워커는 지운 파일을 계속 읽음)
+        shutil.rmtree(target, ignore_errors=True)
+
+    if not target.exists():
+        tmp = Path(tempfile.mkdtemp(prefix=f".{gen}-", dir=index_dir))
+        try:
+            for dtype in DTYPES:
+                matrix, scale = quantize(vectors, dtype)
+                np.save(tmp / ("vectors.npy" if dtype == "float32" else f"vectors.{dtype}.npy"), matrix)
+                if scale is not None:
+                    np.save(tmp / f"vectors.{dtype}.scale.npy", scale)
+            ChunkTable.write(tmp, chunks)
+            BM25Index([c.page_content for c in chunks]).save(tmp)
+            if fares is not None:
+                fares.save(tmp / FARES_FILE)
+            _write_json(tmp / "manifest.json", manifest)
+            os.rename(tmp, target)
+        except OSError:
+            # 다른 프로세스가 같은 세대를 먼저 만든 경우 그대로 사용
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not (target / "manifest.json").exists():
+                raise
+
+    set_current(index_dir, gen)
+    return target
+
+
+def set_current(index_dir, gen: str) -> None:
+    """CURRENT 포인터를 원자적으로 교체"""
+    index_dir = Path(index_dir)
+    tmp = index_dir / f".{CURRENT_FILE}.{os.getpid()}"
+    tmp.write_text(gen + "\n", encoding="utf-8")
+    os.replace(tmp, index_dir / CURRENT_FILE)
+
+
+@contextmanager
+def build_lock(index_dir):
+    """
+    세대 빌드 잠금 (같은 호스트의 워커들이 같은 세대를 동시에 만들지 않도록)
+    잠금을 얻은 뒤 load_index 로 다시 확인하면 먼저 끝낸 워커의 세대를 그대로 로드 (fcntl 이 없으면 잠금 없음)
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(index_dir / ".build.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def prune_generations(index_dir, embedding_model: str, keep: int = 3) -> list:
+    """
+    같은 임베딩 모델의 오래된 세대 삭제 (CURRENT 세대를 포함해 최근 keep 개 유지) → 삭제한 세대 이름
+    이미 매핑한 워커는 지운 파일을 계속 읽을 수 있음 (POSIX)
+    """
+    index_dir = Path(index_dir)
+    try:
+        current = (index_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        current = None
+    gens = []
+    for path in index_dir.iterdir():
+        m = read_manifest(path) if path.is_dir() and not path.name.startswith(".") else None
+        if m is not None and m.get("embedding_model") == embedding_model and path.name != current:
+            gens.append((path.stat().st_mtime, path))
+    removed = []
+    for _, path in sorted(gens, reverse=True)[max(keep - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(path.name)
+    return removed
+
+
+def read_manifest(path):
+    """세대 디렉터리의 manifest 읽기 (없거나 깨졌으면 None)"""
+    try:
+        with open(Path(path) / "manifest.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_index(index_dir, corpus_hash=None, embedding_model=None, mmap: bool = True):
+    """
+    인덱스 아티팩트 로드
+    - corpus_hash/embedding_model 이 주어지면 manifest 가 일치하는 세대만 로드
+    - 주어지지 않으면 CURRENT 세대를 로드
+    - 일치하는 세대가 없으면 None (재빌드 필요)
+    - mmap: 배열 / 청크 파일을 읽기 전용으로 메모리 매핑 (False 면 프로세스 메모리로 읽음)
+    """
+    index_dir = Path(index_dir)
+
+    if corpus_hash and embedding_model:
+        path = index_dir / generation_name(corpus_hash, embedding_model)
+    else:
+        try:
+            path = index_dir / (index_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+
+    manifest = read_manifest(path)
+    if manifest is None or manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    if corpus_hash and manifest.get("corpus_hash") != corpus_hash:
+        return None
+    if embedding_model and manifest.get("embedding_model") != embedding_model:
+        return None
+
+    try:
+        # 잘리거나 깨진 배열 파일이 있는 세대는 없는 것으로 봄 (헤더 / 길이만 확인하는 읽기 전용 매핑)
+        for npy in path.glob("*.npy"):
+            np.load(npy, mmap_mode="r")
+        vectors = np.asarray(np.load(path / "vectors.npy", mmap_mode="r" if mmap else None))
+        chunks = ChunkTable.load(path, mmap)
+        fares = FareTable.load(path / FARES_FILE) if (path / FARES_FILE).exists() else None
+    except (OSError, ValueError):
+        return None
+    if len(chunks) != vectors.shape[0]:
+        return None
+
+    return IndexArtifact(path, manifest, vectors, chunks, fares, mmap)
+
+
+def _manifest(corpus_hash: str, embedding_model: str, dim: int, files: list, file_hashes: dict,
+              airlines, n_chunks: int, n_fares: int) -> dict:
+    from ragbot.corpus import chunk_config
+
+    return {
+        "format_version": FORMAT_VERSION,
+        "corpus_hash": corpus_hash,
+        "embedding_model": embedding_model,
+        "chunk_config": chunk_config(),
+        "dim": dim,
+        "n_documents": len(file_hashes),
+        "n_chunks": n_chunks,
+        "n_fares": n_fares,
+        "airlines": sorted(set(airlines)),
+        "files": [Path(fp).name for fp in files],
+        "file_hashes": file_hashes,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def build_index(files: list, embedding, embedding_model: str, index_dir, corpus_hash: str, mmap: bool = True):
+    """
+    코퍼스를 로드/분할/임베딩하여 새 세대 아티팩트로 저장
+    Returns:
+        (IndexArtifact, 로드 실패 목록)
+    """
+    from ragbot.corpus import file_hash, load_documents, split_documents
+
+    all_docs, failed = load_documents(files)
+    if not all_docs:
+        raise ValueError("문서를 로드했지만 내용이 비어 있습니다.")
+
+    chunks = split_documents(all_docs)
+    if not chunks:
+        raise ValueError("청크 분할 결과가 비었습니다.")
+
+    vectors = embedding.embed_documents([c.page_content for c in chunks])
+    fares = FareTable.from_documents(all_docs)
+
+    file_hashes = {d.metadata["filename"]: file_hash(d.metadata["source_path"]) for d in all_docs}
+    manifest = _manifest(corpus_hash, embedding_model, len(vectors[0]), files, file_hashes,
+                         [d.metadata["airline"] for d in all_docs], len(chunks), len(fares))
+    path = save_index(index_dir, manifest, vectors, chunks, fares)
+
+    return _load_saved(path, corpus_hash, embedding_model, mmap), failed
+
+
+def _load_saved(path: Path, corpus_hash: str, embedding_model: str, mmap: bool) -> IndexArtifact:
+    """방금 저장한 세대 로드 (읽을 수 없으면 None 대신 세대 폴더를 알려주는 RuntimeError)"""
+    index = load_index(path.parent, corpus_hash, embedding_model, mmap)
+    if index is None:
+        raise RuntimeError(f"저장한 인덱스 세대를 읽을 수 없습니다 (파일 손상?): {path}")
+    return index
+
+
+def update_index(old: IndexArtifact, files: list, embedding, embedding_model: str, index_dir, corpus_hash: str,
+                 mmap: bool = True):
+    """
+    이전 세대에서 바뀐 문서만 다시 분할/임베딩해 새 세대로 저장 (증분 재색인)
+    - 파일 해시(manifest file_hashes)가 같은 문서의 청크 / 벡터 / 수수료 표 행은 이전 세대에서 그대로 복사
+    - 추가 / 변경된 문서만 로드 → 분할 → 임베딩, 삭제된 문서는 빠짐
+    - 청크 순서는 전체 빌드와 같음 (파일 순서 → 파일 안 순서), 새 세대는 save_index 로 원자적으로 생성
+    - 이전 세대와 임베딩 모델 / 청크 설정이 다르거나 파일 해시가 없으면 전체 빌드
+    Returns:
+        (IndexArtifact, 로드 실패 목록, 변경 요약 dict)
+    """
+    from ragbot.corpus import chunk_config, extract_airline_name, file_hash, load_documents, split_documents
+
+    m = old.manifest if old is not None else {}
+    if (m.get("embedding_model") != embedding_model or m.get("chunk_config") != chunk_config()
+            or "file_hashes" not in m or old.fares is None):
+        index, failed = build_index(files, embedding, embedding_model, index_dir, corpus_hash, mmap)
+        return index, failed, {"full": True, "changed": [], "added": [], "removed": [],
+                               "reused_chunks": 0, "new_chunks": len(index)}
+
+    # 1. 파일별 판정 (이름 + 내용 해시)
+    old_hashes = m["file_hashes"]
+    hashes = {Path(fp).name: file_hash(fp) for fp in files}
+    reuse = {name for name, h in hashes.items() if old_hashes.get(name) == h}
+    todo = [fp for fp in files if Path(fp).name not in reuse]
+
+    # 2. 바뀐 문서만 로드 / 분할 / 임베딩
+    new_docs, failed = load_documents(todo)
+    new_chunks = split_documents(new_docs) if new_docs else []
+    new_vectors = np.asarray(embedding.embed_documents([c.page_content for c in new_chunks]),
+                             dtype=np.float32).reshape(len(new_chunks), -1)
+    new_fares = FareTable.from_documents(new_docs)
+
+    # 3. 이전 세대에서 재사용할 행 (파일별로 모아 둠)
+    from langchain_core.documents import Document
+
+    old_rows, old_fares = {}, {}
+    for row in range(len(old)):
+        rec = old.chunks.record(row)
+        if rec["metadata"].get("filename") in reuse:
+            old_rows.setdefault(rec["metadata"]["filename"], []).append((row, rec))
+    for i in range(len(old.fares)):
+        rec = old.fares.record(i)
+        if rec["filename"] in reuse:
+            old_fares.setdefault(rec["filename"], []).append(rec)
+
+    # 4. 파일 순서대로 합치기 (전체 빌드와 같은 순서)
+    new_by_file, new_fares_by_file = {}, {}
+    for c, v in zip(new_chunks, new_vectors):
+        new_by_file.setdefault(c.metadata["filename"], []).append((c, v))
+    for i in range(len(new_fares)):
+        rec = new_fares.record(i)
+        new_fares_by_file.setdefault(rec["filename"], []).append(rec)
+
+    chunks, vectors, fare_records = [], [], []
+    for fp in files:
+        name = Path(fp).name
+        if name in reuse:
+            for row, rec in old_rows.get(name, []):
+                chunks.append(Document(page_content=rec["text"], metadata=rec["metadata"]))
+                vectors.append(old.vectors[row])
+            fare_records += old_fares.get(name, [])
+        else:
+            for c, v in new_by_file.get(name, []):
+                chunks.append(c)
+                vectors.append(v)
+            fare_records += new_fares_by_file.get(name, [])
+    if not chunks:
+        raise ValueError("청크 분할 결과가 비었습니다.")
+
+    loaded = reuse | {d.metadata["filename"] for d in new_docs}
+    file_hashes = {name: h for name, h in hashes.items() if name in loaded}
+    fares = FareTable.from_records(fare_records)
+    manifest = _manifest(corpus_hash, embedding_model, len(vectors[0]), files, file_hashes,
+                         [extract_airline_name(name) for name in file_hashes], len(chunks), len(fares))
+    path = save_index(index_dir, manifest, np.stack(vectors), chunks, fares)
+
+    summary = {
+        "full": False,
+        "changed": sorted(Path(fp).name for fp in todo if Path(fp).name in old_hashes),
+        "added": sorted(Path(fp).name for fp in todo if Path(fp).name not in old_hashes),
+        "removed": sorted(set(old_hashes) - set(hashes)),
+        "reused_chunks": len(chunks) - len(new_chunks),
+        "new_chunks": len(new_chunks),
+    }
+    return _load_saved(path, corpus_hash, embedding_model, mmap), failed, summary
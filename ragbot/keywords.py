@@ -0,0 +1,155 @@
+"""
+질문 분석용 키워드 사전
+
+- SYNONYM_DICT: 한영 동의어 (검색 쿼리 확장)
+- SYNONYM_EXCLUDE: 동의어 키를 품고 있지만 뜻이 다른 단어 (확장 제외)
+- AIRLINE_KEYWORDS: 질문에서 항공사 추출
+- RAG_KEYWORDS: RAG 라우팅 판단
+"""
+
+# 한영 동의어 매핑 (검색 개선용)
+SYNONYM_DICT = {
+    # 노쇼 관련
+    "노쇼": ["노쇼", "No-Show", "no-show", "노 쇼", "미탑승", "예약부도"],
+    "no-show": ["노쇼", "No-Show", "no-show", "미탑승", "예약부도"],
+
+    # 환불 관련
+    "환불": ["환불", "refund", "반환", "취소환불"],
+    "refund": ["환불", "refund", "반환"],
+
+    # 변경 관련
+    "변경": ["변경", "change", "수정", "교환"],
+    "change": ["변경", "change", "수정"],
+
+    # 수수료 관련
+    "수수료": ["수수료", "fee", "요금", "비용", "charge", "위약금", "패널티", "penalty"],
+    "fee": ["수수료", "fee", "요금", "비용", "charge", "위약금", "패널티", "penalty"],
+    "위약금": ["위약금", "패널티", "penalty", "수수료", "fee"],
+
+    # 취소 관련
+    "취소": ["취소", "cancel", "cancellation", "해지"],
+    "cancel": ["취소", "cancel", "cancellation"],
+
+    # 운임 종류 (이스타항공, 아시아나 등)
+    "특가": ["특가", "특가운임", "프로모션", "promotion", "special"],
+    "특가운임": ["특가", "특가운임", "프로모션", "special fare"],
+    "할인": ["할인", "할인운임", "discount", "세일", "sale"],
+    "할인운임": ["할인", "할인운임", "discount fare"],
+    "일반": ["일반", "일반운임", "정상", "정상운임", "normal", "regular"],
+    "일반운임": ["일반", "일반운임", "정상운임", "regular fare"],
+
+    # 운임 등급 (제주항공, 대한항공 등)
+    "베이직": ["베이직", "BASIC", "Basic", "basic"],
+    "basic": ["베이직", "BASIC", "Basic"],
+    "스탠다드": ["스탠다드", "STANDARD", "Standard", "standard"],
+    "standard": ["스탠다드", "STANDARD", "Standard"],
+    "플렉스": ["플렉스", "FLEX", "Flex", "flex", "flexible"],
+    "flex": ["플렉스", "FLEX", "Flex", "flexible"],
+    "세이버": ["세이버", "SAVER", "Saver", "saver"],
+    "saver": ["세이버", "SAVER", "Saver"],
+
+    # 노선 관련
+    "국내선": ["국내선", "domestic", "국내"],
+    "domestic": ["국내선", "domestic"],
+    "국제선": ["국제선", "international", "국제", "해외", "외국"],
+    "international": ["국제선", "international"],
+
+    # 탑승수속 관련
+    "탑승수속": ["탑승수속", "체크인", "check-in", "수속"],
+    "체크인": ["탑승수속", "체크인", "check-in"],
+
+    # Gate No-Show 관련
+    "게이트": ["게이트", "gate", "출구장"],
+    "출구장": ["게이트", "gate", "출구장"],
+
+    # 미탑승 세분화
+    "미탑승": ["미탑승", "no-show", "미승선", "불탑승"]
+}
+
+# 동의어 키를 안에 품고 있지만 뜻이 다른 단어: 이 단어 안에서 찾은 키는 확장하지 않음
+# ("일반석" 의 "일반" 은 좌석 등급이지 일반(정상) 운임이 아님, "미취소" 는 노쇼)
+SYNONYM_EXCLUDE = ["일반석", "미취소"]
+
+
+# 항공사 키워드 (질문에서 추출용)
+AIRLINE_KEYWORDS = {
+    "대한항공": ["대한항공", "대한", "koreanair", "korean air", "kal"],
+    "제주항공": ["제주항공", "제주", "jejuair", "jeju air"],
+    "아시아나": ["아시아나", "asiana"],
+    "진에어": ["진에어", "진 에어", "jinair", "jin air", "진"],
+    "티웨이": ["티웨이", "티웨이항공", "twayair", "tway", "tway air"],
+    "에어서울": ["에어서울", "airseoul", "air seoul"],
+    "이스타항공": ["이스타", "이스타항공", "eastar", "eastar jet"],
+}
+
+# RAG 라우팅 키워드 (대폭 확장)
+RAG_KEYWORDS = [
+    # === 환불/취소 관련 ===
+    "환불", "불환", "반환", "돌려", "돌려받", "리펀", "refund",
+    "취소", "캔슬", "cancel", "cancellation", "해지", "철회",
+    "부분환불", "전액환불", "일부환불",
+
+    # === 변경 관련 ===
+    "변경", "수정", "교환", "바꾸", "바꿔", "change", "modify", "modification",
+    "일정변경", "날짜변경", "시간변경", "편명변경", "경로변경",
+    "재발권", "리이슈", "reissue",
+
+    # === 수수료 관련 ===
+    "수수료", "fee", "charge", "비용", "요금", "가격", "금액",
+    "위약금", "패널티", "penalty", "벌금",
+    "변경수수료", "환불수수료", "취소수수료", "재발권수수료",
+    "무료", "공짜", "꽁짜", "꽁자", "꽁자", "free", "면제",
+
+    # === 항공권/티켓 관련 ===
+    "항공권", "티켓", "ticket", "표", "비행기표", "항공", "항공편",
+    "편명", "좌석", "seat", "booking", "예약",
+
+    # === 운임 등급 ===
+    "운임", "fare", "등급", "클래스", "class",
+
+    # 기본 운임 등급 (제주항공, 대한항공 등)
+    "flex", "flexible", "플렉스", "플렉시블",
+    "standard", "스탠다드",
+    "saver", "세이버", "save",
+    "basic", "베이직", "베이식",
+
+    # 이스타항공/아시아나 운임 종류
+    "특가", "특가운임", "프로모션", "promotion", "special",
+    "할인", "할인운임", "discount", "세일",
+    "일반", "일반운임", "정상", "정상운임", "regular", "normal",
+
+    # 좌석 등급
+    "premium", "프리미엄", "비즈", "biz", "business",
+    "이코노미", "economy", "일반석", "비즈니스석", "일등석", "퍼스트",
+
+    # === 노선 구분 ===
+    "국내선", "국내", "domestic", "도메스틱",
+    "국제선", "국제", "international", "인터내셔널", "해외", "외국",
+    "단거리", "중거리", "장거리", "short", "medium", "long",
+
+    # === 노쇼 관련 ===
+    "노쇼", "no-show", "noshow", "미탑승", "미승선", "불탑승",
+    "미취소", "미출현", "불출석", "예약부도",
+    "게이트", "gate", "출구장", "탑승구",
+    "탑승수속", "체크인", "check-in", "수속",
+
+    # === 기간/시간 관련 ===
+    "기간", "기한", "유효", "유효기간", "validity", "만료",
+    "출발", "출발일", "출발전", "출발후", "departure",
+    "당일", "오늘", "며칠", "몇일", "며칠전", "일전", "전",
+    "이전", "이후", "before", "after",
+    "91일", "90일", "60일", "15일", "14일", "4일", "3일",
+
+    # === 규정/정책 관련 ===
+    "규정", "정책", "policy", "약관", "조건", "규칙", "rule",
+    "가능", "불가", "가능한", "안되", "되나", "할수있", "할수없",
+
+    # === 항공사명 ===
+    "대한항공", "아시아나", "제주항공", "진에어", "티웨이",
+    "korean", "koreanair", "asiana", "jeju", "jejuair", "jin", "jinair", "tway",
+
+    # === 질문 키워드 ===
+    "언제", "when", "얼마", "how much", "어디", "where",
+    "무엇", "what", "왜", "why",
+    "가능해", "되나요", "인가요", "한가요", "나요",
+]
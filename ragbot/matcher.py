@@ -0,0 +1,167 @@
+"""
+질문 분석기 (Aho-Corasick 다중 패턴 매칭)
+
+RAG 라우팅 키워드, 항공사 키워드, 동의어 사전 키를 import 시점에
+하나의 오토마톤으로 컴파일해 두고, 질문을 한 번만 훑어서
+- RAG 라우팅 여부
+- 감지된 항공사
+- 동의어 매칭 (붙여 쓴 한국어 어절 내부 포함: "노쇼수수료는", 뜻이 다른 단어 안은 제외: "일반석")
+을 함께 구합니다.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import NamedTuple
+
+from ragbot.keywords import AIRLINE_KEYWORDS, RAG_KEYWORDS, SYNONYM_DICT, SYNONYM_EXCLUDE
+
+_ASCII_ALPHA = re.compile(r"[a-z]")
+_TOKEN = re.compile(r"\S+")
+
+
+class AhoCorasick:
+    """
+    패턴 → 값 목록을 받아 텍스트 한 번 순회로 모든 매칭을 찾는 오토마톤
+    """
+
+    def __init__(self, patterns: dict):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern, payloads in patterns.items():
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].extend((pattern, p) for p in payloads)
+
+        # 실패 링크 (BFS)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """(시작 위치, 패턴, 값) 을 끝 위치 순서대로 반환"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern, payload in out[node]:
+                yield i - len(pattern) + 1, pattern, payload
+
+
+class QueryAnalysis(NamedTuple):
+    use_rag: bool
+    airlines: tuple
+    synonym_hits: tuple      # (어절, 동의어 사전 키)
+    expanded_query: str
+
+
+def _build_automaton() -> AhoCorasick:
+    patterns = {}
+
+    def add(pattern, payload):
+        patterns.setdefault(pattern.lower(), []).append(payload)
+
+    for kw in RAG_KEYWORDS:
+        add(kw, ("rag", None))
+    for airline, keywords in AIRLINE_KEYWORDS.items():
+        for kw in keywords:
+            add(kw, ("airline", airline))
+    for key in SYNONYM_DICT:
+        add(key, ("synonym", key))
+    for word in SYNONYM_EXCLUDE:
+        add(word, ("exclude", None))
+
+    return AhoCorasick(patterns)
+
+
+_AUTOMATON = _build_automaton()
+_AIRLINE_ORDER = {airline: i for i, airline in enumerate(AIRLINE_KEYWORDS)}
+
+
+def _is_word_match(text: str, start: int, end: int, pattern: str) -> bool:
+    """영문 키는 영문자 중간에서 잘린 매칭 제외 (coffee ≠ fee), 한글 키는 어절 내부 허용"""
+    if not _ASCII_ALPHA.search(pattern):
+        return True
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not (_ASCII_ALPHA.match(before) or _ASCII_ALPHA.match(after))
+
+
+def analyze(q: str) -> QueryAnalysis:
+    """질문 한 번 순회로 라우팅/항공사/동의어 분석"""
+    q_lower = q.lower()
+    source = q if len(q) == len(q_lower) else q_lower
+
+    use_rag = False
+    airlines = set()
+    synonym_matches = []  # (시작 위치, 끝 위치, 키)
+    excluded = []         # 확장하지 않을 단어의 (시작 위치, 끝 위치)
+
+    for start, pattern, (kind, value) in _AUTOMATON.iter_matches(q_lower):
+        if kind == "rag":
+            use_rag = True
+        elif kind == "airline":
+            airlines.add(value)
+        elif kind == "exclude":
+            excluded.append((start, start + len(pattern)))
+        else:
+            synonym_matches.append((start, start + len(pattern), value))
+
+    # 동의어 확장: 원래 어절 뒤에 그 어절 안에서 찾은 키의 동의어를 덧붙임
+    expanded_terms = []
+    synonym_hits = []
+    synonym_matches.sort()
+    for m in _TOKEN.finditer(q_lower):
+        word = source[m.start():m.end()]
+        expanded_terms.append(word)
+
+        seen_keys = set()
+        while synonym_matches and synonym_matches[0][0] < m.end():
+            start, end, key = synonym_matches.pop(0)
+            if end > m.end() or key in seen_keys or not _is_word_match(q_lower, start, end, key):
+                continue
+            if any(lo <= start and end <= hi for lo, hi in excluded):
+                continue
+            seen_keys.add(key)
+            synonym_hits.append((word, key))
+            expanded_terms.extend(syn for syn in SYNONYM_DICT[key] if syn.lower() != key)
+
+    return QueryAnalysis(
+        use_rag=use_rag,
+        airlines=tuple(sorted(airlines, key=_AIRLINE_ORDER.get)),
+        synonym_hits=tuple(synonym_hits),
+        # 중복 제거
+        expanded_query=" ".join(dict.fromkeys(expanded_terms)),
+    )
+
+
+@lru_cache(maxsize=512)
+def analyze_query(q: str) -> QueryAnalysis:
+    """analyze() 결과 캐시 (같은 질문을 라우팅/검색/디버그에서 반복 분석하지 않도록)"""
+    return analyze(q)
+
+
+def route_to_rag(q: str) -> bool:
+    """질문이 RAG가 필요한지 판단"""
+    return analyze_query(q).use_rag
@@ -0,0 +1,323 @@
+"""
+요청 단계별 계측 (span) + 지표 내보내기
+
+답변이 느릴 때 시간이 어디서 쓰였는지(라우팅 / 질의 임베딩 / 검색 / 항공사 필터 / 컨텍스트 / LLM / 렌더링)
+요청마다 Trace 에 구간(span)으로 기록하고, 요청이 끝나면
+- 프로세스 공용 지표(카운터 / 히스토그램)에 반영 → Prometheus 텍스트 형식 (/metrics)
+- 구조화 JSON 로그 한 줄 (로거 "ragbot.requests")
+로 내보냅니다. 외부 패키지 없이 표준 라이브러리 http.server 로 로컬 엔드포인트를 띄웁니다.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+logger = logging.getLogger("ragbot.requests")
+
+# 초 단위 히스토그램 구간 (임베딩 수 ms ~ LLM 수십 초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_INF = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    """라벨 값 이스케이프 (역슬래시, 따옴표, 줄바꿈)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Counter:
+    """단조 증가 카운터 (라벨별)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0.0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(v)}" for key, v in items]
+
+
+class Histogram:
+    """누적 구간 히스토그램 (라벨별 buckets / sum / count)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # 라벨 → [구간별 개수, 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            counts, total, n = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def count(self, **labels) -> int:
+        item = self._values.get(tuple(labels.get(n, "") for n in self.labels))
+        return item[2] if item else 0
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, (list(c), s, n)) for k, (c, s, n) in self._values.items())
+        lines = []
+        for key, (counts, total, n) in items:
+            for bound, c in zip(self.buckets, counts):
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {c}")
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, key, _INF)} {n}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    """지표 모음 → Prometheus 텍스트 형식"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REQUESTS_TOTAL = REGISTRY.counter(
+    "ragbot_requests_total", "처리한 요청 수 (경로 / 결과별)", ("path", "outcome"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "ragbot_request_seconds", "요청 전체 소요 시간 (초)", ("path",))
+STAGE_SECONDS = REGISTRY.histogram(
+    "ragbot_stage_seconds", "요청 단계별 소요 시간 (초)", ("stage",))
+
+
+class Span(NamedTuple):
+    name: str
+    start: float         # 요청 시작 기준 (초)
+    duration: float      # 초
+    attrs: dict
+
+
+class Trace:
+    """
+    요청 한 건의 단계 구간 기록
+    path: rag / fare / base / filter 등 요청 경로 (처리 중 set_path 로 바꿀 수 있음)
+    """
+
+    def __init__(self, path: str = "rag", request_id: str = None):
+        self.path = path
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        self.attrs = {}
+        self.spans = []
+        self.outcome = None
+        self.total = None
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def set_path(self, path: str) -> None:
+        self.path = path
+
+    def set(self, **attrs) -> None:
+        """요청 속성 (로그 줄에 함께 기록)"""
+        self.attrs.update(attrs)
+
+    def add(self, name: str, start: float, duration: float, **attrs) -> None:
+        """perf_counter 기준 시작 시각과 길이로 구간 추가"""
+        with self._lock:
+            self.spans.append(Span(name, start - self._t0, duration, attrs))
+
+    def add_remote(self, spans: list, start: float) -> None:
+        """
+        다른 프로세스(API 서버)가 기록한 구간을 이어 붙임
+        spans: to_dict()["spans"] 형식, start: 원격 요청을 보낸 perf_counter 시각
+        (원격 구간은 이 프로세스 지표에 다시 집계하지 않음)
+        """
+        for s in spans:
+            attrs = {k: v for k, v in s.items() if k not in ("name", "start_ms", "ms")}
+            attrs["remote"] = True
+            self.add(s["name"], start + s["start_ms"] / 1000, s["ms"] / 1000, **attrs)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.add(name, start, time.perf_counter() - start, **attrs)
+
+    def wrap_stream(self, name: str, tokens):
+        """토큰 제너레이터를 소비하는 동안을 한 구간으로 기록 (ttft 속성 포함)"""
+        start = time.perf_counter()
+        ttft = None
+        try:
+            for token in tokens:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                yield token
+        finally:
+            total = time.perf_counter() - start
+            self.add(name, start, total, ttft=round(ttft if ttft is not None else total, 4))
+
+    async def awrap_stream(self, name: str, tokens):
+        """wrap_stream 의 비동기 버전 (비동기 토큰 제너레이터)"""
+        start = time.perf_counter()
+        ttft = None
+        try:
+            async for token in tokens:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                yield token
+        finally:
+            total = time.perf_counter() - start
+            self.add(name, start, total, ttft=round(ttft if ttft is not None else total, 4))
+
+    @property
+    def timings(self) -> dict:
+        """단계 → 합계 초"""
+        out = {}
+        for s in self.spans:
+            out[s.name] = out.get(s.name, 0.0) + s.duration
+        return out
+
+    def finish(self, outcome: str = "ok") -> float:
+        """지표 반영 + JSON 로그 (여러 번 불러도 한 번만 기록)"""
+        if self.total is not None:
+            return self.total
+        self.total = time.perf_counter() - self._t0
+        self.outcome = outcome
+        REQUESTS_TOTAL.inc(path=self.path, outcome=outcome)
+        REQUEST_SECONDS.observe(self.total, path=self.path)
+        for s in self.spans:
+            if not s.attrs.get("remote"):
+                STAGE_SECONDS.observe(s.duration, stage=s.name)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(self.to_dict(), ensure_ascii=False))
+        return self.total
+
+    def to_dict(self) -> dict:
+        total = self.total if self.total is not None else time.perf_counter() - self._t0
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "event": "request",
+            "request_id": self.request_id,
+            "path": self.path,
+            "outcome": self.outcome,
+            "total_ms": round(total * 1000, 3),
+            "spans": [
+                {"name": s.name, "start_ms": round(s.start * 1000, 3), "ms": round(s.duration * 1000, 3), **s.attrs}
+                for s in self.spans
+            ],
+            **self.attrs,
+        }
+
+    def waterfall(self, width: int = 40) -> str:
+        """요청 구간 워터폴 (고정폭 텍스트)"""
+        total = self.total if self.total is not None else time.perf_counter() - self._t0
+        if not self.spans or total <= 0:
+            return "(기록된 구간 없음)"
+        name_w = max(len(s.name) for s in self.spans)
+        lines = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            left = int(s.start / total * width)
+            bar = max(1, round(s.duration / total * width))
+            lines.append(f"{s.name:<{name_w}} |{' ' * left}{'█' * min(bar, width - left)}"
+                         f"{' ' * max(0, width - left - bar)}| {s.duration * 1000:8.1f} ms")
+        lines.append(f"{'total':<{name_w}} |{'─' * width}| {total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+def setup_json_log(stream=None) -> None:
+    """요청 로그를 JSON 한 줄씩 출력 (이미 핸들러가 있으면 그대로 사용)"""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(host: str = "127.0.0.1", port: int = 9464, registry: MetricsRegistry = REGISTRY):
+    """
+    /metrics 엔드포인트를 데몬 스레드로 실행
+    Returns: 서버 (포트를 쓸 수 없으면 None - 다른 프로세스가 이미 띄운 경우 등)
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        logging.getLogger(__name__).warning("metrics 서버를 시작하지 못했습니다 (%s:%s): %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,219 @@
+"""
+질문 → 컨텍스트 검색 경로 (LLM 호출 전 단계)
+
+refund_rag() 와 오프라인 벤치마크(benchmarks/run_golden.py)가 같은 경로를 쓰도록
+질문 분석 → 수수료 표 조회 → 질의 임베딩 → 하이브리드 검색 → 임계값 적용 → 컨텍스트 조립을
+한 함수로 묶고, 단계마다 Trace 구간(ragbot.metrics)을 남겨 소요 시간을 함께 돌려줍니다.
+비동기 서버용 aretrieve() 는 같은 단계를 질의 임베딩만 await 로 바꿔 실행합니다.
+
+여러 항공사를 비교하는 질문("대한항공이랑 아시아나 노쇼 위약금 비교")은 한 번 검색하면
+점수가 높은 한 항공사가 상위 k 를 차지해 다른 항공사 근거가 빠지기 쉬우므로,
+항공사마다 따로 검색(동시 실행)하고 항공사별 몫(quota)만큼 근거를 담아 항공사별로 묶은 컨텍스트를 만듭니다.
+
+재순위기(ragbot.rerank)를 넘기면 임계값을 넘은 후보를 다시 점수 매겨 상위 몇 개(항공사별 검색이면 항공사마다)만
+컨텍스트에 담습니다.
+"""
+
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from ragbot.context import ContextPack, pack_context, pack_grouped
+from ragbot.matcher import analyze_query
+from ragbot.metrics import Trace
+from ragbot.retrieval import HybridResult
+
+# 검색 폭을 2배로 늘리는 표 데이터 질문 키워드
+TABLE_QUERY_KEYWORDS = ["수수료", "위약금", "요금", "비용", "환불", "변경", "취소"]
+
+# 단계 이름 (보고서 순서)
+STAGES = ("analyze", "fare_lookup", "embed", "search", "filter", "rerank", "pack")
+
+# 항공사별 검색 동시 실행 (검색기 내부 밀집/희소 병렬 풀과 따로 두어 서로 기다리다 막히지 않게)
+_FAN_OUT = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fan-out")
+
+
+class Retrieval(NamedTuple):
+    query: str
+    airlines: tuple
+    expanded_query: str
+    search_k: int
+    is_table_query: bool
+    fare: object                     # FareMatch (수수료 표가 없으면 None)
+    hybrid: object                   # HybridResult (표에서 바로 답하면 None)
+    candidates: list                 # 임계값 적용 전 검색 결과
+    results: list                    # 컨텍스트에 담긴 (Document, 유사도)
+    packed: Optional[ContextPack]
+    timings: dict                    # 단계 → 초 (trace 전체 기준)
+    quota: int = 0                   # 항공사별 검색 시 항공사당 근거 수 (0 이면 한 번에 검색)
+    reranked: tuple = ()             # 재순위 결과 (chunk_id, 점수) (재순위기가 없으면 빈 튜플)
+
+    @property
+    def fan_out(self) -> bool:
+        return self.quota > 0
+
+    @property
+    def fare_answer(self) -> Optional[str]:
+        return self.fare.answer if self.fare is not None else None
+
+
+def retrieve(q: str, retriever, query_cache, k: int, threshold: float,
+             fare_table=None, budget: int = 4000, model: str = "gpt-4o-mini", trace: Trace = None,
+             embed_fn=None, airline_quota: int = 2, reranker=None) -> Retrieval:
+    """
+    질문 한 건의 검색 경로 실행
+    - 수수료 표에서 금액이 하나로 정해지면 검색 생략 (fare_answer)
+    - 항공사가 지정되면 임계값 20% 완화, BM25 키워드 일치 청크는 임계값과 무관하게 인정
+    - results 가 비어 있으면 근거 없음 (호출 측에서 안내 문구 처리)
+    trace: 요청 Trace (없으면 새로 만들어 이 함수의 구간만 기록)
+    embed_fn: 질의 임베딩 함수 (기본: 벡터 DB 임베딩의 embed_query, 엔진은 마이크로 배처)
+    airline_quota: 항공사가 둘 이상이면 항공사마다 따로 검색해 최소 이 개수만큼 근거를 담음 (0 이면 한 번에 검색)
+    reranker: 임계값을 넘은 후보를 다시 골라 상위 몇 개만 담는 ragbot.rerank.Reranker (None 이면 상위 k)
+    """
+    trace = trace if trace is not None else Trace("retrieve")
+    embed_fn = embed_fn or retriever.db.embeddings.embed_query
+
+    # 1️⃣ 질문 분석 + 2️⃣ 수수료 표 직접 조회
+    plan = _plan(q, k, fare_table, trace, airline_quota)
+    if plan.fare_answer:
+        return plan
+
+    # 3️⃣ 질의 임베딩 (캐시 우선) + 하이브리드 검색 (여러 항공사면 항공사별 동시 검색)
+    with trace.span("embed"):
+        query_vector = query_cache.get_or_embed(plan.expanded_query, embed_fn)
+    if plan.fan_out:
+        with trace.span("search", airlines=len(plan.airlines)):
+            futures = [_FAN_OUT.submit(_search, retriever, plan, query_vector, trace, a) for a in plan.airlines]
+            hybrid = merge_hybrid([f.result() for f in futures])
+    else:
+        hybrid = _search(retriever, plan, query_vector, trace)
+
+    # 4️⃣ 임계값 적용 (+ 재순위) + 5️⃣ 컨텍스트 조립
+    return _select(plan, hybrid, k, threshold, budget, model, trace, reranker)
+
+
+async def aretrieve(q: str, retriever, query_cache, k: int, threshold: float,
+                    fare_table=None, budget: int = 4000, model: str = "gpt-4o-mini", trace: Trace = None,
+                    aembed_fn=None, airline_quota: int = 2, reranker=None) -> Retrieval:
+    """
+    retrieve 의 비동기 버전
+    질의 임베딩(원격 호출)은 await 하고, 벡터/BM25 검색은 스레드에서 실행해 이벤트 루프를 막지 않음
+    aembed_fn: 비동기 질의 임베딩 함수 (기본: 벡터 DB 임베딩의 aembed_query)
+    재순위(교차 인코더는 CPU 연산)가 있으면 선택 / 조립 단계도 스레드에서 실행
+    """
+    trace = trace if trace is not None else Trace("retrieve")
+    aembed_fn = aembed_fn or retriever.db.embeddings.aembed_query
+
+    plan = _plan(q, k, fare_table, trace, airline_quota)
+    if plan.fare_answer:
+        return plan
+
+    with trace.span("embed"):
+        query_vector = await query_cache.aget_or_embed(plan.expanded_query, aembed_fn)
+    if plan.fan_out:
+        with trace.span("search", airlines=len(plan.airlines)):
+            parts = await asyncio.gather(*(
+                asyncio.to_thread(_search, retriever, plan, query_vector, trace, a) for a in plan.airlines
+            ))
+            hybrid = merge_hybrid(parts)
+    else:
+        hybrid = await asyncio.to_thread(_search, retriever, plan, query_vector, trace)
+
+    if reranker is not None:
+        return await asyncio.to_thread(_select, plan, hybrid, k, threshold, budget, model, trace, reranker)
+    return _select(plan, hybrid, k, threshold, budget, model, trace)
+
+
+def _plan(q: str, k: int, fare_table, trace: Trace, airline_quota: int = 0) -> Retrieval:
+    """질문 분석 + 수수료 표 조회 (검색 전 단계, hybrid=None 인 Retrieval)"""
+    with trace.span("analyze"):
+        analysis = analyze_query(q)
+        is_table_query = any(kw in q for kw in TABLE_QUERY_KEYWORDS)
+        search_k = k * 2 if is_table_query else k
+        # 항공사별 검색: 항공사당 근거 max(airline_quota, k / 항공사 수) 개
+        n = len(analysis.airlines)
+        quota = max(airline_quota, math.ceil(k / n)) if airline_quota > 0 and n > 1 else 0
+
+    fare = None
+    if fare_table is not None:
+        with trace.span("fare_lookup"):
+            fare = fare_table.lookup(q)
+    return Retrieval(q, analysis.airlines, analysis.expanded_query, search_k, is_table_query,
+                     fare, None, [], [], None, trace.timings, quota)
+
+
+def _search(retriever, plan: Retrieval, query_vector: list, trace: Trace, airline: str = None):
+    """하이브리드 검색 (airline 을 주면 그 항공사 청크 안에서만, 구간 이름 search_airline)"""
+    if airline is None:
+        with trace.span("search", k=plan.search_k) as attrs:
+            hybrid = retriever.search(plan.expanded_query, query_vector, k=plan.search_k,
+                                      airlines=list(plan.airlines))
+            attrs.update(dense=len(hybrid.dense_rows), sparse=len(hybrid.sparse_rows))
+        return hybrid
+    k = max(plan.search_k, plan.quota * 2)
+    with trace.span("search_airline", airline=airline, k=k) as attrs:
+        hybrid = retriever.search(plan.expanded_query, query_vector, k=k, airlines=[airline])
+        attrs.update(dense=len(hybrid.dense_rows), sparse=len(hybrid.sparse_rows))
+    return hybrid
+
+
+def merge_hybrid(parts: list) -> HybridResult:
+    """항공사별 검색 결과 → 하나의 HybridResult (항공사 순서대로 이어 붙임)"""
+    return HybridResult(
+        [pair for h in parts for pair in h.results],
+        [row for h in parts for row in h.dense_rows],
+        [row for h in parts for row in h.sparse_rows],
+        set().union(*(h.lexical_ids for h in parts)),
+    )
+
+
+def _select(plan: Retrieval, hybrid, k: int, threshold: float, budget: int, model: str,
+            trace: Trace, reranker=None) -> Retrieval:
+    # 임계값 적용 (항공사 지정 시 20% 완화)
+    with trace.span("filter"):
+        th = threshold * 0.8 if plan.airlines else threshold
+        passed = [
+            (d, score) for d, score in hybrid.results
+            if score >= th or d.metadata.get("chunk_id") in hybrid.lexical_ids
+        ]
+        if plan.fan_out:
+            # 항공사마다 자기 검색 순위대로 quota 개씩 (점수 높은 항공사가 다른 항공사 몫을 차지하지 않게)
+            # 재순위기가 있으면 항공사별 후보를 모두 넘기고 재순위에서 고름
+            groups = {a: [] for a in plan.airlines}
+            for d, score in passed:
+                group = groups.get(d.metadata.get("airline"))
+                if group is not None and (reranker is not None or len(group) < plan.quota):
+                    group.append((d, score))
+            results = [pair for group in groups.values() for pair in group]
+        else:
+            results = passed if reranker is not None else passed[:k]
+
+    # 재순위: 상위 top_n 개 (항공사별 검색이면 항공사마다 min(quota, top_n) 개)
+    reranked = ()
+    if reranker is not None and results:
+        with trace.span("rerank", candidates=len(results)) as attrs:
+            if plan.fan_out:
+                top_n = min(plan.quota, reranker.top_n)
+                ranked = {a: reranker.rerank(plan.query, g, top_n) for a, g in groups.items()}
+                groups = {a: [(d, score) for d, score, _ in r] for a, r in ranked.items()}
+                ranked = [x for r in ranked.values() for x in r]
+            else:
+                ranked = reranker.rerank(plan.query, results, min(k, reranker.top_n))
+            results = [(d, score) for d, score, _ in ranked]
+            reranked = tuple((d.metadata.get("chunk_id"), round(s, 4)) for d, _, s in ranked)
+            attrs.update(kept=len(results))
+
+    # 컨텍스트 조립 (겹치는 청크 병합 + 토큰 예산, 항공사별 검색이면 항공사별로 묶음)
+    packed = None
+    if results:
+        with trace.span("pack") as attrs:
+            if plan.fan_out:
+                packed = pack_grouped([(a, g) for a, g in groups.items() if g], budget, model)
+            else:
+                packed = pack_context(results, budget, model)
+            attrs.update(tokens=packed.tokens)
+            results = [pair for span in packed.spans for pair in span.docs]
+
+    return plan._replace(hybrid=hybrid, candidates=hybrid.results, results=results, packed=packed,
+                         timings=trace.timings, reranked=reranked)
@@ -0,0 +1,123 @@
+"""
+질의 임베딩 캐시 (LRU + TTL)
+
+예시 질문 버튼, 필터 검색 조합처럼 같은 검색 쿼리가 반복되면
+원격 임베딩 호출 없이 바로 벡터 검색으로 넘어갑니다.
+- 1차: 프로세스 내 LRU (최대 개수 + 만료 시간)
+- 2차(선택): 여러 프로세스가 공유하는 디스크 저장소 (EmbeddingStore)
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from ragbot.embedding_cache import EmbeddingStore, text_hash
+
+
+def normalize_query(q: str) -> str:
+    """캐시 키용 쿼리 정규화 (유니코드 NFKC + 공백 정리)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", q)).strip()
+
+
+class QueryEmbeddingCache:
+    """정규화된 검색 쿼리 → 임베딩 벡터"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0, disk_store: EmbeddingStore = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_store = disk_store
+        self._data = OrderedDict()  # key → (만료 시각, 벡터)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        """캐시된 벡터 (없거나 만료되면 None)"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, vec = item
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return vec
+                del self._data[key]
+
+        if self.disk_store is not None:
+            vec = self.disk_store.get_many([text_hash(key)]).get(text_hash(key))
+            if vec is not None:
+                self._put_memory(key, vec.tolist())
+                with self._lock:
+                    self.disk_hits += 1
+                return vec.tolist()
+
+        return None
+
+    def _put_memory(self, key: str, vec: list) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, vec)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_embed(self, query: str, embed_fn) -> list:
+        """
+        캐시 조회 후 미스일 때만 embed_fn(정규화 쿼리) 호출
+        """
+        key = normalize_query(query)
+        vec = self.get(key)
+        if vec is not None:
+            return vec
+
+        with self._lock:
+            self.misses += 1
+        vec = embed_fn(key)
+        self._put(key, vec)
+        return vec
+
+    async def aget_or_embed(self, query: str, aembed_fn) -> list:
+        """
+        get_or_embed 의 비동기 버전 (미스일 때 await aembed_fn(정규화 쿼리))
+        """
+        key = normalize_query(query)
+        vec = self.get(key)
+        if vec is not None:
+            return vec
+
+        with self._lock:
+            self.misses += 1
+        vec = await aembed_fn(key)
+        self._put(key, vec)
+        return vec
+
+    def _put(self, key: str, vec: list) -> None:
+        self._put_memory(key, vec)
+        if self.disk_store is not None:
+            self.disk_store.put_many({text_hash(key): np.asarray(vec, dtype=np.float32)})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def stats(self) -> dict:
+        """캐시 크기 산정용 카운터"""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+            }
@@ -0,0 +1,267 @@
+"""
+검색 후보 재순위 (검색 → 재순위 → 컨텍스트 조립, RERANKER 로 선택)
+
+하이브리드 검색은 표 질문이면 k 의 2배를 가져오고 임계값(항공사 지정 시 ×0.8)만 넘으면 k 개까지
+컨텍스트에 담으므로, 2000자 안팎의 청크 여러 개가 LLM 에 그대로 들어갑니다.
+재순위는 임계값을 넘은 후보를 질문과 청크를 함께 보는 점수로 다시 매겨 상위 1~3 개만 남겨
+프롬프트 크기(= LLM 지연)를 줄입니다.
+- none    : 재순위 없음 (기본, 이전 방식)
+- lexical : 질문 용어가 청크 제목 / 본문에 얼마나 있는지 + 항공사 / 표 일치 + 검색 관련도 (추가 의존성 없음)
+- cross-encoder : 로컬 ONNX 교차 인코더 (RERANKER_MODEL_PATH 폴더의 model.onnx + tokenizer.json, CPU)
+
+점수는 (정규화된 질의, chunk_id) 로 캐시합니다. chunk_id 는 청크 본문 해시라 재색인으로 세대가 바뀌어도
+본문이 같은 청크의 점수는 그대로 재사용됩니다.
+"""
+
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from ragbot.config import (
+    RERANK_CACHE_SIZE, RERANK_MIN_RATIO, RERANK_TOP_N, RERANKER, RERANKER_MODEL_PATH, RERANKER_THREADS,
+)
+from ragbot.embeddings import find_onnx
+from ragbot.keywords import AIRLINE_KEYWORDS, SYNONYM_DICT
+from ragbot.matcher import analyze_query
+from ragbot.pipeline import TABLE_QUERY_KEYWORDS
+from ragbot.query_cache import normalize_query
+
+RERANKERS = ("none", "lexical", "cross-encoder")
+
+# 어절 (ragbot.sparse 토큰화와 같은 규칙: 운임 코드 "B,M", "No-Show" 는 한 어절)
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+(?:[,~\-][0-9A-Za-z가-힣]+)*")
+
+# 규정 종류를 가르는 동의어 사전 키 (청크 제목이 주로 이 말로 나뉨) / 거의 모든 청크에 있는 말
+INTENT_KEYS = {"노쇼", "no-show", "미탑승", "게이트", "출구장", "환불", "refund", "변경", "change", "취소", "cancel",
+               "탑승수속", "체크인"}
+GENERIC_KEYS = {"수수료", "fee", "위약금"}
+
+
+def make_reranker(kind: str = RERANKER, path: str = RERANKER_MODEL_PATH, top_n: int = RERANK_TOP_N,
+                  min_ratio: float = RERANK_MIN_RATIO, cache_size: int = RERANK_CACHE_SIZE):
+    """설정된 재순위기 (none 이면 None, 교차 인코더 라이브러리는 고른 경우만 import)"""
+    if kind == "none":
+        return None
+    if kind == "lexical":
+        return LexicalReranker(top_n, min_ratio, cache_size)
+    if kind == "cross-encoder":
+        if not path or find_onnx(path) is None:
+            raise ValueError(f"RERANKER_MODEL_PATH 에 ONNX 교차 인코더 폴더를 지정해주세요: {path!r}")
+        return CrossEncoderReranker(path, top_n, min_ratio, cache_size, threads=RERANKER_THREADS)
+    raise ValueError(f"알 수 없는 재순위기: {kind} (가능: {', '.join(RERANKERS)})")
+
+
+def chunk_headings(doc) -> str:
+    """청크의 제목 문자열 (제목 경로 + 본문 안 제목 줄)"""
+    lines = [doc.metadata.get("heading_path", "")]
+    lines += [line for line in doc.page_content.splitlines() if line.startswith("#")]
+    return "\n".join(lines)
+
+
+def has_table(text: str) -> bool:
+    """마크다운 표 구분선(|---|) 이 있는 청크"""
+    return "|---" in text or "| ---" in text or "|:--" in text
+
+
+class Reranker:
+    """
+    재순위 공통 부분
+    - rerank(): 후보 [(Document, 관련도)] → 재순위 점수 상위 top_n 개 (1위 점수의 min_ratio 미만은 버림)
+    - (질의, chunk_id) 점수 LRU 캐시 (미스만 _score_batch 로 계산, 하위 클래스 구현)
+    """
+
+    name = "none"
+
+    def __init__(self, top_n: int = 3, min_ratio: float = 0.0, cache_size: int = 4096):
+        self.top_n = top_n
+        self.min_ratio = min_ratio
+        self.cache_size = cache_size
+        self._cache = OrderedDict()     # (질의, chunk_id) → 점수
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _score_batch(self, query: str, pairs: list) -> list:
+        raise NotImplementedError
+
+    def score(self, query: str, pairs: list) -> list:
+        """후보 [(Document, 관련도)] → 재순위 점수 목록 (입력 순서)"""
+        key = normalize_query(query)
+        keys = [(key, d.metadata.get("chunk_id")) for d, _ in pairs]
+        scores = [None] * len(pairs)
+        with self._lock:
+            for i, ck in enumerate(keys):
+                if ck[1] is not None and ck in self._cache:
+                    self._cache.move_to_end(ck)
+                    scores[i] = self._cache[ck]
+            missing = [i for i, s in enumerate(scores) if s is None]
+            self.hits += len(pairs) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            fresh = self._score_batch(query, [pairs[i] for i in missing])
+            with self._lock:
+                for i, s in zip(missing, fresh):
+                    scores[i] = float(s)
+                    if keys[i][1] is not None:
+                        self._cache[keys[i]] = scores[i]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def rerank(self, query: str, pairs: list, top_n: int = None) -> list:
+        """
+        후보 → [(Document, 관련도, 재순위 점수)] 재순위 점수 내림차순 상위 top_n
+        (관련도는 검색 점수 그대로 두어 화면의 유사도 표시는 바뀌지 않음)
+        """
+        if not pairs:
+            return []
+        top_n = self.top_n if top_n is None else top_n
+        scores = self.score(query, pairs)
+        ranked = sorted(zip(pairs, scores), key=lambda x: -x[1])[:max(1, top_n)]
+        floor = ranked[0][1] * self.min_ratio if ranked[0][1] > 0 else -math.inf
+        return [(d, rel, s) for (d, rel), s in ranked if s >= floor]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "reranker": self.name,
+            "top_n": self.top_n,
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class LexicalReranker(Reranker):
+    """
+    어휘 특징 점수 (0~1, 학습 없이 고정 가중치)
+    - 제목 일치: 질문 어절(동의어 포함) 중 청크 제목에 있는 비율 - 어느 절(어느 표)인지
+      규정 종류(노쇼 / 환불 / 변경 / 취소 ...) 어절은 2배 가중, 수수료 / 위약금처럼 어디에나 있는 말은 절반
+    - 본문 일치: 같은 어절이 본문에 있는 비율
+    - 항공사 일치 / 표 질문이면 표가 있는 청크
+    - 검색 관련도 (동점 정리용 약한 가중치)
+    """
+
+    name = "lexical"
+    WEIGHTS = {"heading": 0.5, "body": 0.2, "airline": 0.15, "table": 0.05, "relevance": 0.10}
+
+    def _score_batch(self, query: str, pairs: list) -> list:
+        concepts = query_concepts(query)
+        airlines = analyze_query(query).airlines
+        is_table_query = any(kw in query for kw in TABLE_QUERY_KEYWORDS)
+        w = self.WEIGHTS
+
+        scores = []
+        for d, relevance in pairs:
+            features = {
+                "heading": concept_match(concepts, chunk_headings(d)),
+                "body": concept_match(concepts, d.page_content),
+                "airline": float(not airlines or d.metadata.get("airline") in airlines),
+                "table": float(is_table_query and has_table(d.page_content)),
+                "relevance": min(max(float(relevance), 0.0), 1.0),
+            }
+            scores.append(sum(w[name] * value for name, value in features.items()))
+        return scores
+
+
+def query_concepts(query: str) -> list:
+    """질문 → [(가중치, 어절 + 동의어 목록)] (항공사 이름 어절은 제외)"""
+    analysis = analyze_query(query)
+    synonyms = {}
+    for word, key in analysis.synonym_hits:
+        synonyms.setdefault(word.lower(), []).append(key)
+    airline_words = {kw for kws in AIRLINE_KEYWORDS.values() for kw in kws}
+
+    concepts = []
+    for word in dict.fromkeys(_WORD.findall(query.lower())):
+        keys = synonyms.get(word, [])
+        if word in airline_words or any(word.startswith(kw) and len(kw) > 1 for kw in AIRLINE_KEYWORDS):
+            continue
+        terms = [word] + [syn.lower() for key in keys for syn in SYNONYM_DICT[key]]
+        if any(key in INTENT_KEYS for key in keys):
+            weight = 2.0
+        elif keys and all(key in GENERIC_KEYS for key in keys):
+            weight = 0.5
+        else:
+            weight = 1.0
+        concepts.append((weight, list(dict.fromkeys(terms))))
+    return concepts
+
+
+def concept_match(concepts: list, text: str) -> float:
+    """질문 어절 가중 일치 비율 (어절마다 동의어 중 가장 잘 맞는 것, 조사가 붙은 어절은 문자 2-gram 비율)"""
+    if not concepts:
+        return 0.0
+    lower, grams = _text_index(text)
+    total = matched = 0.0
+    for weight, terms in concepts:
+        best = 0.0
+        for term in terms:
+            if term in lower:
+                best = 1.0
+                break
+            term_grams = _bigrams(term)
+            if len(term_grams) > 1:
+                best = max(best, len(term_grams & grams) / len(term_grams))
+        total += weight
+        matched += weight * best
+    return matched / total
+
+
+@lru_cache(maxsize=4096)
+def _text_index(text: str) -> tuple:
+    """청크 텍스트 → (소문자, 문자 2-gram 집합) (같은 청크를 질문마다 다시 훑지 않게)"""
+    lower = text.lower()
+    return lower, _bigrams(lower)
+
+
+def _bigrams(text: str) -> set:
+    return {w[i:i + 2] for w in _WORD.findall(text) for i in range(len(w) - 1)}
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    ONNX 교차 인코더 (onnxruntime CPU + tokenizers, 예: bge-reranker / ms-marco MiniLM 을 ONNX 로 내보낸 폴더)
+    (질의, 청크 본문) 쌍을 한 배치로 인코딩하고 로짓을 시그모이드로 0~1 점수로 바꿈
+    """
+
+    name = "cross-encoder"
+
+    def __init__(self, path, top_n: int = 3, min_ratio: float = 0.0, cache_size: int = 4096,
+                 max_length: int = 512, threads: int = 0):
+        super().__init__(top_n, min_ratio, cache_size)
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = Path(path)
+        self.tokenizer = Tokenizer.from_file(str(path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        if self.tokenizer.padding is None:
+            pad_token = next((t for t in ("[PAD]", "<pad>") if self.tokenizer.token_to_id(t) is not None), None)
+            pad_id = self.tokenizer.token_to_id(pad_token) if pad_token else 0
+            self.tokenizer.enable_padding(pad_id=pad_id, pad_token=pad_token or "[PAD]")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(find_onnx(path)), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _score_batch(self, query: str, pairs: list) -> list:
+        encoded = self.tokenizer.encode_batch([(query, d.page_content) for d, _ in pairs])
+        ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        feeds = {
+            "input_ids": ids,
+            "attention_mask": np.array([e.attention_mask for e in encoded], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encoded], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        # (n, 1) 관련도 로짓 또는 (n, 2) [무관, 관련] 로짓
+        logits = logits[:, -1] if logits.ndim == 2 else logits
+        return (1.0 / (1.0 + np.exp(-logits.astype(np.float32)))).tolist()
@@ -0,0 +1,136 @@
+"""
+벡터 검색 / 하이브리드(BM25 + 벡터) 검색
+
+벡터 검색 백엔드 (VECTOR_INDEX)
+- numpy: ragbot.vector_index.VectorIndex (정규화 행렬 전수 검색, float32 / float16 / int8 저장)
+- chroma: 인메모리 Chroma 컬렉션 (이전 방식)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from ragbot.config import LEXICAL_MIN_RATIO
+from ragbot.vector_index import VectorIndex
+
+# 밀집/희소 검색을 동시에 돌리기 위한 공용 스레드 풀
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """
+    여러 순위 목록을 RRF 로 합침
+    rankings: [[키, ...], ...] (각 목록은 1등부터)
+    Returns: [(키, RRF 점수)] 점수 내림차순
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class HybridResult(NamedTuple):
+    results: list        # [(Document, 벡터 유사도)] RRF 순서
+    dense_rows: list     # 벡터 검색 순위 (행 번호)
+    sparse_rows: list    # BM25 검색 순위 (행 번호)
+    lexical_ids: set     # BM25 점수가 높아 벡터 유사도 임계값과 무관하게 근거로 인정할 청크 ID (LEXICAL_MIN_RATIO)
+
+
+class HybridRetriever:
+    """
+    인덱스 아티팩트 한 세대 위의 하이브리드 검색기
+    - 벡터: VectorIndex 또는 Chroma (질의 벡터로 검색)
+    - 희소: 같은 청크로 만든 로컬 BM25 역색인 (아티팩트에 저장된 것을 로드)
+    - 청크 / 벡터 / 역색인은 아티팩트 파일을 매핑한 배열을 그대로 참조 (워커마다 복사하지 않음)
+    두 검색을 병렬로 실행하고 RRF 로 합칩니다.
+    항공사가 지정되면 두 검색 모두 해당 항공사 청크만 점수를 매깁니다.
+    """
+
+    def __init__(self, db, index):
+        self.db = db
+        self.chunks = index.chunks
+        self.sparse = index.to_sparse()
+        self.vector_index = db if isinstance(db, VectorIndex) else None
+        self.lexical_min_ratio = LEXICAL_MIN_RATIO
+        if self.vector_index is None:
+            self.vectors = index.vectors
+            self._relevance_fn = db._select_relevance_score_fn()
+            self._space = (db._collection.metadata or {}).get("hnsw:space", "l2")
+
+        # 항공사별 파티션 (BM25 / 벡터 검색 마스크)
+        self.airline_masks = {a: self.chunks.mask("airline", [a]) for a in self.chunks.values("airline")}
+
+    @classmethod
+    def from_index(cls, index, embedding, backend: str = "numpy", dtype: str = "float32") -> "HybridRetriever":
+        """인덱스 아티팩트 → 검색기 (backend: numpy | chroma, dtype: numpy 행렬 저장 형식)"""
+        if backend == "numpy":
+            return cls(index.to_vector_index(embedding, dtype), index)
+        if backend == "chroma":
+            return cls(index.to_chroma(embedding), index)
+        raise ValueError(f"알 수 없는 벡터 인덱스: {backend} (가능: numpy, chroma)")
+
+    def dense_relevance(self, query_vector, rows: list) -> list:
+        """Chroma 와 같은 방식으로 행들의 벡터 유사도 계산"""
+        if self.vector_index is not None:
+            return self.vector_index.relevance_of(query_vector, rows)
+        q = np.asarray(query_vector, dtype=np.float32)
+        v = np.asarray(self.vectors[rows], dtype=np.float32)
+        if self._space == "l2":
+            dist = ((v - q) ** 2).sum(axis=1)
+        elif self._space == "cosine":
+            dist = 1.0 - (v @ q) / (np.linalg.norm(v, axis=1) * np.linalg.norm(q) + 1e-12)
+        else:
+            dist = 1.0 - v @ q
+        return [self._relevance_fn(float(x)) for x in dist]
+
+    def airline_filter(self, airlines):
+        """Chroma where 조건 (항공사 미지정이면 None)"""
+        if not airlines:
+            return None
+        if len(airlines) == 1:
+            return {"airline": airlines[0]}
+        return {"airline": {"$in": list(airlines)}}
+
+    def airline_mask(self, airlines):
+        """BM25 검색 대상 마스크 (항공사 미지정이면 None)"""
+        if not airlines:
+            return None
+        mask = np.zeros(len(self.chunks), dtype=bool)
+        for a in airlines:
+            if a in self.airline_masks:
+                mask |= self.airline_masks[a]
+        return mask
+
+    def _dense(self, query_vector, k: int, airlines=None) -> list:
+        if self.vector_index is not None:
+            return [row for row, _ in self.vector_index.search(query_vector, k, self.airline_mask(airlines))]
+        results = self.db.similarity_search_by_vector_with_relevance_scores(
+            query_vector, k=k, filter=self.airline_filter(airlines)
+        )
+        return [self.chunks.row(d.metadata["chunk_id"]) for d, _ in results]
+
+    def _sparse(self, query: str, k: int, airlines=None) -> list:
+        return self.sparse.search(query, k, mask=self.airline_mask(airlines))
+
+    def search(self, search_query: str, query_vector, k: int, airlines=None) -> HybridResult:
+        """
+        벡터 검색과 BM25 검색을 병렬 실행 후 RRF 로 합친 상위 k 개
+        airlines: 지정 시 해당 항공사 청크 안에서만 검색 (인덱스 질의 단계에서 필터)
+        """
+        dense_future = _EXECUTOR.submit(self._dense, query_vector, k, airlines)
+        sparse_hits = self._sparse(search_query, k, airlines)
+        dense_rows = dense_future.result()
+        sparse_rows = [row for row, _ in sparse_hits]
+
+        fused = [row for row, _ in reciprocal_rank_fusion([dense_rows, sparse_rows])[:k]]
+        scores = self.dense_relevance(query_vector, fused) if fused else []
+        results = [(self.chunks[row], score) for row, score in zip(fused, scores)]
+        lexical_ids = {
+            self.chunks.chunk_id(row) for row, score in sparse_hits
+            if score >= self.lexical_min_ratio * sparse_hits[0][1]
+        } if self.lexical_min_ratio > 0 else set()
+        return HybridResult(results, dense_rows, sparse_rows, lexical_ids)
@@ -0,0 +1,186 @@
+"""
+대화 세션 상태 (화면 세션마다 하나, 크기 제한 + 유휴 세션 정리)
+
+세션에는 메시지 본문과 근거 청크의 (chunk_id, 유사도)만 저장하고,
+청크 본문/메타데이터는 인덱스가 들고 있는 공유 청크 저장소(ChunkStore)에서 필요할 때 꺼냅니다.
+동시 세션이 수백 개여도 규정 문서 본문은 호스트에 한 벌(매핑된 인덱스 파일의 페이지 캐시)만 있습니다.
+- 메시지: 최근 max_messages 개만 보관 (오래된 것부터 삭제)
+- 대화 이력(LLM 입력): "메모리 초기화" 이후 메시지 중 최근 history_size 개
+- SessionRegistry: idle_ttl 초 동안 요청이 없던 세션 삭제 + 세션당 메모리 보고
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+
+class SourceRef(NamedTuple):
+    """근거 참조 (본문 없이 청크 ID + 유사도, 수수료 표 답변은 표 행 요약 source)"""
+    chunk_id: str
+    score: float
+    source: dict = None
+
+
+class Message(NamedTuple):
+    seq: int                # 세션 안 메시지 번호 (화면 위젯 key 용)
+    role: str
+    content: str
+    refs: tuple = ()
+
+
+def refs_from_sources(sources: list) -> tuple:
+    """엔진 결과 sources → 세션 저장용 참조 (청크는 ID 만, 수수료 표 행은 요약 dict 그대로)"""
+    return tuple(
+        SourceRef(sys.intern(src["chunk_id"]), src["score"]) if src.get("chunk_id")
+        else SourceRef(None, src["score"], src)
+        for src in sources
+    )
+
+
+class ChunkStore:
+    """
+    chunk_id → 청크 (LangChain Document) 공유 저장소
+    인덱스 아티팩트의 청크 테이블(ragbot.index_store.ChunkTable)을 그대로 참조하므로 본문을 복사하지 않고,
+    본문은 워커들이 읽기 전용으로 매핑한 파일에서 꺼낼 때만 디코딩합니다.
+    previous: 직전 세대 청크 테이블 (재색인 직후에도 교체 전 답변의 근거를 보여주기 위해 한 세대만 유지)
+    """
+
+    def __init__(self, table, previous=None):
+        self._table = table
+        self._previous = previous
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, chunk_id):
+        return self.get(chunk_id) is not None
+
+    def get(self, chunk_id: str):
+        for table in (self._table, self._previous):
+            row = table.row(chunk_id) if table is not None else None
+            if row is not None:
+                return table[row]
+        return None
+
+    def source(self, chunk_id: str, score: float = None) -> dict:
+        """근거 표시용 dict (본문 포함, 없는 청크면 None)"""
+        d = self.get(chunk_id)
+        if d is None:
+            return None
+        return {
+            "chunk_id": chunk_id,
+            "airline": d.metadata.get("airline", "알 수 없음"),
+            "filename": d.metadata.get("filename", "알 수 없음"),
+            "section": d.metadata.get("heading_path", ""),
+            "score": score,
+            "content": d.page_content,
+        }
+
+
+class ChatSession:
+    """세션 하나의 메시지 (최근 max_messages 개) + 대화 이력 시작 위치"""
+
+    def __init__(self, max_messages: int = 100, history_size: int = 20):
+        self.messages = deque(maxlen=max_messages)
+        self.history_size = history_size
+        self.memory_start = 0       # 이 번호 이후 메시지만 대화 이력에 포함
+        self.last_seen = time.monotonic()
+        self._seq = 0
+
+    def add(self, role: str, content: str, refs=()) -> Message:
+        m = Message(self._seq, role, content, tuple(refs))
+        self._seq += 1
+        self.messages.append(m)
+        return m
+
+    @property
+    def next_seq(self) -> int:
+        """다음에 추가할 메시지 번호"""
+        return self._seq
+
+    def history(self) -> list:
+        """LLM 대화 이력 [(역할, 내용)] (메모리 초기화 이후 최근 history_size 개)"""
+        turns = [(m.role, m.content) for m in self.messages if m.seq >= self.memory_start]
+        return turns[-self.history_size:]
+
+    def reset_memory(self) -> None:
+        """대화 이력만 비움 (화면의 메시지는 유지)"""
+        self.memory_start = self._seq
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.memory_start = self._seq
+
+    def nbytes(self) -> int:
+        """
+        세션이 따로 들고 있는 메모리 (바이트, 근사)
+        세션끼리 intern 으로 공유하는 chunk_id 문자열은 세지 않음
+        """
+        total = sys.getsizeof(self) + sys.getsizeof(self.messages)
+        for m in self.messages:
+            total += sys.getsizeof(m) + sys.getsizeof(m.content) + sys.getsizeof(m.refs)
+            for ref in m.refs:
+                total += sys.getsizeof(ref) + sys.getsizeof(ref.score)
+                if ref.source is not None:
+                    total += sys.getsizeof(ref.source) + sum(sys.getsizeof(v) for v in ref.source.values())
+        return total
+
+
+class SessionRegistry:
+    """
+    세션 ID → ChatSession (프로세스 공유)
+    get() 할 때마다 마지막 사용 시각을 갱신하고, sweep_interval 초에 한 번 유휴 세션 정리
+    """
+
+    def __init__(self, max_messages: int = 100, idle_ttl: float = 1800.0, history_size: int = 20,
+                 sweep_interval: float = 60.0):
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self.history_size = history_size
+        self.sweep_interval = sweep_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+
+    def get(self, session_id: str) -> ChatSession:
+        """세션 (없거나 정리되었으면 새로 만듦)"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ChatSession(self.max_messages, self.history_size)
+            session.last_seen = now
+            return session
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._sessions
+
+    def _evict_idle(self, now: float) -> int:
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.idle_ttl]
+        for sid in expired:
+            del self._sessions[sid]
+        self.evicted += len(expired)
+        self._last_sweep = now
+        return len(expired)
+
+    def memory_report(self) -> dict:
+        """세션 수 / 세션당 메모리 (바이트)"""
+        with self._lock:
+            sizes = [s.nbytes() for s in self._sessions.values()]
+            messages = sum(len(s.messages) for s in self._sessions.values())
+        return {
+            "sessions": len(sizes),
+            "messages": messages,
+            "total_bytes": sum(sizes),
+            "bytes_per_session": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max_bytes": max(sizes, default=0),
+            "evicted": self.evicted,
+            "max_messages": self.max_messages,
+            "idle_ttl": self.idle_ttl,
+        }
@@ -0,0 +1,129 @@
+"""
+로컬 BM25 희소 인덱스 (한국어용 문자 n-gram 토큰화)
+
+한국어는 조사가 붙어 어절 단위 매칭이 잘 안 되므로 어절을 문자 2/3-gram 으로 쪼개고,
+운임 코드("B,M", "L,U,Q,T"), "Gate No-Show", 기간 구간("91일", "14~4일") 같은
+정확한 토큰은 어절 자체도 함께 색인합니다.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+(?:[,~\-][0-9A-Za-z가-힣]+)*")
+
+
+def tokenize(text: str, ngram_sizes=(2, 3)) -> list:
+    """어절 + 어절별 문자 n-gram"""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        tokens.append(word)
+        if len(word) <= min(ngram_sizes):
+            continue
+        for n in ngram_sizes:
+            if len(word) > n:
+                tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    청크 순서(행 번호) 기준 BM25 역색인
+    - 색인 시점에 항목별 BM25 가중치를 미리 계산해 두고, 검색은 가중치 합산만 수행
+    - 역색인은 배열 4개 (정렬된 용어 / 용어별 시작 위치 / 행 번호 / 가중치) 라
+      save() 로 저장한 뒤 load() 로 토큰화 없이 메모리 매핑해 여러 프로세스가 공유할 수 있음
+    """
+
+    FILES = ("terms", "offsets", "rows", "weights")
+
+    def __init__(self, texts: list, k1: float = 1.2, b: float = 0.75, ngram_sizes=(2, 3)):
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.n_docs = len(texts)
+
+        doc_tfs = [Counter(tokenize(t, ngram_sizes)) for t in texts]
+        doc_len = np.array([sum(tf.values()) for tf in doc_tfs], dtype=np.float32)
+        avgdl = float(doc_len.mean()) if self.n_docs else 0.0
+
+        postings = defaultdict(lambda: ([], []))
+        for row, tf in enumerate(doc_tfs):
+            for term, freq in tf.items():
+                rows, freqs = postings[term]
+                rows.append(row)
+                freqs.append(freq)
+
+        terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        all_rows, all_weights = [], []
+        for i, term in enumerate(terms):
+            rows, freqs = postings[term]
+            rows = np.array(rows, dtype=np.int32)
+            freqs = np.array(freqs, dtype=np.float32)
+            df = len(rows)
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * doc_len[rows] / (avgdl or 1.0))
+            all_rows.append(rows)
+            all_weights.append((idf * freqs * (k1 + 1) / (freqs + norm)).astype(np.float32))
+            offsets[i + 1] = offsets[i] + df
+
+        self.terms = np.array([t.encode("utf-8") for t in terms], dtype=bytes) if terms else np.array([], dtype="S1")
+        self.offsets = offsets
+        self.rows = np.concatenate(all_rows) if all_rows else np.zeros(0, dtype=np.int32)
+        self.weights = np.concatenate(all_weights) if all_weights else np.zeros(0, dtype=np.float32)
+
+    def save(self, path) -> None:
+        """역색인 배열을 path/bm25.<이름>.npy 로 저장"""
+        for name in self.FILES:
+            np.save(Path(path) / f"bm25.{name}.npy", getattr(self, name))
+
+    @classmethod
+    def load(cls, path, n_docs: int, ngram_sizes=(2, 3), mmap: bool = True) -> "BM25Index":
+        """save() 로 저장한 역색인 (mmap 이면 읽기 전용 메모리 매핑, 토큰화 / 가중치 계산 없음)"""
+        index = cls.__new__(cls)
+        index.ngram_sizes = tuple(ngram_sizes)
+        index.n_docs = n_docs
+        for name in cls.FILES:
+            setattr(index, name, np.asarray(np.load(Path(path) / f"bm25.{name}.npy", mmap_mode="r" if mmap else None)))
+        return index
+
+    def postings(self, terms: list) -> list:
+        """용어 목록 → 색인에 있는 용어마다 (용어 위치, 행 번호 배열, 가중치 배열)"""
+        if not terms or not len(self.terms):
+            return []
+        # 색인과 같은 고정폭 dtype 으로 맞춰야 searchsorted 가 용어 배열 전체를 변환하지 않음 (더 긴 용어는 색인에 없음)
+        width = self.terms.dtype.itemsize
+        encoded = [t.encode("utf-8") for t in terms]
+        keys = np.array([k if len(k) <= width else b"" for k in encoded], dtype=self.terms.dtype)
+        idx = np.minimum(np.searchsorted(self.terms, keys), len(self.terms) - 1)
+        out = []
+        for i, (pos, found) in enumerate(zip(idx.tolist(), (self.terms[idx] == keys).tolist())):
+            if found and keys[i]:
+                start, end = self.offsets[pos], self.offsets[pos + 1]
+                out.append((i, self.rows[start:end], self.weights[start:end]))
+        return out
+
+    def scores(self, query: str) -> np.ndarray:
+        """모든 청크의 BM25 점수"""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        qtf = Counter(tokenize(query, self.ngram_sizes))
+        terms = list(qtf)
+        for i, rows, weights in self.postings(terms):
+            scores[rows] += qtf[terms[i]] * weights
+        return scores
+
+    def search(self, query: str, k: int, mask=None) -> list:
+        """
+        상위 k 개 (행 번호, 점수) - 점수 0 인 청크는 제외
+        mask: 검색 대상 청크만 True 인 bool 배열 (선택)
+        """
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(r), float(scores[r])) for r in top]
@@ -0,0 +1,54 @@
+"""
+LLM 토큰 스트리밍 보조 도구
+"""
+
+import time
+
+
+def stream_with_callback(chain, inputs: dict, on_done, config=None):
+    """
+    chain.stream() 토큰을 그대로 넘겨주고, 끝나면 전체 텍스트로 on_done 호출
+    (예: 답변 캐시에 저장)
+    config: 체인 실행 설정 (콜백/메타데이터)
+    """
+    parts = []
+    for token in chain.stream(inputs, config=config):
+        parts.append(token)
+        yield token
+    on_done("".join(parts))
+
+
+async def astream_with_callback(chain, inputs: dict, on_done, config=None):
+    """stream_with_callback 의 비동기 버전 (chain.astream)"""
+    parts = []
+    async for token in chain.astream(inputs, config=config):
+        parts.append(token)
+        yield token
+    on_done("".join(parts))
+
+
+class StreamTimer:
+    """
+    스트리밍 응답 시간 측정
+    - ttft: 첫 토큰까지 걸린 시간 (초)
+    - total: 마지막 토큰까지 걸린 시간 (초)
+    """
+
+    def __init__(self):
+        self.ttft = None
+        self.total = None
+
+    def wrap(self, tokens):
+        start = time.perf_counter()
+        for token in tokens:
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - start
+            yield token
+        self.total = time.perf_counter() - start
+        if self.ttft is None:
+            self.ttft = self.total
+
+    def summary(self) -> str:
+        if self.total is None:
+            return "⏱️ 측정 중"
+        return f"⏱️ 첫 토큰 {self.ttft:.2f}초 / 전체 생성 {self.total:.2f}초"
@@ -0,0 +1,49 @@
+"""
+로컬 토큰 계산
+
+tiktoken 인코딩(BPE 파일)을 쓸 수 있으면 모델 인코딩으로 정확히 세고,
+오프라인이라 인코딩을 받을 수 없으면 문자 종류별 근사치로 셉니다.
+(청크/컨텍스트 크기 비교용이므로 근사치도 같은 기준으로만 비교하면 충분)
+"""
+
+import re
+from functools import lru_cache
+
+# 근사치: 한글 음절 1자 ≈ 1토큰, 영문/숫자는 약 4자당 1토큰, 기호/구두점 1개 ≈ 1토큰
+_PIECES = re.compile(r"[가-힣]|[A-Za-z]+|\d+|[^\sA-Za-z\d가-힣]")
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str = "gpt-4o-mini"):
+    """모델 토크나이저 (사용할 수 없으면 None)"""
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def approx_tokens(text: str) -> int:
+    """tiktoken 없이 쓰는 토큰 수 근사치"""
+    n = 0
+    for piece in _PIECES.findall(text):
+        n += -(-len(piece) // 4) if piece.isascii() and piece.isalnum() else 1
+    return n
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """텍스트 토큰 수"""
+    enc = get_encoding(model)
+    if enc is None:
+        return approx_tokens(text)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def tokenizer_name(model: str = "gpt-4o-mini") -> str:
+    """보고서용 토크나이저 이름"""
+    enc = get_encoding(model)
+    return f"tiktoken:{enc.name}" if enc is not None else "approx"
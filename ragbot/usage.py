@@ -0,0 +1,104 @@
+"""
+LLM 토큰 사용량 기록 (프롬프트 / 캐시된 프롬프트 / 완료 토큰)
+
+응답 메타데이터(usage_metadata)에서 호출마다 토큰 수를 읽어 둡니다.
+- input_tokens: 프롬프트 토큰
+- input_token_details.cache_read: 제공자 접두어 캐시에서 읽은 프롬프트 토큰
+- output_tokens: 완료 토큰
+스트리밍 호출은 ChatOpenAI(stream_usage=True) 여야 마지막 청크에 사용량이 실립니다.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class UsageRecord(NamedTuple):
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+    prompt_version: str
+    model: str
+    timestamp: float
+
+    @property
+    def cache_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+def usage_from_message(message) -> dict:
+    """AIMessage(Chunk) → {"input_tokens", "cache_read", "output_tokens"} (정보가 없으면 None)"""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return None
+    details = usage.get("input_token_details") or {}
+    return {
+        "input_tokens": usage.get("input_tokens", 0),
+        "cache_read": details.get("cache_read", 0) or 0,
+        "output_tokens": usage.get("output_tokens", 0),
+    }
+
+
+class UsageRecorder(BaseCallbackHandler):
+    """
+    체인 호출 config={"callbacks": [recorder], "metadata": {"prompt_version": ...}} 로 연결
+    최근 maxlen 건의 호출 기록과 누적 합계를 보관
+    """
+
+    # 잠금만 잡고 끝나므로 비동기 호출(ainvoke)에서도 스레드 풀을 거치지 않고 바로 실행
+    run_inline = True
+
+    def __init__(self, maxlen: int = 1000):
+        self.records = deque(maxlen=maxlen)
+        self.totals = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") \
+            or ((serialized or {}).get("kwargs") or {}).get("model_name", "")
+        with self._lock:
+            self._runs[run_id] = ((metadata or {}).get("prompt_version", ""), model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            prompt_version, model = self._runs.pop(run_id, ("", ""))
+
+        usage = None
+        for generations in response.generations:
+            for g in generations:
+                usage = usage_from_message(getattr(g, "message", None)) or usage
+        if usage is None:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            if not token_usage:
+                return
+            usage = {
+                "input_tokens": token_usage.get("prompt_tokens", 0),
+                "cache_read": (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0,
+                "output_tokens": token_usage.get("completion_tokens", 0),
+            }
+
+        record = UsageRecord(
+            usage["input_tokens"], usage["cache_read"], usage["output_tokens"],
+            prompt_version, model, time.time(),
+        )
+        with self._lock:
+            self.records.append(record)
+            self.totals["calls"] += 1
+            self.totals["prompt_tokens"] += record.prompt_tokens
+            self.totals["cached_tokens"] += record.cached_tokens
+            self.totals["completion_tokens"] += record.completion_tokens
+
+    def last(self):
+        with self._lock:
+            return self.records[-1] if self.records else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            t = dict(self.totals)
+        t["cache_ratio"] = t["cached_tokens"] / t["prompt_tokens"] if t["prompt_tokens"] else 0.0
+        return t
@@ -0,0 +1,160 @@
+"""
+NumPy 인메모리 벡터 인덱스 (Chroma 대신 쓰는 가벼운 전수 검색)
+
+코퍼스가 작으면(청크 수십~수만 개) 근사 검색(HNSW) 클라이언트를 거치는 것보다
+정규화된 청크 벡터 행렬 하나에 질의 벡터를 곱하는 편이 빠르고 결과도 정확합니다.
+- 저장: (청크 수, 차원) 연속 행렬, float32 / float16 / int8(행별 스케일) 중 선택
+  (인덱스 아티팩트에 dtype 별로 미리 저장해 두고 메모리 매핑으로 읽으면 워커끼리 페이지 캐시 한 벌 공유)
+- 검색: 질의(또는 질의 여러 개)와 행렬 곱 한 번 → argpartition 으로 상위 k
+- 메타데이터 마스크: {"airline": "대한항공"} / {"airline": {"$in": [...]}} (Chroma where 와 같은 형식)
+- 점수: Chroma(l2 거리)와 같은 관련도 1 - 거리 / √2 (정규화 벡터의 제곱 거리 = 2 - 2·코사인)
+규모에 따른 Chroma 와의 비교는 benchmarks/vector_index.py 참고
+"""
+
+import math
+
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+
+# float16 / int8 행렬을 float32 로 풀어 곱할 때 한 번에 푸는 행 수 (임시 메모리 상한)
+BLOCK_ROWS = 16384
+
+
+def quantize(vectors, dtype: str = "float32"):
+    """임베딩 행렬 → (행별 정규화 후 dtype 으로 저장한 행렬, int8 행별 스케일 또는 None)"""
+    if dtype not in DTYPES:
+        raise ValueError(f"알 수 없는 벡터 dtype: {dtype} (가능: {', '.join(DTYPES)})")
+    m = np.asarray(vectors, dtype=np.float32)
+    m = m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+    scale = None
+    if dtype == "int8":
+        # 행별 대칭 양자화: 행 최대 절댓값을 127 로
+        scale = np.maximum(np.abs(m).max(axis=1), 1e-12).astype(np.float32) / 127.0
+        m = np.round(m / scale[:, None]).astype(np.int8)
+    return np.ascontiguousarray(m.astype(dtype, copy=False)), scale
+
+
+class VectorIndex:
+    """
+    청크 벡터 행렬 위의 정확한(전수) 유사도 검색
+    documents: 행 순서와 같은 LangChain Document 시퀀스 (similarity_search 결과용, 필요한 행만 꺼냄)
+    embeddings: 질의 임베딩 모델 (Chroma 의 embeddings 속성과 같은 용도, 없어도 됨)
+    """
+
+    def __init__(self, vectors, documents, embeddings=None, dtype: str = "float32"):
+        matrix, scale = quantize(vectors, dtype)
+        self._setup(matrix, scale, documents, embeddings)
+
+    @classmethod
+    def from_quantized(cls, matrix, documents, embeddings=None, scale=None) -> "VectorIndex":
+        """
+        quantize() 결과(또는 그것을 저장해 메모리 매핑한 배열)를 복사 없이 그대로 사용
+        인덱스 아티팩트를 여러 워커가 읽기 전용으로 공유할 때 씀
+        """
+        index = cls.__new__(cls)
+        index._setup(matrix, scale, documents, embeddings)
+        return index
+
+    def _setup(self, matrix, scale, documents, embeddings):
+        self.matrix = matrix
+        self.scale = scale
+        self.dtype = matrix.dtype.name
+        if self.dtype not in DTYPES:
+            raise ValueError(f"알 수 없는 벡터 dtype: {self.dtype} (가능: {', '.join(DTYPES)})")
+        self.documents = documents
+        self.embeddings = embeddings
+        self._columns = {}
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    # ------------------------------------------------------------------
+    # 점수
+    # ------------------------------------------------------------------
+    def cosine(self, queries) -> np.ndarray:
+        """(질의 수, 차원) → (질의 수, 청크 수) 코사인 유사도"""
+        q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        q = q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+        if self.dtype == "float32":
+            return q @ self.matrix.T
+        out = np.empty((q.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = self.matrix[start:start + BLOCK_ROWS].astype(np.float32)
+            out[:, start:start + BLOCK_ROWS] = q @ block.T
+        if self.scale is not None:
+            out *= self.scale
+        return out
+
+    @staticmethod
+    def relevance(cosine):
+        """코사인 → Chroma l2 관련도 (1 - 제곱 거리 / √2)"""
+        return 1.0 - (2.0 - 2.0 * cosine) / math.sqrt(2)
+
+    def relevance_of(self, query_vector, rows: list) -> list:
+        """질의와 지정한 행들의 관련도 (RRF 로 고른 행 점수 매기기용)"""
+        if not rows:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        cos = self.matrix[rows].astype(np.float32) @ q
+        if self.scale is not None:
+            cos *= self.scale[rows]
+        return [float(x) for x in self.relevance(cos)]
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+    def search_batch(self, queries, k: int, mask=None) -> list:
+        """
+        질의 여러 개 → 질의마다 [(행, 관련도)] 상위 k (관련도 내림차순)
+        mask: 검색 대상 행 (bool 배열, None 이면 전체)
+        """
+        scores = self.cosine(queries)
+        n = len(self)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+            n = int(mask.sum())
+        k = min(k, n)
+        if k <= 0:
+            return [[] for _ in range(scores.shape[0])]
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        rel = self.relevance(np.take_along_axis(top_scores, order, axis=1))
+        return [list(zip(rows.tolist(), r.tolist())) for rows, r in zip(top, rel)]
+
+    def search(self, query_vector, k: int, mask=None) -> list:
+        """질의 하나 → [(행, 관련도)] 상위 k"""
+        return self.search_batch([query_vector], k, mask)[0]
+
+    def mask(self, filter: dict):
+        """Chroma where 형식 조건 → 행 마스크 (None 이면 None)"""
+        if not filter:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        for key, cond in filter.items():
+            values = list(cond["$in"]) if isinstance(cond, dict) else [cond]
+            mask &= self._mask(key, values)
+        return mask
+
+    def _mask(self, key: str, values: list) -> np.ndarray:
+        if hasattr(self.documents, "mask"):
+            # 아티팩트 청크 테이블: 저장된 열로 바로 마스크
+            return self.documents.mask(key, values)
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = np.array([d.metadata.get(key) for d in self.documents], dtype=object)
+        return np.isin(column, values)
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k: int = 4, filter: dict = None) -> list:
+        """similarity_search_with_relevance_scores 와 같은 (Document, 관련도) 목록 (filter: Chroma where 형식)"""
+        return [(self.documents[row], score) for row, score in self.search(embedding, k, self.mask(filter))]
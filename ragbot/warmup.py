@@ -0,0 +1,94 @@
+"""
+엔진 백그라운드 준비 (warm-up)
+
+엔진 생성(langchain_openai 등 무거운 모듈 import)과 인덱스 로드/빌드를 별도 스레드에서 진행해
+화면이 먼저 그려지도록 합니다. 단계: pending → engine → index → ready (실패하면 error)
+- 엔진이 만들어지면 인덱스가 필요 없는 일반 대화(base_chain)는 바로 사용 가능
+- 규정 검색은 wait() 로 인덱스 준비를 기다린 뒤 호출
+"""
+
+import threading
+import time
+
+STAGE_LABELS = {
+    "pending": "시작 대기",
+    "engine": "엔진 준비 중 (모델/라이브러리 로드)",
+    "index": "인덱스 로드 중 (최신이 아니면 새로 빌드)",
+    "ready": "준비 완료",
+    "error": "준비 실패",
+}
+
+
+class EngineWarmup:
+    """
+    factory(): 엔진 생성 / loader(engine): 인덱스 준비 (반환값은 report 로 보관)
+    start() 는 여러 번 불러도 스레드를 한 번만 시작
+    """
+
+    def __init__(self, factory, loader):
+        self.factory = factory
+        self.loader = loader
+        self.stage = "pending"
+        self.engine = None
+        self.report = None
+        self.error = None
+        self.timings = {}           # 단계 → 초
+        self._engine_ready = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "EngineWarmup":
+        with self._lock:
+            if self._thread is None:
+                self._t0 = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name="engine-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.stage = "engine"
+            t = time.perf_counter()
+            self.engine = self.factory()
+            self.timings["engine"] = time.perf_counter() - t
+            self._engine_ready.set()
+
+            self.stage = "index"
+            t = time.perf_counter()
+            self.report = self.loader(self.engine)
+            self.timings["index"] = time.perf_counter() - t
+            self.stage = "ready"
+        except Exception as e:
+            self.error = e
+            self.stage = "error"
+        finally:
+            self._engine_ready.set()
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.stage == "ready"
+
+    @property
+    def label(self) -> str:
+        return STAGE_LABELS[self.stage]
+
+    @property
+    def elapsed(self) -> float:
+        """시작 후 경과 시간 (끝났으면 전체 소요 시간)"""
+        if self._thread is None:
+            return 0.0
+        if self._done.is_set():
+            return sum(self.timings.values())
+        return time.perf_counter() - self._t0
+
+    def wait_engine(self, timeout: float = None):
+        """엔진 생성까지 대기 (실패/시간 초과면 None)"""
+        self._engine_ready.wait(timeout)
+        return self.engine
+
+    def wait(self, timeout: float = None) -> bool:
+        """인덱스 준비까지 대기 (준비되면 True)"""
+        self._done.wait(timeout)
+        return self.ready
@@ -0,0 +1,109 @@
+"""
+코퍼스(MD 파일) 변경 감시 → 증분 재색인
+
+interval 초마다 코퍼스 파일 목록과 파일별 (수정 시각, 크기)를 훑어 추가 / 변경 / 삭제를 찾고,
+저장 중인 파일이 안정될 때까지 한 주기 더 기다린 뒤 engine.refresh() 를 부릅니다.
+refresh 는 바뀐 문서만 다시 분할 / 임베딩한 새 세대를 현재 세대 옆에 만들어 한 번에 교체하므로
+진행 중인 요청은 이전 세대를 끝까지 읽고, 앱 재시작이나 캐시 전체 초기화가 필요 없습니다.
+파일이 수십~수백 개 규모라 외부 의존성 없이 폴링(stat)으로 구현합니다.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+
+from ragbot.corpus import find_corpus_files
+
+logger = logging.getLogger("ragbot.watcher")
+
+
+def snapshot(patterns=None) -> dict:
+    """코퍼스 파일 → (수정 시각 ns, 크기)"""
+    out = {}
+    for fp in find_corpus_files(patterns):
+        try:
+            st = Path(fp).stat()
+        except OSError:
+            continue
+        out[fp] = (st.st_mtime_ns, st.st_size)
+    return out
+
+
+class CorpusWatcher:
+    """
+    엔진 하나의 코퍼스 감시 스레드
+    - check(): 한 번 훑기 (변경이 안정됐으면 재색인하고 LoadReport, 아니면 None)
+    - start() / stop(): 백그라운드 폴링 (daemon 스레드)
+    """
+
+    def __init__(self, engine, interval: float = 5.0, patterns=None):
+        self.engine = engine
+        self.interval = interval
+        self.patterns = patterns
+        self.last = snapshot(patterns)
+        self.pending = None             # 변경을 본 스냅샷 (다음 주기에도 같으면 재색인)
+        self.checks = 0
+        self.reloads = 0
+        self.errors = 0
+        self.last_report = None
+        self.last_error = None
+        self.last_ms = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """한 번 훑기 → 재색인했으면 LoadReport"""
+        self.checks += 1
+        current = snapshot(self.patterns)
+        if current == self.last:
+            self.pending = None
+            return None
+        if current != self.pending:
+            # 처음 본 변경: 파일 저장이 끝나도록 한 주기 대기
+            self.pending = current
+            return None
+
+        t = time.perf_counter()
+        try:
+            report = self.engine.refresh(sorted(current))
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            self.pending = None
+            logger.exception("corpus refresh failed")
+            return None
+        self.last_ms = (time.perf_counter() - t) * 1000
+        self.last, self.pending = current, None
+        self.reloads += 1
+        self.last_report = report
+        self.last_error = None
+        logger.info("corpus refreshed: %s (%s, %.0f ms)", self.engine.generation, report.status, self.last_ms)
+        return report
+
+    def start(self) -> "CorpusWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "files": len(self.last),
+            "checks": self.checks,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "last_ms": round(self.last_ms, 1) if self.last_ms is not None else None,
+            "last_status": self.last_report.status if self.last_report is not None else None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,217 @@
+"""
+RAG 엔진 HTTP API (FastAPI)
+
+Streamlit 화면과 별개로 웹 위젯 / 메시징 봇 같은 다른 클라이언트가 같은 엔진을 쓰도록 합니다.
+워커 프로세스마다 RagEngine 을 하나 만들고, 인덱스는 백그라운드에서 로드합니다 (로드 중에는 /ready 가 503).
+로드 중에도 /ask 의 일반 대화(RAG 라우팅 키워드가 없는 질문)는 답하고, 규정 검색이 필요한 질문만 503 입니다.
+요청은 엔진의 비동기 메서드(aask / afilter_search)로 처리하므로 한 워커의 이벤트 루프에서
+여러 요청의 임베딩 / LLM 대기가 겹치고, 동시에 들어온 질의 임베딩은 한 번의 배치 호출로 묶입니다.
+
+엔드포인트
+- GET  /health         : 프로세스 상태 + 인덱스 요약
+- GET  /ready          : 인덱스 로드 완료 여부 (200 / 503)
+- POST /ask            : 채팅 질문 (RAG 라우팅 → 규정 검색 답변 또는 일반 대화)
+- POST /filter-search  : 사이드바 필터 검색
+- GET  /chunks/{id}    : 근거 청크 본문 (응답의 sources 에는 chunk_id 만 담김)
+- GET  /stats          : 캐시 / 토큰 사용량 누적
+- GET  /metrics        : Prometheus 지표 (워커별)
+stream=true 이면 NDJSON 으로 {"type": "meta"} → {"type": "token"}... → {"type": "done"} 를 보냅니다.
+
+사용법:
+    uvicorn server:app --host 0.0.0.0 --port 8000 --workers 4
+    python server.py --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+
+from ragbot.config import METRICS_JSON_LOG
+from ragbot.engine import IndexNotReadyError, RagEngine
+from ragbot.metrics import REGISTRY, Trace, setup_json_log
+
+logger = logging.getLogger("ragbot.server")
+
+
+class Turn(BaseModel):
+    role: str = Field(pattern="^(user|assistant)$")
+    content: str
+
+
+class AskRequest(BaseModel):
+    q: str = Field(min_length=1)
+    history: List[Turn] = []
+    k: int = Field(5, ge=1, le=10)
+    threshold: float = Field(0.3, ge=0.0, le=1.0)
+    stream: bool = False
+
+
+class FilterRequest(BaseModel):
+    airline: Optional[str] = None
+    route: Optional[str] = None
+    seat: Optional[str] = None
+    regulation: Optional[str] = None
+    history: List[Turn] = []
+    k: int = Field(5, ge=1, le=10)
+    threshold: float = Field(0.3, ge=0.0, le=1.0)
+    stream: bool = False
+
+
+class EngineState:
+    """워커 프로세스의 엔진과 로드 상태"""
+
+    def __init__(self):
+        self.engine = None
+        self.error = None
+        self.task = None
+
+    async def start(self, engine_factory=RagEngine):
+        self.engine = await run_in_threadpool(engine_factory)
+        self.task = asyncio.create_task(self._load())
+
+    async def _load(self):
+        try:
+            report = await run_in_threadpool(self.engine.load)
+            logger.info("index ready: %s (%s)", self.engine.generation, report.status)
+            # 코퍼스 변경 감시: 바뀐 문서만 재색인해 새 세대로 교체 (CORPUS_WATCH_INTERVAL)
+            self.engine.watch()
+        except Exception as e:
+            self.error = str(e)
+            logger.exception("index load failed")
+
+
+def create_app(engine_factory=RagEngine) -> FastAPI:
+    """API 앱 생성 (engine_factory: 워커마다 엔진을 만드는 함수 - 테스트/벤치마크는 대역 주입)"""
+    state = EngineState()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        if METRICS_JSON_LOG:
+            setup_json_log()
+        await state.start(engine_factory)
+        yield
+        if state.engine is not None and state.engine.watcher is not None:
+            state.engine.watcher.stop()
+
+    app = FastAPI(title="항공권 환불 상담 RAG API", lifespan=lifespan)
+
+    def created_engine() -> RagEngine:
+        """엔진 (인덱스 로드 전이어도 일반 대화용으로 사용)"""
+        if state.engine is None:
+            raise HTTPException(503, state.error or "엔진을 준비하는 중입니다.")
+        return state.engine
+
+    def ready_engine() -> RagEngine:
+        if state.engine is None or not state.engine.ready:
+            raise HTTPException(503, state.error or "인덱스를 로드하는 중입니다.")
+        return state.engine
+
+    def respond(result, stream: bool):
+        """RagResult → JSON 또는 NDJSON 스트림 (전송이 끝나면 trace 기록)"""
+        if not stream:
+            result.finish()
+            return result.to_dict()
+
+        async def events():
+            try:
+                yield json.dumps({"type": "meta", "path": result.path, "sources": result.sources,
+                                  "debug": result.debug, "request_id": result.trace.request_id},
+                                 ensure_ascii=False) + "\n"
+                if result.streaming:
+                    async for token in result.answer:
+                        yield json.dumps({"type": "token", "text": token}, ensure_ascii=False) + "\n"
+                else:
+                    yield json.dumps({"type": "token", "text": result.answer}, ensure_ascii=False) + "\n"
+                result.finish()
+                yield json.dumps({"type": "done", "usage": result.usage, "trace": result.trace.to_dict()},
+                                 ensure_ascii=False) + "\n"
+            except Exception as e:
+                result.trace.set(error=str(e))
+                result.trace.finish("error")
+                yield json.dumps({"type": "error", "message": str(e)}, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    async def run(trace: Trace, call):
+        try:
+            return await call
+        except ValueError as e:
+            trace.finish("bad_request")
+            raise HTTPException(422, str(e))
+        except IndexNotReadyError as e:
+            trace.finish("not_ready")
+            raise HTTPException(503, state.error or str(e))
+        except Exception as e:
+            trace.set(error=str(e))
+            trace.finish("error")
+            raise
+
+    @app.get("/health")
+    async def health():
+        info = state.engine.info() if state.engine is not None else {"ready": False}
+        return {"status": "error" if state.error else "ok", "error": state.error, **info}
+
+    @app.get("/ready")
+    async def ready():
+        ready_engine()
+        return {"ready": True}
+
+    @app.post("/ask")
+    async def ask(req: AskRequest):
+        engine = created_engine()
+        trace = Trace("rag")
+        history = [(t.role, t.content) for t in req.history]
+        result = await run(trace, engine.aask(req.q, history, req.k, req.threshold, req.stream, trace))
+        return respond(result, req.stream)
+
+    @app.post("/filter-search")
+    async def filter_search(req: FilterRequest):
+        engine = ready_engine()
+        trace = Trace("filter")
+        history = [(t.role, t.content) for t in req.history]
+        result = await run(trace, engine.afilter_search(req.airline, req.route, req.seat, req.regulation,
+                                                        history, req.k, req.threshold, req.stream, trace))
+        return respond(result, req.stream)
+
+    @app.get("/chunks/{chunk_id}")
+    async def chunk(chunk_id: str):
+        source = ready_engine().chunk(chunk_id)
+        if source is None:
+            raise HTTPException(404, f"청크를 찾을 수 없습니다: {chunk_id}")
+        return source
+
+    @app.get("/stats")
+    async def stats():
+        return ready_engine().stats()
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+app = create_app()
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="항공권 환불 상담 RAG API 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="워커 프로세스 수 (워커마다 엔진 하나)")
+    args = parser.parse_args()
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()